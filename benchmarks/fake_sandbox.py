@@ -0,0 +1,144 @@
+import base64
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class FakeSandboxConfig:
+    latency: float = 0.0
+    output_size: int = 100
+    files: dict[str, bytes] = field(default_factory=dict)
+
+
+class FakeSandbox:
+    """A local stand-in for the AIO sandbox HTTP API.
+
+    Implements the endpoints Keystone's tools use, answering after
+    ``latency`` seconds with ``output_size`` chars of output. Files live in
+    memory. Good enough to measure Keystone's own overhead without Docker.
+    """
+
+    def __init__(self, config: FakeSandboxConfig | None = None) -> None:
+        self.config = config or FakeSandboxConfig()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSandbox":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeSandbox":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _output(self) -> str:
+        line = "x" * 79 + "\n"
+        size = self.config.output_size
+        return (line * (size // len(line) + 1))[:size]
+
+    def _route(self, method: str, path: str, query: dict, body: dict) -> dict | bytes:
+        files = self.config.files
+        if (method, path) == ("POST", "/v1/jupyter/sessions/create"):
+            session_id = body.get("session_id") or uuid.uuid4().hex
+            return {"session_id": session_id, "kernel_name": "python3", "message": "created"}
+        if (method, path) == ("GET", "/v1/jupyter/sessions"):
+            return {"sessions": {}}
+        if method == "DELETE" and path.startswith("/v1/jupyter/sessions/"):
+            return {}
+        if (method, path) == ("POST", "/v1/jupyter/execute"):
+            return {
+                "kernel_name": "python3",
+                "session_id": body.get("session_id"),
+                "status": "ok",
+                "execution_count": 1,
+                "code": body.get("code", ""),
+                "outputs": [{"output_type": "stream", "name": "stdout", "text": self._output()}],
+            }
+        if (method, path) == ("POST", "/v1/shell/exec"):
+            return {
+                "session_id": body.get("id") or uuid.uuid4().hex,
+                "command": body.get("command", ""),
+                "status": "completed",
+                "output": self._output(),
+                "exit_code": 0,
+            }
+        if (method, path) == ("POST", "/v1/file/write"):
+            content = body.get("content", "")
+            data = (
+                base64.b64decode(content) if body.get("encoding") == "base64" else content.encode()
+            )
+            if body.get("append"):
+                data = files.get(body["file"], b"") + data
+            files[body["file"]] = data
+            return {"file": body["file"], "bytes_written": len(data)}
+        if (method, path) == ("POST", "/v1/file/read"):
+            if body["file"] not in files:
+                raise FileNotFoundError(body["file"])
+            return {"file": body["file"], "content": files[body["file"]].decode(errors="replace")}
+        if (method, path) == ("GET", "/v1/file/download"):
+            return files[query["path"][0]]
+        raise LookupError(path)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self, method: str) -> None:
+                with fake._lock:
+                    fake.requests += 1
+                if fake.config.latency:
+                    time.sleep(fake.config.latency)
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                try:
+                    data = fake._route(method, url.path, parse_qs(url.query), body)
+                except (KeyError, FileNotFoundError, LookupError) as e:
+                    self._send(404, json.dumps({"detail": f"not found: {e}"}).encode())
+                    return
+                if isinstance(data, bytes):
+                    self._send(200, data, "application/octet-stream")
+                else:
+                    payload = {"success": True, "message": "ok", "data": data}
+                    self._send(200, json.dumps(payload).encode())
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
@@ -0,0 +1,155 @@
+"""Measure Keystone's tool-layer overhead against a local fake sandbox.
+
+uv run python -m benchmarks.run --latency 5 --output-size 20000 --concurrency 1,8,32
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import anyio
+
+from .fake_sandbox import FakeSandbox, FakeSandboxConfig
+
+WORKLOADS = ["execute_python", "run_shell", "write_file", "read_file", "agent_loop"]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _call(tools, name: str, args: dict, latencies: list[float]) -> None:
+    start = time.perf_counter()
+    result = await tools[name].handler(args)
+    latencies.append(time.perf_counter() - start)
+    if result.get("is_error"):
+        raise RuntimeError(f"{name} failed: {result['content'][0]['text']}")
+
+
+async def _session(workload: str, iterations: int, tools, latencies: list[float]) -> None:
+    from keystone.cache import file_cache
+    from keystone.kernels import kernels
+    from keystone.sandbox import activate, pool
+
+    session = uuid.uuid4().hex
+    activate(session)
+    pool.acquire(session)
+    path = f"/tmp/bench-{session}.txt"
+    await tools["write_file"].handler({"path": path, "content": "seed"})
+    try:
+        for i in range(iterations):
+            if workload == "execute_python":
+                await _call(tools, "execute_python", {"code": f"print({i})"}, latencies)
+            elif workload == "run_shell":
+                await _call(tools, "run_shell", {"command": f"echo {i}"}, latencies)
+            elif workload == "write_file":
+                await _call(tools, "write_file", {"path": path, "content": f"v{i}"}, latencies)
+            elif workload == "read_file":
+                file_cache.invalidate(session, path)
+                await _call(tools, "read_file", {"path": path}, latencies)
+            else:
+                script = f"/tmp/bench-{session}-{i}.py"
+                await _call(
+                    tools, "write_file", {"path": script, "content": f"print({i})"}, latencies
+                )
+                await _call(tools, "run_shell", {"command": f"python3 {script}"}, latencies)
+                await _call(tools, "execute_python", {"code": "result = 1"}, latencies)
+                await _call(tools, "read_file", {"path": path}, latencies)
+    finally:
+        await kernels.release(session)
+        file_cache.invalidate(session)
+        pool.release(session)
+
+
+async def run_workload(workload: str, concurrency: int, iterations: int) -> dict:
+    from keystone.tools import ALL_TOOLS
+
+    tools = {t.name: t for t in ALL_TOOLS}
+    latencies: list[float] = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(_session, workload, iterations, tools, latencies)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "workload": workload,
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "throughput": len(latencies) / wall,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+async def run(
+    workloads: list[str], levels: list[int], iterations: int, config: FakeSandboxConfig
+) -> list[dict]:
+    with FakeSandbox(config) as fake, open(os.devnull, "w") as devnull:
+        os.environ.setdefault(
+            "KEYSTONE_TRACE_FILE", os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+        )
+        from keystone import sandbox as sandbox_module
+
+        sandbox_module.pool = sandbox_module.SandboxPool([fake.url])
+        results = []
+        # Tool logging still runs, but into /dev/null so the table stays readable.
+        with contextlib.redirect_stdout(devnull):
+            for workload in workloads:
+                for level in levels:
+                    results.append(await run_workload(workload, level, iterations))
+        return results
+
+
+def _print_table(results: list[dict]) -> None:
+    header = (
+        f"{'workload':<16}{'conc':>6}{'calls':>8}{'calls/s':>10}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'peak KB':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['workload']:<16}{r['concurrency']:>6}{r['calls']:>8}{r['throughput']:>10.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['peak_mem_kb']:>10.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake sandbox latency (ms)")
+    parser.add_argument("--output-size", type=int, default=1000, help="chars per tool output")
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    config = FakeSandboxConfig(latency=args.latency / 1000, output_size=args.output_size)
+    results = anyio.run(
+        run,
+        args.workloads.split(","),
+        [int(c) for c in args.concurrency.split(",")],
+        args.iterations,
+        config,
+    )
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
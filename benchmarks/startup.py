@@ -0,0 +1,108 @@
+"""Measure Keystone's cold-start time and import profile.
+
+uv run python -m benchmarks.startup --runs 10 --profile cli --budget 1.0
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Each target runs in a fresh interpreter. The "budgeted" ones are what a user
+# waits on before any agent work starts; "agent" is the SDK floor for reference.
+TARGETS = {
+    "package": ("import keystone", True),
+    "cli": ("import keystone.cli", True),
+    "help": (
+        "import sys; sys.argv = ['keystone', '--help']\n"
+        "from keystone.cli import main\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass",
+        True,
+    ),
+    "agent": ("import keystone.agent", False),
+}
+
+
+def measure(code: str, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return {
+        "runs": runs,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "max_s": max(samples),
+    }
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of ``-X importtime`` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def profile(code: str, top: int) -> list[tuple[str, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], check=True, capture_output=True, text=True
+    )
+    modules = parse_importtime(proc.stderr)
+    # Top-level packages by cumulative time: where the startup actually goes.
+    roots = [m for m in modules if "." not in m[0] or m[0].startswith("keystone")]
+    return sorted(roots, key=lambda m: -m[2])[:top]
+
+
+def run(targets: list[str], runs: int) -> list[dict]:
+    return [{"target": name, **measure(TARGETS[name][0], runs)} for name in targets]
+
+
+def _print_table(results: list[dict]) -> None:
+    header = f"{'target':<10}{'runs':>6}{'min s':>9}{'median s':>10}{'max s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['target']:<10}{r['runs']:>6}{r['min_s']:>9.3f}"
+            f"{r['median_s']:>10.3f}{r['max_s']:>9.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile", choices=list(TARGETS), help="show the slowest imports")
+    parser.add_argument("--top", type=int, default=15, help="modules listed by --profile")
+    parser.add_argument(
+        "--budget", type=float, help="fail if a budgeted target's median exceeds this (s)"
+    )
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.targets.split(","), args.runs)
+    _print_table(results)
+    if args.profile:
+        print(f"\nslowest imports for {args.profile} (cumulative ms, self ms):")
+        for name, own, cumulative in profile(TARGETS[args.profile][0], args.top):
+            print(f"  {cumulative / 1000:>8.1f} {own / 1000:>8.1f}  {name}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.budget is not None:
+        over = [
+            r["target"] for r in results if TARGETS[r["target"]][1] and r["median_s"] > args.budget
+        ]
+        if over:
+            sys.exit(f"over the {args.budget:g}s startup budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
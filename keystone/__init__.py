@@ -1,3 +1,10 @@
-from .agent import KeystoneAgent
-
 __all__ = ["KeystoneAgent"]
+
+
+def __getattr__(name: str):
+    # Importing the agent loads the SDK; defer it until someone asks for it.
+    if name == "KeystoneAgent":
+        from .agent import KeystoneAgent
+
+        return KeystoneAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
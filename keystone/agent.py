@@ -1,42 +1,211 @@
+import time
+import uuid
+from contextlib import suppress
+
+import anyio
 from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, create_sdk_mcp_server
 
-from .config import SYSTEM_PROMPT, MCP_SERVER_NAME, MCP_SERVER_VERSION, SANDBOX_URL
-from .sandbox import sandbox
-from .tools import ALL_TOOLS, tool_names
+from .automations import ReplayError, automations, recorded
+from .cache import file_cache
+from .config import (
+    AUTOMATIONS,
+    SYSTEM_PROMPT,
+    MCP_SERVER_NAME,
+    MCP_SERVER_VERSION,
+    PRELOAD_IMPORTS,
+    SNAPSHOTS,
+)
+from .console import console
+from .context import budgeted, context
+from .jobs import jobs
+from .kernels import kernels
+from .memo import memo
+from .packages import packages
+from .sandbox import activate, pool, sandbox
+from .search import search_index
+from .snapshot import journaled, snapshots
+from .tools import ALL_TOOLS, fetch_result, tool_names
+from .tracing import tracer
+
+
+def _preload_code(modules: list[str]) -> str:
+    return "\n".join(f"try:\n    import {m}\nexcept ImportError:\n    pass" for m in modules)
 
 
 class KeystoneAgent:
-    def __init__(self) -> None:
+    def __init__(
+        self, session_id: str | None = None, resume: bool = False, workspace: str | None = None
+    ) -> None:
+        self.session_id = session_id or uuid.uuid4().hex
+        self.snapshot = snapshots.load(self.session_id) if resume else None
+        pool.acquire(self.session_id)
         server = create_sdk_mcp_server(
             name=MCP_SERVER_NAME,
             version=MCP_SERVER_VERSION,
-            tools=ALL_TOOLS,
+            tools=[t if t is fetch_result else budgeted(journaled(recorded(t))) for t in ALL_TOOLS],
         )
+        system_prompt = SYSTEM_PROMPT
+        if workspace:
+            system_prompt += (
+                f"\nThe user's project is mirrored at {workspace} in the sandbox. Work on the "
+                "files there; changes are synced back to the user's machine after each turn.\n"
+            )
         options = ClaudeAgentOptions(
-            system_prompt=SYSTEM_PROMPT,
+            system_prompt=system_prompt,
             mcp_servers={MCP_SERVER_NAME: server},
             allowed_tools=tool_names(MCP_SERVER_NAME),
             permission_mode="bypassPermissions",
+            resume=self.snapshot.conversation_id if self.snapshot else None,
         )
         self.client = ClaudeSDKClient(options=options)
 
     async def check_sandbox(self) -> None:
-        print("Connecting to sandbox...")
+        activate(self.session_id)
+        console.message("Connecting to sandbox...")
         try:
             ctx = await sandbox.sandbox.get_context()
-            print(f"Sandbox ready (version {ctx.version}, home: {ctx.home_dir})")
+            console.message(f"Sandbox ready (version {ctx.version}, home: {ctx.home_dir})")
         except Exception as e:
             raise ConnectionError(
-                f"Could not reach sandbox at {SANDBOX_URL}: {e}\n"
+                f"Could not reach sandbox at {pool.acquire(self.session_id).url}: {e}\n"
                 "Start it with: docker run --security-opt seccomp=unconfined "
                 "--rm -it -p 8081:8080 ghcr.io/agent-infra/sandbox:latest"
             ) from e
 
+    async def prepare_sandbox(self) -> None:
+        await self.check_sandbox()
+        try:
+            await packages.configure()
+        except Exception as e:
+            console.message(f"Could not configure pip in the sandbox: {e}")
+        if self.snapshot is not None:
+            try:
+                outcome = await snapshots.restore(self.snapshot)
+            except Exception as e:
+                console.message(f"Could not restore sandbox state: {e}")
+            else:
+                console.message(f"Resumed session {self.session_id}: {outcome}")
+
+    async def preload_kernel(self) -> None:
+        activate(self.session_id)
+        try:
+            result = await kernels.execute(self.session_id, _preload_code(PRELOAD_IMPORTS))
+            if result.data.status != "ok":
+                console.message(f"Kernel warmup finished with status {result.data.status}")
+        except Exception as e:
+            console.message(f"Kernel warmup failed: {e}")
+
+    async def warmup(self) -> dict[str, float]:
+        """Check the sandbox, start the kernel and connect the SDK client concurrently.
+
+        Leaves the agent connected and returns how long each phase took. If a
+        phase fails the agent is disconnected and the error re-raised.
+        """
+        activate(self.session_id)
+        timings: dict[str, float] = {}
+        errors: list[Exception] = []
+        start = time.perf_counter()
+
+        async with anyio.create_task_group() as tg:
+
+            async def timed(name: str, phase) -> None:
+                phase_start = time.perf_counter()
+                try:
+                    await phase()
+                except Exception as e:
+                    errors.append(e)
+                    tg.cancel_scope.cancel()
+                    return
+                timings[name] = time.perf_counter() - phase_start
+
+            tg.start_soon(timed, "sandbox", self.prepare_sandbox)
+            tg.start_soon(timed, "kernel", self.preload_kernel)
+            tg.start_soon(timed, "client", self.connect)
+
+        if errors:
+            with suppress(Exception):
+                await self.disconnect()
+            raise errors[0]
+
+        timings["total"] = time.perf_counter() - start
+        console.message(
+            "Warmup: " + ", ".join(f"{name} {secs:.2f}s" for name, secs in timings.items())
+        )
+        return timings
+
+    def checkpoint(self, conversation_id: str | None) -> None:
+        if SNAPSHOTS:
+            snapshots.save(self.session_id, conversation_id)
+
+    def record_automation(self, prompt: str, ok: bool) -> None:
+        """Save the turn's tool calls as an automation for ``prompt``, or drop them."""
+        if AUTOMATIONS and ok:
+            automations.save(self.session_id, prompt)
+        else:
+            automations.discard(self.session_id)
+
+    async def replay(self, prompt: str) -> str | None:
+        """Run a saved automation for ``prompt`` without the model.
+
+        Returns its output, or None when there is no automation for the prompt or
+        a step failed, in which case the prompt should go to the model.
+        """
+        if not AUTOMATIONS:
+            return None
+        found = automations.match(prompt)
+        if found is None:
+            return None
+        activate(self.session_id)
+        try:
+            return await automations.replay(*found)
+        except ReplayError as e:
+            console.message(f"Saved automation failed at {e}; asking the agent instead")
+            return None
+
+    async def save_snapshot(self) -> None:
+        """Archive the sandbox changes made in this session so it can be resumed."""
+        if not SNAPSHOTS:
+            return
+        try:
+            await snapshots.export(self.session_id)
+        except Exception as e:
+            console.message(f"Could not save session snapshot: {e}")
+        else:
+            console.message(
+                f"Session saved. Resume with: uv run main.py --resume {self.session_id}"
+            )
+
+    async def compact_if_needed(self) -> bool:
+        """Compact the conversation once its tool output exceeds the context budget."""
+        if not context.needs_compaction(self.session_id):
+            return False
+        await self.client.query("/compact")
+        async for _ in self.client.receive_response():
+            pass
+        context.compacted(self.session_id)
+        return True
+
     async def connect(self) -> None:
+        # Tool handlers run in tasks the SDK spawns during connect, so they
+        # inherit this session binding and resolve `sandbox` to our endpoint.
+        activate(self.session_id)
         await self.client.__aenter__()
 
     async def disconnect(self) -> None:
-        await self.client.__aexit__(None, None, None)
+        try:
+            await self.client.__aexit__(None, None, None)
+        finally:
+            await kernels.release(self.session_id)
+            await jobs.release(self.session_id)
+            file_cache.invalidate(self.session_id)
+            memo.invalidate(self.session_id)
+            context.release(self.session_id)
+            snapshots.release(self.session_id)
+            packages.release(self.session_id)
+            automations.release(self.session_id)
+            search_index.release(self.session_id)
+            tracer.end_session(self.session_id)
+            pool.release(self.session_id)
 
     async def __aenter__(self):
         await self.connect()
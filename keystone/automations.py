@@ -0,0 +1,195 @@
+import copy
+import dataclasses
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .config import AUTOMATION_DIR
+from .sandbox import current_session
+from .snapshot import snapshots, succeeded
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import SdkMcpTool
+
+RECORDED_TOOLS = {
+    "execute_python",
+    "run_shell",
+    "run_shell_batch",
+    "write_file",
+    "write_files",
+    "install_packages",
+}
+# Quoted strings, URLs and paths or file names are the parts of a prompt that vary
+# between runs of the same automation.
+_PARAM = re.compile(
+    r"\"([^\"]+)\"|'([^']+)'|`([^`]+)`|(\b\w+://\S+|\S*/\S+|\b[\w-]+\.[A-Za-z0-9]{1,5}\b)"
+)
+
+
+def parameterize(prompt: str) -> tuple[str, list[str]]:
+    """Split a prompt into a normalized template and the values that fill it."""
+    params: list[str] = []
+    parts: list[str] = []
+    prompt = prompt.strip().rstrip(".!?")
+    last = 0
+    for m in _PARAM.finditer(prompt):
+        parts.append(prompt[last : m.start()].lower())
+        parts.append("{}")
+        params.append(next(g for g in m.groups() if g is not None))
+        last = m.end()
+    parts.append(prompt[last:].lower())
+    return " ".join("".join(parts).split()), params
+
+
+def _substitute(value, pattern: re.Pattern | None, mapping: dict[str, str]):
+    if pattern is None:
+        return value
+    if isinstance(value, str):
+        return pattern.sub(lambda m: mapping[m.group(0)], value)
+    if isinstance(value, list):
+        return [_substitute(v, pattern, mapping) for v in value]
+    if isinstance(value, dict):
+        return {k: _substitute(v, pattern, mapping) for k, v in value.items()}
+    return value
+
+
+@dataclass
+class Automation:
+    template: str
+    prompt: str
+    params: list[str]
+    steps: list[dict]
+    created: float = field(default_factory=time.time)
+    runs: int = 0
+
+    @property
+    def automation_id(self) -> str:
+        return hashlib.sha256(self.template.encode()).hexdigest()[:16]
+
+    def bind(self, params: list[str]) -> list[dict]:
+        """Return the steps with the recorded parameter values replaced by ``params``."""
+        mapping = {old: new for old, new in zip(self.params, params, strict=True) if old != new}
+        # One alternation, longest first, so a replaced value is never replaced again.
+        # A value only matches as a whole token: `a.csv` must not rewrite `data.csv`.
+        alternation = "|".join(re.escape(p) for p in sorted(mapping, key=len, reverse=True))
+        pattern = re.compile(rf"(?<![\w.-])(?:{alternation})(?![\w-])") if mapping else None
+        return [_substitute(copy.deepcopy(step), pattern, mapping) for step in self.steps]
+
+
+class ReplayError(Exception):
+    def __init__(self, step: int, tool: str, output: str) -> None:
+        super().__init__(f"step {step} ({tool}) failed: {output}")
+        self.step = step
+        self.tool = tool
+        self.output = output
+
+
+class AutomationStore:
+    """Turns successful turns into automations that can run without the model.
+
+    While a turn runs, every successful sandbox-changing tool call is captured.
+    When the turn ends well, the captured calls are saved under the prompt's
+    normalized template, with quoted strings, paths and URLs as parameters. A
+    later prompt with the same template replays the calls directly, with its
+    own parameter values substituted in.
+    """
+
+    def __init__(self, root: str | Path = AUTOMATION_DIR) -> None:
+        self.root = Path(root)
+        self._captures: dict[str, list[dict]] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def index(self) -> dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    def _write(self, path: Path, data: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        tmp.replace(path)
+
+    def capture(self, session: str, tool: str, args: dict) -> None:
+        self._captures.setdefault(session, []).append({"tool": tool, "args": copy.deepcopy(args)})
+
+    def discard(self, session: str) -> None:
+        self._captures.pop(session, None)
+
+    def save(self, session: str, prompt: str) -> Automation | None:
+        steps = self._captures.pop(session, [])
+        if not steps:
+            return None
+        template, params = parameterize(prompt)
+        automation = Automation(template, prompt, params, steps)
+        self._store(automation)
+        return automation
+
+    def _store(self, automation: Automation) -> None:
+        self._write(self.root / f"{automation.automation_id}.json", dataclasses.asdict(automation))
+        index = self.index()
+        index[automation.template] = {
+            "id": automation.automation_id,
+            "prompt": automation.prompt,
+            "steps": len(automation.steps),
+            "runs": automation.runs,
+        }
+        self._write(self.index_path, index)
+
+    def match(self, prompt: str) -> tuple[Automation, list[str]] | None:
+        template, params = parameterize(prompt)
+        entry = self.index().get(template)
+        if entry is None:
+            return None
+        path = self.root / f"{entry['id']}.json"
+        if not path.exists():
+            return None
+        return Automation(**json.loads(path.read_text())), params
+
+    async def replay(self, automation: Automation, params: list[str]) -> str:
+        from .tools import ALL_TOOLS
+
+        handlers = {t.name: t.handler for t in ALL_TOOLS}
+        session = current_session()
+        outputs = []
+        steps = automation.bind(params)
+        for n, step in enumerate(steps, 1):
+            result = await handlers[step["tool"]](step["args"])
+            text = "".join(b.get("text", "") for b in result.get("content", []))
+            if not succeeded(step["tool"], result):
+                raise ReplayError(n, step["tool"], text)
+            if session is not None:
+                snapshots.record(session, step["tool"], step["args"])
+            outputs.append(f"[{n}/{len(steps)} {step['tool']}]\n{text}")
+        automation.runs += 1
+        self._store(automation)
+        return "\n".join(outputs)
+
+    def release(self, session: str) -> None:
+        self.discard(session)
+
+
+automations = AutomationStore()
+
+
+def recorded(sdk_tool: "SdkMcpTool") -> "SdkMcpTool":
+    """Capture successful sandbox-changing calls for the session's automation."""
+    if sdk_tool.name not in RECORDED_TOOLS:
+        return sdk_tool
+    handler = sdk_tool.handler
+
+    async def wrapper(args: dict) -> dict:
+        result = await handler(args)
+        session = current_session()
+        if session is not None and succeeded(sdk_tool.name, result):
+            automations.capture(session, sdk_tool.name, args)
+        return result
+
+    return dataclasses.replace(sdk_tool, handler=wrapper)
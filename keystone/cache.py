@@ -0,0 +1,96 @@
+import hashlib
+import posixpath
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .config import FILE_CACHE_MAX_BYTES
+
+
+@dataclass
+class _Entry:
+    digest: str
+    content: str
+    size: int
+    version: "Version | None"
+
+
+# A file's modification time and size in bytes, as reported by ``stat`` in the sandbox.
+Version = tuple[str, int]
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _key(session: str | None, path: str) -> tuple[str | None, str]:
+    return session, posixpath.normpath(path)
+
+
+class FileCache:
+    """LRU cache of sandbox file contents, keyed by session and normalized path.
+
+    Entries record the content hash so a write of identical content can be
+    skipped, and the file's version (see ``transfer.file_version``). An entry
+    is only served while the caller's current version matches, since pooled
+    sessions share a filesystem and background jobs keep writing after we
+    invalidate. Entries stored right after a write have no version yet, to
+    avoid a ``stat`` per write: the first check accepts them if the size
+    matches and pins that version. Shell commands and Python cells still
+    invalidate the session's entries so stale ones don't hold memory.
+    """
+
+    def __init__(self, max_bytes: int = FILE_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[tuple[str | None, str], _Entry] = OrderedDict()
+
+    def get(self, session: str | None, path: str, version: Version | None) -> str | None:
+        key = _key(session, path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if version is None or (entry.version or (version[0], entry.size)) != version:
+            self._discard(key)
+            return None
+        entry.version = version
+        self._entries.move_to_end(key)
+        return entry.content
+
+    def matches(self, session: str | None, path: str, content: str) -> bool:
+        """Whether the cached content equals ``content``; confirm it is current with ``get``."""
+        entry = self._entries.get(_key(session, path))
+        return entry is not None and entry.digest == _digest(content)
+
+    def put(
+        self, session: str | None, path: str, content: str, version: Version | None = None
+    ) -> None:
+        """Cache ``content``; without ``version`` it is verified on first use."""
+        key = _key(session, path)
+        self._discard(key)
+        size = len(content.encode())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = _Entry(_digest(content), content, size, version)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def invalidate(self, session: str | None, path: str | None = None) -> None:
+        if path is not None:
+            self._discard(_key(session, path))
+            return
+        for key in [k for k in self._entries if k[0] == session]:
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _discard(self, key: tuple[str | None, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+
+file_cache = FileCache()
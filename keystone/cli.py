@@ -1,41 +1,147 @@
+import argparse
+from functools import partial
+from typing import TYPE_CHECKING
+
 import anyio
-from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
 
-from .agent import KeystoneAgent
+from .config import BATCH_AGENTS, SANDBOX_HEALTH_INTERVAL, WORKSPACE_REMOTE_DIR
+from .console import console
+from .tracing import tracer
+from .workspace import SyncResult, WorkspaceSync
+
+# The agent and runner modules load the SDK, which dominates startup; they are
+# imported only once a command needs them, so --help and argument errors are instant.
+if TYPE_CHECKING:
+    from .agent import KeystoneAgent
+
+
+def _report_sync(result: SyncResult) -> None:
+    if result:
+        console.message(f"(workspace: {result.describe()})")
+
+
+async def _sync(workspace: WorkspaceSync | None, step: str) -> None:
+    if workspace is None:
+        return
+    try:
+        _report_sync(await getattr(workspace, step)())
+    except Exception as e:
+        console.message(f"(workspace {step} failed: {e})")
+
+
+async def _turn(agent: "KeystoneAgent", prompt: str) -> None:
+    from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+    output = await agent.replay(prompt)
+    if output is not None:
+        console.output(f"\n(replayed saved automation)\n{output}")
+        return
+
+    await agent.client.query(prompt)
+    async for message in agent.client.receive_response():
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, TextBlock):
+                    console.output(f"\nagent> {block.text}")
+                elif isinstance(block, ToolUseBlock):
+                    console.message(f"\n[{block.name}]")
+        elif isinstance(message, ResultMessage):
+            tracer.record_turn(agent.session_id, message.duration_ms, message.duration_api_ms)
+            agent.checkpoint(message.session_id)
+            agent.record_automation(prompt, not message.is_error)
+    if await agent.compact_if_needed():
+        console.message("\n(compacted conversation history)")
 
 
-async def repl() -> None:
-    agent = KeystoneAgent()
+async def repl(
+    resume: str | None = None, workspace: WorkspaceSync | None = None, watch: bool = False
+) -> None:
+    from .agent import KeystoneAgent
+    from .sandbox import pool
 
     try:
-        await agent.check_sandbox()
+        agent = KeystoneAgent(
+            session_id=resume,
+            resume=resume is not None,
+            workspace=workspace.remote_dir if workspace else None,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(str(e))
+        return
+
+    try:
+        await agent.warmup()
     except ConnectionError as e:
         print(str(e))
         return
 
-    async with agent:
-        print("\nThe Delegation Layer — type your request (quit to exit)\n")
-        while True:
-            try:
-                prompt = await anyio.to_thread.run_sync(lambda: input("you> "))
-            except (EOFError, KeyboardInterrupt):
-                print("\nGoodbye!")
-                break
-
-            if prompt.strip().lower() in ("quit", "exit"):
-                print("Goodbye!")
-                break
-
-            if not prompt.strip():
-                continue
-
-            await agent.client.query(prompt)
-            async for message in agent.client.receive_response():
-                if isinstance(message, AssistantMessage):
-                    for block in message.content:
-                        if isinstance(block, TextBlock):
-                            print(f"\nagent> {block.text}")
-                        elif isinstance(block, ToolUseBlock):
-                            print(f"\n[{block.name}]")
-                elif isinstance(message, ResultMessage):
-                    pass
+    try:
+        async with console.running(), anyio.create_task_group() as tg:
+            tg.start_soon(pool.monitor, SANDBOX_HEALTH_INTERVAL)
+            await _sync(workspace, "push")
+            if workspace is not None and watch:
+                tg.start_soon(
+                    partial(
+                        workspace.watch,
+                        on_change=_report_sync,
+                        on_error=lambda e: console.message(f"(workspace sync failed: {e})"),
+                    )
+                )
+            print("\nThe Delegation Layer — type your request (quit to exit)\n")
+            while True:
+                await console.flush()
+                try:
+                    prompt = await anyio.to_thread.run_sync(lambda: input("you> "))
+                except (EOFError, KeyboardInterrupt):
+                    print("\nGoodbye!")
+                    break
+
+                if prompt.strip().lower() in ("quit", "exit"):
+                    print("Goodbye!")
+                    break
+
+                if not prompt.strip():
+                    continue
+
+                await _sync(workspace, "push")
+                await _turn(agent, prompt)
+                await _sync(workspace, "pull")
+            tg.cancel_scope.cancel()
+    finally:
+        await agent.save_snapshot()
+        await agent.disconnect()
+
+
+def _workspace(spec: str) -> WorkspaceSync:
+    local, _, remote = spec.partition(":")
+    return WorkspaceSync(local, remote or WORKSPACE_REMOTE_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keystone interactive REPL")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="resume a saved session")
+    parser.add_argument(
+        "--workspace",
+        metavar="DIR[:REMOTE]",
+        type=_workspace,
+        help="mirror a host directory into the sandbox, syncing changes around every turn",
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="also sync --workspace in the background"
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE", help="run prompts from a JSONL file ('-' for stdin) and exit"
+    )
+    parser.add_argument(
+        "--output", default="results.jsonl", help="where --batch appends results as JSONL"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=BATCH_AGENTS, help="agent sessions --batch runs at once"
+    )
+    args = parser.parse_args()
+    if args.batch:
+        from .runner import run_batch
+
+        anyio.run(partial(run_batch, args.batch, args.output, args.concurrency))
+    else:
+        anyio.run(partial(repl, args.resume, args.workspace, args.watch))
@@ -1,19 +1,122 @@
 import os
 
 SANDBOX_URL = os.environ.get("SANDBOX_URL", "http://localhost:8081")
+SANDBOX_URLS = [
+    url.strip() for url in os.environ.get("SANDBOX_URLS", SANDBOX_URL).split(",") if url.strip()
+]
+SANDBOX_HEALTH_INTERVAL = float(os.environ.get("SANDBOX_HEALTH_INTERVAL", "30"))
+SANDBOX_HEALTH_TIMEOUT = 5.0
+SANDBOX_MAX_FAILURES = 3
+SANDBOX_MAX_CONNECTIONS = int(os.environ.get("SANDBOX_MAX_CONNECTIONS", "100"))
+SANDBOX_MAX_KEEPALIVE = int(os.environ.get("SANDBOX_MAX_KEEPALIVE", "20"))
+SANDBOX_KEEPALIVE_EXPIRY = float(os.environ.get("SANDBOX_KEEPALIVE_EXPIRY", "30"))
+SANDBOX_CONNECT_TIMEOUT = float(os.environ.get("SANDBOX_CONNECT_TIMEOUT", "5"))
+SANDBOX_HTTP2 = os.environ.get("SANDBOX_HTTP2", "1") == "1"
+SANDBOX_RETRIES = int(os.environ.get("SANDBOX_RETRIES", "3"))
+SANDBOX_RETRY_BACKOFF = float(os.environ.get("SANDBOX_RETRY_BACKOFF", "0.2"))
+SANDBOX_RETRY_MAX_BACKOFF = 5.0
+SANDBOX_BREAKER_THRESHOLD = int(os.environ.get("SANDBOX_BREAKER_THRESHOLD", "5"))
+SANDBOX_BREAKER_RESET = float(os.environ.get("SANDBOX_BREAKER_RESET", "30"))
 MAX_OUTPUT = 10_000
+PYTHON_TIMEOUT = int(os.environ.get("KEYSTONE_PYTHON_TIMEOUT", "300"))
+SHELL_TIMEOUT = int(os.environ.get("KEYSTONE_SHELL_TIMEOUT", "300"))
+FILE_TIMEOUT = int(os.environ.get("KEYSTONE_FILE_TIMEOUT", "60"))
+MAX_TOOL_TIMEOUT = int(os.environ.get("KEYSTONE_MAX_TOOL_TIMEOUT", "1800"))
+TIMEOUT_GRACE = 10
+MAX_CALL_OUTPUT = int(os.environ.get("KEYSTONE_MAX_CALL_OUTPUT", str(5 * 1024 * 1024)))
+STREAM_OUTPUT = os.environ.get("KEYSTONE_STREAM_OUTPUT", "0") == "1"
+STREAM_POLL_INTERVAL = 0.5
+CONSOLE_SINK = os.environ.get("KEYSTONE_CONSOLE", "tty")
+CONSOLE_FILE = os.environ.get("KEYSTONE_CONSOLE_FILE", ".keystone/console.jsonl")
+CONSOLE_PREVIEW_LINES = int(os.environ.get("KEYSTONE_CONSOLE_PREVIEW_LINES", "20"))
+CONSOLE_STREAM_RATE = float(os.environ.get("KEYSTONE_CONSOLE_STREAM_RATE", "200"))
+CONSOLE_MAX_PENDING = 10_000
+CONSOLE_BATCH = 256
+TRANSFER_CHUNK_SIZE = 4 * 1024 * 1024
+WRITE_CHUNK_CHARS = 1024 * 1024
+TRANSFER_COMPRESSION = os.environ.get("KEYSTONE_TRANSFER_COMPRESSION", "gzip") or None
+BATCH_CONCURRENCY = int(os.environ.get("KEYSTONE_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = 50
+BATCH_AGENTS = int(os.environ.get("KEYSTONE_BATCH_AGENTS", "4"))
+BATCH_JOB_TIMEOUT = float(os.environ.get("KEYSTONE_BATCH_JOB_TIMEOUT", "1800"))
+FILE_CACHE_MAX_BYTES = int(os.environ.get("KEYSTONE_FILE_CACHE_BYTES", str(32 * 1024 * 1024)))
+SERVER_HOST = os.environ.get("KEYSTONE_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("KEYSTONE_PORT", "8765"))
+SERVER_MAX_SESSIONS = int(os.environ.get("KEYSTONE_MAX_SESSIONS", "32"))
+SERVER_MAX_CONCURRENT_TURNS = int(os.environ.get("KEYSTONE_MAX_CONCURRENT_TURNS", "8"))
+SERVER_SESSION_QUEUE_SIZE = 4
+SERVER_MAX_PROMPT_BYTES = 64 * 1024
+MAX_KERNELS = int(os.environ.get("KEYSTONE_MAX_KERNELS", "16"))
+KERNEL_IDLE_TIMEOUT = float(os.environ.get("KEYSTONE_KERNEL_IDLE_TIMEOUT", "1800"))
+PRELOAD_IMPORTS = [
+    name.strip()
+    for name in os.environ.get("KEYSTONE_PRELOAD", "os,sys,json,re,pathlib,subprocess").split(",")
+    if name.strip()
+]
+MAX_JOBS = int(os.environ.get("KEYSTONE_MAX_JOBS", "8"))
+MEMOIZE = os.environ.get("KEYSTONE_MEMOIZE", "0") == "1"
+MEMO_TTL = float(os.environ.get("KEYSTONE_MEMO_TTL", "60"))
+MEMO_MAX_ENTRIES = 256
+CONTEXT_BUDGET = int(os.environ.get("KEYSTONE_CONTEXT_BUDGET", "200000"))
+CONTEXT_HANDLE_THRESHOLD = 2_000
+CONTEXT_PREVIEW_CHARS = 500
+CONTEXT_MAX_STORED = 64
+SNAPSHOTS = os.environ.get("KEYSTONE_SNAPSHOTS", "0") == "1"
+SNAPSHOT_DIR = os.environ.get("KEYSTONE_SNAPSHOT_DIR", ".keystone/sessions")
+SNAPSHOT_ROOTS = [
+    root.strip()
+    for root in os.environ.get("KEYSTONE_SNAPSHOT_ROOTS", "/home/gem,/usr/local,/opt").split(",")
+    if root.strip()
+]
+SEARCH_ROOT = os.environ.get("KEYSTONE_SEARCH_ROOT", "/home/gem")
+SEARCH_EXCLUDES = [
+    name.strip()
+    for name in os.environ.get(
+        "KEYSTONE_SEARCH_EXCLUDES", ".git,.hg,.svn,node_modules,__pycache__,.venv,.cache"
+    ).split(",")
+    if name.strip()
+]
+SEARCH_INLINE_BYTES = 256 * 1024
+SEARCH_MAX_MATCHES = int(os.environ.get("KEYSTONE_SEARCH_MAX_MATCHES", "2000"))
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_CHARS = MAX_OUTPUT - 500
+WORKSPACE_REMOTE_DIR = os.environ.get("KEYSTONE_WORKSPACE_REMOTE", "/home/gem/workspace")
+WORKSPACE_EXCLUDES = [
+    name.strip()
+    for name in os.environ.get(
+        "KEYSTONE_WORKSPACE_EXCLUDES", ".git,.hg,.svn,__pycache__,.venv,node_modules,.keystone"
+    ).split(",")
+    if name.strip()
+]
+WORKSPACE_INTERVAL = float(os.environ.get("KEYSTONE_WORKSPACE_INTERVAL", "2"))
+WORKSPACE_STATE_DIR = os.environ.get("KEYSTONE_WORKSPACE_STATE_DIR", ".keystone/workspaces")
+AUTOMATIONS = os.environ.get("KEYSTONE_AUTOMATIONS", "0") == "1"
+AUTOMATION_DIR = os.environ.get("KEYSTONE_AUTOMATION_DIR", ".keystone/automations")
+PACKAGE_CACHE_DIR = os.environ.get("KEYSTONE_PACKAGE_CACHE", ".keystone/wheels")
+PIP_INDEX_URL = os.environ.get("KEYSTONE_PIP_INDEX_URL", "")
+TRACE_FILE = os.environ.get("KEYSTONE_TRACE_FILE", ".keystone/traces.jsonl")
 MCP_SERVER_NAME = "sandbox"
 MCP_SERVER_VERSION = "1.0.0"
 
 SYSTEM_PROMPT = """\
 You are a delegation agent with access to a sandboxed execution environment.
 When the user asks you to do something, ALWAYS write and execute code to accomplish it
-rather than just explaining how. You have four tools:
+rather than just explaining how. You have these tools:
 
 - execute_python: Run Python code in a Jupyter kernel inside the sandbox.
 - run_shell: Run a shell command inside the sandbox.
 - write_file: Write a file to the sandbox filesystem.
 - read_file: Read a file from the sandbox filesystem.
+- read_files, write_files, run_shell_batch: Batch versions that handle many files or
+  independent commands in one call. Prefer them over repeated single calls.
+- start_job, job_status, job_output, cancel_job: Run long commands (builds, servers,
+  training) in the background, check on them and read new output while doing other work.
+- search_files / list_tree: Locate files by path glob and/or content regex, or get an
+  overview of a directory, in one ranked, paged call. Prefer them over find/grep/ls chains.
+- install_packages: Install Python packages with pip in one cached step. Prefer it over
+  `pip install` in run_shell or execute_python; repeat installs come from a local cache.
+- fetch_result: Read back a large earlier result by its handle (e.g. r3). Results marked
+  "stored as rN" or cut short because the context budget was reached can be fetched again.
 
 Bias heavily toward action. If the user asks a question that can be answered by
 running code, run the code. If they ask you to create something, create it.
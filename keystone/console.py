@@ -0,0 +1,246 @@
+import json
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Protocol, TextIO
+
+import anyio
+
+from .config import (
+    CONSOLE_BATCH,
+    CONSOLE_FILE,
+    CONSOLE_MAX_PENDING,
+    CONSOLE_PREVIEW_LINES,
+    CONSOLE_SINK,
+    CONSOLE_STREAM_RATE,
+)
+from .sandbox import current_session
+
+
+@dataclass
+class ConsoleEvent:
+    kind: str
+    text: str = ""
+    name: str = ""
+    lines: list[str] = field(default_factory=list)
+    session: str | None = None
+    suppressed: int = 0
+    ts: float = field(default_factory=time.time)
+
+
+class Sink(Protocol):
+    def write(self, events: list[ConsoleEvent]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class NullSink:
+    def write(self, events: list[ConsoleEvent]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _render(event: ConsoleEvent) -> str:
+    if event.kind == "tool":
+        body = "".join(f"  │ {line}\n" for line in event.lines)
+        return (
+            f"\n  ┌─ {event.name} {'─' * max(1, 38 - len(event.name))}\n"
+            f"{body}  └──────────────────────────────────────\n"
+        )
+    if event.kind == "stream":
+        lines = "".join(f"  ┆ {line}\n" for line in event.text.splitlines())
+        if event.suppressed:
+            lines += f"  ┆ ... ({event.suppressed} lines suppressed)\n"
+        return lines
+    if event.kind == "dropped":
+        return f"  (console fell behind, {event.suppressed} events dropped)\n"
+    return event.text + "\n"
+
+
+class TTYSink:
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream
+
+    def write(self, events: list[ConsoleEvent]) -> None:
+        # Resolved per write so a redirected sys.stdout is honored.
+        stream = self.stream or sys.stdout
+        stream.write("".join(_render(e) for e in events))
+        stream.flush()
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file = None
+
+    def write(self, events: list[ConsoleEvent]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a")
+        self._file.write("".join(json.dumps(asdict(e), default=str) + "\n" for e in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def make_sink(name: str = CONSOLE_SINK) -> Sink:
+    if name == "null":
+        return NullSink()
+    if name == "jsonl":
+        return JsonlSink(CONSOLE_FILE)
+    if name == "tty":
+        return TTYSink()
+    raise ValueError(f"unknown console sink {name!r} (expected tty, jsonl or null)")
+
+
+def _clip(lines: list[str], limit: int) -> list[str]:
+    split = [part for line in lines for part in (line.splitlines() or [""])]
+    if len(split) <= limit:
+        return split
+    return split[:limit] + [f"... ({len(split) - limit} more lines)"]
+
+
+class Console:
+    """Moves console output off the tool hot path.
+
+    Tools only enqueue events; a renderer task formats them and writes them to
+    the sink in batches from a worker thread, so a slow terminal or pipe never
+    blocks the event loop. Streamed output is rate-limited per session and the
+    queue is bounded: when the renderer falls behind, diagnostic events are
+    dropped and counted rather than buffered without limit. ``output`` events,
+    the agent's answers, are never dropped and always reach stdout, whatever
+    the sink. Outside ``running()`` events are written synchronously, as plain
+    ``print`` would.
+    """
+
+    def __init__(
+        self,
+        sink: Sink | None = None,
+        preview_lines: int = CONSOLE_PREVIEW_LINES,
+        stream_rate: float = CONSOLE_STREAM_RATE,
+        max_pending: int = CONSOLE_MAX_PENDING,
+        batch: int = CONSOLE_BATCH,
+    ) -> None:
+        self.sink = sink or make_sink()
+        self.preview_lines = preview_lines
+        self.stream_rate = stream_rate
+        self.max_pending = max_pending
+        self.batch = batch
+        self.dropped = 0
+        self._pending: deque[ConsoleEvent] = deque()
+        self._buckets: dict[str | None, tuple[float, float]] = {}
+        self._suppressed: dict[str | None, int] = {}
+        self._running = False
+        self._queued = 0
+        self._done = 0
+        self._wake = anyio.Event()
+        self._progress = anyio.Event()
+
+    def set_sink(self, sink: Sink) -> None:
+        self.sink.close()
+        self.sink = sink
+
+    def tool(self, name: str, lines: list[str]) -> None:
+        self._emit(ConsoleEvent("tool", name=name, lines=lines, session=current_session()))
+
+    def message(self, text: str) -> None:
+        self._emit(ConsoleEvent("message", text=text, session=current_session()))
+
+    def output(self, text: str) -> None:
+        """Write agent output for the user: never dropped, always on stdout."""
+        self._emit(ConsoleEvent("output", text=text, session=current_session()))
+
+    def stream(self, text: str) -> None:
+        session = current_session()
+        now = time.monotonic()
+        tokens, last = self._buckets.get(session, (self.stream_rate, now))
+        tokens = min(self.stream_rate, tokens + (now - last) * self.stream_rate)
+        lines = text.count("\n") + (not text.endswith("\n"))
+        if lines > tokens:
+            kept = text.splitlines(keepends=True)[: int(tokens)]
+            self._suppressed[session] = self._suppressed.get(session, 0) + lines - len(kept)
+            text = "".join(kept)
+            lines = len(kept)
+        self._buckets[session] = (tokens - lines, now)
+        if not text:
+            return
+        suppressed = self._suppressed.pop(session, 0)
+        self._emit(ConsoleEvent("stream", text=text, session=session, suppressed=suppressed))
+
+    def _emit(self, event: ConsoleEvent) -> None:
+        if not self._running:
+            self._write([event])
+            return
+        self._queued += 1
+        if len(self._pending) >= self.max_pending and event.kind != "output":
+            self.dropped += 1
+            self._done += 1
+            return
+        self._pending.append(event)
+        self._wake.set()
+
+    def _write(self, events: list[ConsoleEvent]) -> None:
+        self.sink.write(
+            [
+                replace(e, lines=_clip(e.lines, self.preview_lines)) if e.kind == "tool" else e
+                for e in events
+            ]
+        )
+        if not isinstance(self.sink, TTYSink):
+            outputs = [e for e in events if e.kind == "output"]
+            if outputs:
+                sys.stdout.write("".join(_render(e) for e in outputs))
+                sys.stdout.flush()
+
+    def _take(self) -> list[ConsoleEvent]:
+        events = [self._pending.popleft() for _ in range(min(len(self._pending), self.batch))]
+        if self.dropped:
+            events.append(ConsoleEvent("dropped", suppressed=self.dropped))
+            self.dropped = 0
+        return events
+
+    async def _render(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake = anyio.Event()
+            while self._pending or self.dropped:
+                events = self._take()
+                await anyio.to_thread.run_sync(self._write, events)
+                self._done += sum(e.kind != "dropped" for e in events)
+                self._progress.set()
+                self._progress = anyio.Event()
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written."""
+        target = self._queued
+        while self._running and self._done < target:
+            await self._progress.wait()
+
+    @asynccontextmanager
+    async def running(self):
+        self._wake = anyio.Event()
+        self._progress = anyio.Event()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self._render)
+            self._running = True
+            try:
+                yield self
+            finally:
+                self._running = False
+                tg.cancel_scope.cancel()
+        while self._pending or self.dropped:
+            self._write(self._take())
+
+
+console = Console()
@@ -0,0 +1,121 @@
+import dataclasses
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .config import (
+    CONTEXT_BUDGET,
+    CONTEXT_HANDLE_THRESHOLD,
+    CONTEXT_MAX_STORED,
+    CONTEXT_PREVIEW_CHARS,
+)
+from .sandbox import current_session
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import SdkMcpTool
+
+
+@dataclass
+class SessionContext:
+    used: int = 0
+    full: bool = False
+    counter: int = 0
+    results: OrderedDict[str, str] = field(default_factory=OrderedDict)
+
+
+class ContextManager:
+    """Keeps a session's tool output within a context budget.
+
+    Every large tool result is stored under a handle (``r1``, ``r2``, ...) that
+    ``fetch_result`` can page through later. Once the output sent since the last
+    compaction passes ``budget`` chars, large results are replaced by a short
+    preview and their handle, and the agent is asked to compact its history.
+    """
+
+    def __init__(
+        self,
+        budget: int = CONTEXT_BUDGET,
+        handle_threshold: int = CONTEXT_HANDLE_THRESHOLD,
+        preview_chars: int = CONTEXT_PREVIEW_CHARS,
+        max_stored: int = CONTEXT_MAX_STORED,
+    ) -> None:
+        self.budget = budget
+        self.handle_threshold = handle_threshold
+        self.preview_chars = preview_chars
+        self.max_stored = max_stored
+        self._sessions: dict[str | None, SessionContext] = {}
+
+    def _session(self, session: str | None) -> SessionContext:
+        return self._sessions.setdefault(session, SessionContext())
+
+    def used(self, session: str | None) -> int:
+        return self._session(session).used
+
+    def admit(self, session: str | None, text: str) -> str:
+        ctx = self._session(session)
+        if len(text) < self.handle_threshold:
+            ctx.used += len(text)
+            return text
+        ctx.counter += 1
+        handle = f"r{ctx.counter}"
+        ctx.results[handle] = text
+        while len(ctx.results) > self.max_stored:
+            ctx.results.popitem(last=False)
+        if ctx.full or ctx.used + len(text) > self.budget:
+            ctx.full = True
+            text = self._preview(handle, text)
+        else:
+            text += f"\n[stored as {handle}]"
+        ctx.used += len(text)
+        return text
+
+    def _preview(self, handle: str, text: str) -> str:
+        head = text[: self.preview_chars]
+        if "\n" in head:
+            head = head[: head.rindex("\n")]
+        return (
+            f"{head}\n... [{len(text)} chars, {text.count(chr(10)) + 1} lines; context budget "
+            f"reached, full result stored as {handle}, use fetch_result to read it]"
+        )
+
+    def fetch(self, session: str | None, handle: str, offset: int, length: int) -> str:
+        ctx = self._session(session)
+        text = ctx.results.get(handle)
+        if text is None:
+            raise LookupError(f"no stored result {handle!r} (it may have expired)")
+        ctx.results.move_to_end(handle)
+        chunk = text[offset : offset + length]
+        return f"[{handle}: chars {offset}-{offset + len(chunk)} of {len(text)}]\n{chunk}"
+
+    def needs_compaction(self, session: str | None) -> bool:
+        ctx = self._session(session)
+        return ctx.full or ctx.used > self.budget
+
+    def compacted(self, session: str | None) -> None:
+        ctx = self._session(session)
+        ctx.used = 0
+        ctx.full = False
+
+    def release(self, session: str | None) -> None:
+        self._sessions.pop(session, None)
+
+
+context = ContextManager()
+
+
+def budgeted(sdk_tool: "SdkMcpTool") -> "SdkMcpTool":
+    """Route a tool's text output through the session's context budget."""
+    handler = sdk_tool.handler
+
+    async def wrapper(args: dict) -> dict:
+        result = await handler(args)
+        session = current_session()
+        content = [
+            {**block, "text": context.admit(session, block["text"])}
+            if block.get("type") == "text"
+            else block
+            for block in result.get("content", [])
+        ]
+        return {**result, "content": content}
+
+    return dataclasses.replace(sdk_tool, handler=wrapper)
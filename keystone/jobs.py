@@ -0,0 +1,118 @@
+import time
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+from .config import MAX_CALL_OUTPUT, MAX_JOBS
+from .sandbox import sandbox
+from .tools._helpers import OutputBuffer
+
+
+def _unread_buffer() -> OutputBuffer:
+    # Sized like one tool call, so job_output can reduce it before cutting it to MAX_OUTPUT.
+    return OutputBuffer(limit=MAX_CALL_OUTPUT)
+
+
+@dataclass
+class Job:
+    job_id: str
+    session: str | None
+    command: str
+    shell_id: str
+    started: float
+    status: str = "running"
+    exit_code: int | None = None
+    finished: float | None = None
+    seen: int = 0
+    # Output not yet read, bounded so a chatty job left unread cannot grow without limit.
+    unread: OutputBuffer = field(default_factory=_unread_buffer)
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    @property
+    def runtime(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def describe(self) -> str:
+        state = self.status if self.exit_code is None else f"{self.status}, exit {self.exit_code}"
+        return f"{self.job_id} [{state}, {self.runtime:.1f}s] $ {self.command}"
+
+
+class JobScheduler:
+    """Host-side bookkeeping for commands running detached in the sandbox.
+
+    Each job gets its own sandbox shell session, so a long build or a server
+    keeps running while the agent makes other tool calls. State is refreshed
+    lazily from ``shell.view`` whenever the agent asks about a job. The view
+    has no offset, so each refresh transfers the job's whole output so far;
+    only the part not seen before is kept.
+    """
+
+    def __init__(self, max_jobs: int = MAX_JOBS) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: dict[str | None, dict[str, Job]] = {}
+
+    def jobs(self, session: str | None) -> list[Job]:
+        return list(self._jobs.get(session, {}).values())
+
+    def get(self, session: str | None, job_id: str) -> Job:
+        try:
+            return self._jobs[session][job_id]
+        except KeyError:
+            raise LookupError(f"no such job: {job_id}") from None
+
+    async def start(self, session: str | None, command: str) -> Job:
+        await self.refresh_all(session)
+        if sum(job.running for job in self.jobs(session)) >= self.max_jobs:
+            raise RuntimeError(f"too many running jobs (max {self.max_jobs}), cancel one first")
+        job_id = uuid.uuid4().hex[:8]
+        result = await sandbox.shell.exec_command(
+            command=command, id=f"job-{job_id}", async_mode=True
+        )
+        data = result.data
+        job = Job(job_id, session, command, data.session_id or f"job-{job_id}", time.monotonic())
+        self._update(job, data)
+        self._jobs.setdefault(session, {})[job_id] = job
+        return job
+
+    async def refresh(self, job: Job) -> Job:
+        if job.running:
+            view = await sandbox.shell.view(id=job.shell_id)
+            self._update(job, view.data)
+        return job
+
+    async def refresh_all(self, session: str | None) -> list[Job]:
+        return [await self.refresh(job) for job in self.jobs(session)]
+
+    def take_output(self, job: Job) -> str:
+        chunk = job.unread.getvalue()
+        job.unread = _unread_buffer()
+        return chunk
+
+    async def cancel(self, session: str | None, job_id: str) -> Job:
+        job = await self.refresh(self.get(session, job_id))
+        if job.running:
+            await sandbox.shell.kill_process(id=job.shell_id)
+            job.status = "terminated"
+            job.finished = time.monotonic()
+        return job
+
+    async def release(self, session: str | None) -> None:
+        for job in self._jobs.pop(session, {}).values():
+            if job.running:
+                with suppress(Exception):
+                    await sandbox.shell.kill_process(id=job.shell_id)
+
+    def _update(self, job: Job, data) -> None:
+        output = data.output or ""
+        job.unread.write(output[job.seen :])
+        job.seen = max(job.seen, len(output))
+        job.status = data.status or job.status
+        job.exit_code = data.exit_code
+        if not job.running and job.finished is None:
+            job.finished = time.monotonic()
+
+
+jobs = JobScheduler()
@@ -0,0 +1,121 @@
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+
+import anyio
+
+from .config import KERNEL_IDLE_TIMEOUT, MAX_KERNELS
+from .sandbox import sandbox
+
+
+@dataclass
+class Kernel:
+    kernel_id: str
+    jupyter: object
+    last_used: float
+    busy: int = 0
+
+
+class KernelManager:
+    """One warm Jupyter kernel per agent session.
+
+    Kernels are reused across turns so in-memory state survives between
+    ``execute_python`` calls. Idle kernels are shut down after
+    ``idle_timeout`` seconds, and once ``max_kernels`` are live the least
+    recently used one is evicted to make room. A kernel that is running code
+    is never evicted; if every kernel is busy the cap is briefly exceeded.
+
+    The shared lock only covers bookkeeping. Creating and deleting kernels
+    are HTTP calls made outside it, so one session's kernel setup never
+    waits on another's.
+    """
+
+    def __init__(
+        self, max_kernels: int = MAX_KERNELS, idle_timeout: float = KERNEL_IDLE_TIMEOUT
+    ) -> None:
+        self.max_kernels = max_kernels
+        self.idle_timeout = idle_timeout
+        self._kernels: dict[str | None, Kernel] = {}
+        self._lock = anyio.Lock()
+        # Per-session setup locks, so concurrent calls in one session share a kernel.
+        self._setup: dict[str | None, anyio.Lock] = {}
+        self._starting = 0
+
+    def __len__(self) -> int:
+        return len(self._kernels)
+
+    async def kernel_for(self, session: str | None) -> Kernel:
+        async with self._setup.setdefault(session, anyio.Lock()):
+            async with self._lock:
+                stale = self._take_idle()
+                kernel = self._kernels.get(session)
+                starting = kernel is None
+                if starting:
+                    excess = len(self._kernels) + self._starting + 1 - self.max_kernels
+                    stale += self._take_least_recent(excess)
+                    self._starting += 1
+            try:
+                await self._delete(stale)
+                if starting:
+                    jupyter = sandbox.jupyter
+                    response = await jupyter.create_session(session_id=f"keystone-{session}")
+                    kernel = Kernel(response.data.session_id, jupyter, time.monotonic())
+                    async with self._lock:
+                        self._kernels[session] = kernel
+            finally:
+                if starting:
+                    self._starting -= 1
+            kernel.last_used = time.monotonic()
+            return kernel
+
+    async def execute(self, session: str | None, code: str, **kwargs):
+        kernel = await self.kernel_for(session)
+        # No checkpoint since kernel_for returned, so nothing can have evicted it yet.
+        kernel.busy += 1
+        try:
+            return await kernel.jupyter.execute_code(
+                code=code, session_id=kernel.kernel_id, **kwargs
+            )
+        except Exception:
+            if not await self._alive(kernel) and self._kernels.get(session) is kernel:
+                del self._kernels[session]
+            raise
+        finally:
+            kernel.busy -= 1
+            kernel.last_used = time.monotonic()
+
+    async def restart(self, session: str | None) -> None:
+        async with self._lock:
+            kernel = self._kernels.pop(session, None)
+        await self._delete([kernel] if kernel is not None else [])
+
+    async def release(self, session: str | None) -> None:
+        await self.restart(session)
+        self._setup.pop(session, None)
+
+    async def _alive(self, kernel: Kernel) -> bool:
+        try:
+            result = await kernel.jupyter.list_sessions()
+        except Exception:
+            return True
+        return kernel.kernel_id in result.data.sessions
+
+    def _take_idle(self) -> list[Kernel]:
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [s for s, k in self._kernels.items() if not k.busy and k.last_used < cutoff]
+        return [self._kernels.pop(s) for s in idle]
+
+    def _take_least_recent(self, count: int) -> list[Kernel]:
+        idle = sorted((s for s, k in self._kernels.items() if not k.busy), key=self._last_used)
+        return [self._kernels.pop(s) for s in idle[: max(count, 0)]]
+
+    def _last_used(self, session: str | None) -> float:
+        return self._kernels[session].last_used
+
+    async def _delete(self, stale: list[Kernel]) -> None:
+        for kernel in stale:
+            with suppress(Exception):
+                await kernel.jupyter.delete_session(kernel.kernel_id)
+
+
+kernels = KernelManager()
@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import json
+import re
+import shlex
+import time
+from collections import OrderedDict, defaultdict
+
+from .config import MEMO_MAX_ENTRIES, MEMO_TTL, MEMOIZE
+from .sandbox import current_session
+
+READ_ONLY_TOOLS = {"read_file", "read_files"}
+READ_ONLY_PROGRAMS = {
+    "cat",
+    "df",
+    "du",
+    "file",
+    "find",
+    "grep",
+    "head",
+    "id",
+    "ls",
+    "printenv",
+    "pwd",
+    "stat",
+    "tail",
+    "tree",
+    "uname",
+    "wc",
+    "which",
+    "whoami",
+}
+READ_ONLY_SUBCOMMANDS = {
+    "pip": {"list", "show", "freeze"},
+    "pip3": {"list", "show", "freeze"},
+    "git": {"status", "log", "diff", "show", "branch"},
+}
+_UNSAFE = re.compile(r"[;&<>`\n\r]|\$\(")
+_UNSAFE_FIND_ARGS = {
+    "-delete",
+    "-exec",
+    "-execdir",
+    "-ok",
+    "-okdir",
+    "-fprint",
+    "-fprint0",
+    "-fprintf",
+    "-fls",
+}
+# `git branch` with any other argument creates, renames or deletes a branch.
+_GIT_BRANCH_LIST_ARGS = {
+    "-a",
+    "--all",
+    "-r",
+    "--remotes",
+    "-l",
+    "--list",
+    "-v",
+    "-vv",
+    "--verbose",
+    "--show-current",
+}
+
+
+def _writes_output(program: str, rest: list[str]) -> bool:
+    if program == "find":
+        return bool(_UNSAFE_FIND_ARGS.intersection(rest))
+    if program == "tree":
+        return any(arg.startswith("-o") for arg in rest)
+    if program == "git":
+        if rest[0] == "branch" and not _GIT_BRANCH_LIST_ARGS.issuperset(rest[1:]):
+            return True
+        return any(arg.startswith("--output") for arg in rest)
+    return False
+
+
+def is_read_only_command(command: str) -> bool:
+    if _UNSAFE.search(command):
+        return False
+    for segment in command.split("|"):
+        try:
+            words = shlex.split(segment)
+        except ValueError:
+            return False
+        if not words:
+            return False
+        program, rest = words[0], words[1:]
+        if program in READ_ONLY_SUBCOMMANDS:
+            if not rest or rest[0] not in READ_ONLY_SUBCOMMANDS[program]:
+                return False
+        elif program not in READ_ONLY_PROGRAMS:
+            return False
+        if _writes_output(program, rest):
+            return False
+    return True
+
+
+def is_read_only(tool: str, args: dict) -> bool:
+    if tool in READ_ONLY_TOOLS:
+        return True
+    if tool == "run_shell":
+        return is_read_only_command(args["command"])
+    if tool == "run_shell_batch":
+        return all(is_read_only_command(c) for c in args["commands"])
+    return False
+
+
+def _normalize_command(command: str) -> str:
+    try:
+        return shlex.join(shlex.split(command))
+    except ValueError:
+        return command
+
+
+def _key(tool: str, args: dict) -> str:
+    normalized = {
+        k: _normalize_command(v) if k in ("command", "commands") and isinstance(v, str) else v
+        for k, v in args.items()
+    }
+    payload = json.dumps([tool, normalized], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Memo:
+    """TTL + LRU cache of read-only tool results, scoped per session.
+
+    Every mutating call bumps the session's generation, which drops its cached
+    results and stops any read that was in flight from caching a stale answer.
+    """
+
+    def __init__(self, ttl: float = MEMO_TTL, max_entries: int = MEMO_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str | None, str], tuple[float, dict]] = OrderedDict()
+        self._generations: defaultdict[str | None, int] = defaultdict(int)
+
+    def generation(self, session: str | None) -> int:
+        return self._generations[session]
+
+    def get(self, session: str | None, key: str) -> dict | None:
+        entry = self._entries.get((session, key))
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[(session, key)]
+            return None
+        self._entries.move_to_end((session, key))
+        return result
+
+    def put(self, session: str | None, key: str, result: dict, generation: int) -> None:
+        if generation != self._generations[session]:
+            return
+        self._entries[(session, key)] = (time.monotonic(), result)
+        self._entries.move_to_end((session, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session: str | None) -> None:
+        self._generations[session] += 1
+        for key in [k for k in self._entries if k[0] == session]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+
+
+memo = Memo()
+
+
+def memoized(handler):
+    tool = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(args: dict) -> dict:
+        if not MEMOIZE:
+            return await handler(args)
+        session = current_session()
+        if not is_read_only(tool, args):
+            memo.invalidate(session)
+            try:
+                return await handler(args)
+            finally:
+                memo.invalidate(session)
+
+        key = _key(tool, args)
+        cached = memo.get(session, key)
+        if cached is not None:
+            return cached
+        generation = memo.generation(session)
+        result = await handler(args)
+        if not result.get("is_error"):
+            memo.put(session, key, result, generation)
+        return result
+
+    return wrapper
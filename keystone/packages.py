@@ -0,0 +1,133 @@
+import hashlib
+import json
+import re
+import shlex
+from pathlib import Path
+
+import anyio
+
+from .config import BATCH_CONCURRENCY, PACKAGE_CACHE_DIR, PIP_INDEX_URL
+from .sandbox import sandbox
+from .transfer import download, upload
+
+SANDBOX_WHEEL_DIR = "/tmp/keystone-wheels"
+_PLATFORM_PROBE = (
+    "python3 -c 'import sys, platform; "
+    'print(f"cp{sys.version_info[0]}{sys.version_info[1]}-{platform.machine()}")\''
+)
+
+
+def _normalize(requirement: str) -> str:
+    return re.sub(r"\s+", "", requirement).lower()
+
+
+class PackageCache:
+    """Host-side wheel cache that sandboxes install from.
+
+    Wheels built for a requirement set are pulled back to the host and indexed
+    by the requirements plus the sandbox's Python tag and machine. Installing
+    the same set again, in any sandbox, uploads those wheels and runs pip with
+    ``--no-index``: no network access and nothing rebuilt.
+    """
+
+    def __init__(self, root: str | Path = PACKAGE_CACHE_DIR) -> None:
+        self.root = Path(root)
+        self._platforms: dict[str | None, str] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _index(self) -> dict[str, list[str]]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    def _save_index(self, index: dict[str, list[str]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, indent=2, sort_keys=True))
+        tmp.replace(self.index_path)
+
+    def key(self, requirements: list[str], platform: str) -> str:
+        payload = json.dumps([platform, sorted({_normalize(r) for r in requirements})])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def cached_wheels(self, key: str) -> list[Path] | None:
+        names = self._index().get(key)
+        if names is None:
+            return None
+        wheels = [self.root / name for name in names]
+        return wheels if all(w.exists() for w in wheels) else None
+
+    async def _run(self, command: str) -> str:
+        result = await sandbox.shell.exec_command(command=command)
+        output = result.data.output or ""
+        if result.data.exit_code not in (0, None):
+            raise OSError(output or f"sandbox command failed: {command}")
+        return output
+
+    async def platform(self, session: str | None) -> str:
+        if session not in self._platforms:
+            self._platforms[session] = (await self._run(_PLATFORM_PROBE)).strip()
+        return self._platforms[session]
+
+    async def configure(self) -> None:
+        """Point pip in the sandbox at the local wheel dir and the configured mirror."""
+        commands = [
+            f"mkdir -p {SANDBOX_WHEEL_DIR}",
+            f"pip config --user set global.find-links {SANDBOX_WHEEL_DIR}",
+        ]
+        if PIP_INDEX_URL:
+            commands.append(f"pip config --user set global.index-url {shlex.quote(PIP_INDEX_URL)}")
+        await self._run(" && ".join(commands) + " >/dev/null")
+
+    async def install(self, session: str | None, requirements: list[str]) -> str:
+        reqs = " ".join(shlex.quote(r) for r in requirements)
+        key = self.key(requirements, await self.platform(session))
+        install = f"pip install -q --no-index --find-links {SANDBOX_WHEEL_DIR} {reqs}"
+
+        wheels = self.cached_wheels(key)
+        if wheels is not None:
+            await self._run(f"mkdir -p {SANDBOX_WHEEL_DIR}")
+            limiter = anyio.CapacityLimiter(BATCH_CONCURRENCY)
+
+            async def push(wheel: Path) -> None:
+                async with limiter:
+                    await upload(wheel, f"{SANDBOX_WHEEL_DIR}/{wheel.name}")
+
+            async with anyio.create_task_group() as tg:
+                for wheel in wheels:
+                    tg.start_soon(push, wheel)
+            await self._run(install)
+            return f"Installed {len(requirements)} requirement(s) from {len(wheels)} cached wheels"
+
+        # Build the whole dependency closure into a fresh dir so the listing is exactly
+        # this set's wheels; pip wheel copies ones already in the cache dir over.
+        build_dir = f"{SANDBOX_WHEEL_DIR}/.build-{key[:12]}"
+        listing = await self._run(
+            f"rm -rf {build_dir} && mkdir -p {build_dir} && "
+            f"pip wheel -q --wheel-dir {build_dir} --find-links {SANDBOX_WHEEL_DIR} {reqs} && "
+            f"cp {build_dir}/*.whl {SANDBOX_WHEEL_DIR}/ && {install} && "
+            f"ls {build_dir} && rm -rf {build_dir}"
+        )
+        names = sorted(n for n in listing.split() if n.endswith(".whl"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        fetched = 0
+        for name in names:
+            if not (self.root / name).exists():
+                await download(f"{SANDBOX_WHEEL_DIR}/{name}", self.root / name)
+                fetched += 1
+        index = self._index()
+        index[key] = names
+        self._save_index(index)
+        return (
+            f"Installed {len(requirements)} requirement(s); cached {fetched} new wheel(s) "
+            f"({len(names)} total for this set)"
+        )
+
+    def release(self, session: str | None) -> None:
+        self._platforms.pop(session, None)
+
+
+packages = PackageCache()
@@ -0,0 +1,203 @@
+import json
+import sys
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import anyio
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+
+from .agent import KeystoneAgent
+from .config import BATCH_AGENTS, BATCH_JOB_TIMEOUT, SANDBOX_HEALTH_INTERVAL
+from .console import console
+from .sandbox import pool
+from .tracing import tracer
+
+
+@dataclass
+class BatchJob:
+    job_id: str
+    prompt: str
+    # Set for a line that couldn't be parsed; it is reported, not run.
+    error: str | None = None
+
+
+@dataclass
+class BatchResult:
+    id: str
+    prompt: str
+    status: str
+    result: str = ""
+    error: str | None = None
+    session_id: str | None = None
+    replayed: bool = False
+    warmup_time: float = 0.0
+    turn_time: float = 0.0
+    model_time: float = 0.0
+    duration: float = 0.0
+    finished: float = 0.0
+
+
+def parse_job(line: str, number: int) -> BatchJob | None:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return BatchJob(str(number), line)
+    if isinstance(data, str):
+        return BatchJob(str(number), data)
+    if not isinstance(data, dict) or not isinstance(data.get("prompt"), str):
+        raise ValueError(f'line {number}: expected a prompt string or {{"prompt": ...}}')
+    return BatchJob(str(data.get("id", number)), data["prompt"])
+
+
+def completed_jobs(output: Path) -> set[str]:
+    """Ids already finished successfully in ``output``, so a rerun skips them."""
+    if not output.exists():
+        return set()
+    done = set()
+    with output.open() as f:
+        for line in f:
+            with suppress(ValueError, KeyError, TypeError):
+                record = json.loads(line)
+                if record["status"] == "ok":
+                    done.add(str(record["id"]))
+    return done
+
+
+class BatchRunner:
+    """Runs a file or stream of prompts through a bounded pool of agent sessions.
+
+    Each prompt gets its own ``KeystoneAgent`` so jobs can't see each other's
+    conversation, and at most ``concurrency`` of them run at once. Results are
+    appended to the output JSONL as jobs finish; that file is also the
+    checkpoint, so running the same batch again skips jobs that already
+    succeeded and retries the rest.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], KeystoneAgent] = KeystoneAgent,
+        concurrency: int = BATCH_AGENTS,
+        timeout: float = BATCH_JOB_TIMEOUT,
+    ) -> None:
+        self.agent_factory = agent_factory
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def _jobs(self, source: str) -> AsyncIterator[BatchJob]:
+        f = anyio.wrap_file(sys.stdin) if source == "-" else await anyio.open_file(source)
+        number = 0
+        async for line in f:
+            number += 1
+            try:
+                job = parse_job(line, number)
+            except ValueError as e:
+                job = BatchJob(str(number), line.strip(), error=str(e))
+            if job is not None:
+                yield job
+        if source != "-":
+            await f.aclose()
+
+    async def _turn(self, agent: KeystoneAgent, job: BatchJob, result: BatchResult) -> None:
+        replayed = await agent.replay(job.prompt)
+        if replayed is not None:
+            result.replayed = True
+            result.result = replayed
+            return
+        text = []
+        await agent.client.query(job.prompt)
+        async for message in agent.client.receive_response():
+            if isinstance(message, AssistantMessage):
+                text.extend(b.text for b in message.content if isinstance(b, TextBlock))
+            elif isinstance(message, ResultMessage):
+                tracer.record_turn(agent.session_id, message.duration_ms, message.duration_api_ms)
+                agent.record_automation(job.prompt, not message.is_error)
+                result.turn_time = message.duration_ms / 1000
+                result.model_time = message.duration_api_ms / 1000
+                if message.is_error:
+                    result.status = "error"
+                    result.error = message.result or "agent turn failed"
+                if message.result:
+                    text = [message.result]
+        result.result = "\n".join(text)
+
+    async def run_job(self, job: BatchJob) -> BatchResult:
+        if job.error is not None:
+            return BatchResult(
+                job.job_id, job.prompt, "error", error=job.error, finished=time.time()
+            )
+        result = BatchResult(job.job_id, job.prompt, "ok")
+        start = time.perf_counter()
+        agent = self.agent_factory()
+        result.session_id = agent.session_id
+        try:
+            try:
+                with anyio.fail_after(self.timeout):
+                    await agent.warmup()
+                    result.warmup_time = time.perf_counter() - start
+                    await self._turn(agent, job, result)
+            finally:
+                with anyio.CancelScope(shield=True), suppress(Exception):
+                    await agent.disconnect()
+        except TimeoutError:
+            result.status = "timeout"
+            result.error = f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e)
+        result.duration = time.perf_counter() - start
+        result.finished = time.time()
+        return result
+
+    async def run(self, source: str, output: str | Path) -> dict:
+        output = Path(output)
+        done = completed_jobs(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        counts = {"ok": 0, "error": 0, "timeout": 0, "skipped": 0}
+        start = time.perf_counter()
+        send, receive = anyio.create_memory_object_stream[BatchJob](self.concurrency)
+
+        async def worker(jobs, out) -> None:
+            async with jobs:
+                async for job in jobs:
+                    result = await self.run_job(job)
+                    counts[result.status] += 1
+                    out.write(json.dumps(asdict(result)) + "\n")
+                    out.flush()
+                    console.message(
+                        f"[{job.job_id}] {result.status} in {result.duration:.1f}s"
+                        + (f": {result.error}" if result.error else "")
+                    )
+
+        with output.open("a") as out:
+            async with anyio.create_task_group() as tg:
+                for _ in range(self.concurrency):
+                    tg.start_soon(worker, receive.clone(), out)
+                receive.close()
+                async with send:
+                    async for job in self._jobs(source):
+                        if job.job_id in done:
+                            counts["skipped"] += 1
+                            continue
+                        await send.send(job)
+        return counts | {"wall_time": time.perf_counter() - start}
+
+
+async def run_batch(
+    source: str, output: str, concurrency: int = BATCH_AGENTS, timeout: float = BATCH_JOB_TIMEOUT
+) -> dict:
+    async with console.running(), anyio.create_task_group() as tg:
+        tg.start_soon(pool.monitor, SANDBOX_HEALTH_INTERVAL)
+        summary = await BatchRunner(concurrency=concurrency, timeout=timeout).run(source, output)
+        tg.cancel_scope.cancel()
+        console.output(
+            f"Batch done in {summary['wall_time']:.1f}s: {summary['ok']} ok, "
+            f"{summary['error']} failed, {summary['timeout']} timed out, "
+            f"{summary['skipped']} already done"
+        )
+    return summary
@@ -1,5 +1,122 @@
-from agent_sandbox import AsyncSandbox
+import contextvars
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-from .config import SANDBOX_URL
+import anyio
 
-sandbox = AsyncSandbox(base_url=SANDBOX_URL)
+from .config import SANDBOX_HEALTH_TIMEOUT, SANDBOX_MAX_FAILURES, SANDBOX_URLS
+from .transport import CircuitBreaker, make_client
+
+if TYPE_CHECKING:
+    from agent_sandbox import AsyncSandbox
+
+_session: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "keystone_session", default=None
+)
+
+
+@dataclass
+class Endpoint:
+    url: str
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    sessions: set[str] = field(default_factory=set)
+    healthy: bool = True
+    failures: int = 0
+    _client: "AsyncSandbox | None" = field(default=None, repr=False)
+
+    @property
+    def client(self) -> "AsyncSandbox":
+        # Built on first use, so importing keystone or starting the CLI doesn't
+        # load the sandbox SDK or open a connection pool per endpoint.
+        if self._client is None:
+            self._client = make_client(self.url, self.breaker)
+        return self._client
+
+    @client.setter
+    def client(self, client: "AsyncSandbox") -> None:
+        self._client = client
+
+    @property
+    def load(self) -> int:
+        return len(self.sessions)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and self.breaker.state != "open"
+
+
+class SandboxPool:
+    """Sandbox endpoints with sticky session placement.
+
+    A session stays on its endpoint for its whole life, since kernel state and
+    files don't move between containers. It is only re-placed, on the least
+    loaded healthy endpoint, once its own endpoint fails health checks. New
+    sessions also skip endpoints whose circuit breaker is open.
+    """
+
+    def __init__(self, urls: list[str]) -> None:
+        if not urls:
+            raise ValueError("SandboxPool needs at least one sandbox URL")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._pins: dict[str, Endpoint] = {}
+
+    def acquire(self, session_id: str) -> Endpoint:
+        endpoint = self._pins.get(session_id)
+        if endpoint is not None and endpoint.healthy:
+            return endpoint
+        if endpoint is not None:
+            endpoint.sessions.discard(session_id)
+        candidates = [e for e in self.endpoints if e.available] or self.endpoints
+        endpoint = min(candidates, key=lambda e: e.load)
+        endpoint.sessions.add(session_id)
+        self._pins[session_id] = endpoint
+        return endpoint
+
+    def release(self, session_id: str) -> None:
+        endpoint = self._pins.pop(session_id, None)
+        if endpoint is not None:
+            endpoint.sessions.discard(session_id)
+
+    def client_for(self, session_id: str | None) -> "AsyncSandbox":
+        if session_id is None:
+            return self.endpoints[0].client
+        return self.acquire(session_id).client
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        try:
+            with anyio.fail_after(SANDBOX_HEALTH_TIMEOUT):
+                await endpoint.client.sandbox.get_context()
+        except Exception:
+            endpoint.failures += 1
+            if endpoint.failures >= SANDBOX_MAX_FAILURES:
+                endpoint.healthy = False
+        else:
+            endpoint.failures = 0
+            endpoint.healthy = True
+
+    async def check_health(self) -> None:
+        async with anyio.create_task_group() as tg:
+            for endpoint in self.endpoints:
+                tg.start_soon(self._probe, endpoint)
+
+    async def monitor(self, interval: float) -> None:
+        while True:
+            await self.check_health()
+            await anyio.sleep(interval)
+
+
+def activate(session_id: str) -> None:
+    _session.set(session_id)
+
+
+def current_session() -> str | None:
+    return _session.get()
+
+
+class _SessionSandbox:
+    def __getattr__(self, name: str):
+        return getattr(pool.client_for(_session.get()), name)
+
+
+pool = SandboxPool(SANDBOX_URLS)
+sandbox = _SessionSandbox()
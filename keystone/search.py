@@ -0,0 +1,192 @@
+import posixpath
+import re
+import shlex
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import SEARCH_EXCLUDES, SEARCH_INLINE_BYTES, TRANSFER_COMPRESSION
+from .sandbox import sandbox
+from .transfer import download
+
+# Walks the tree inside the sandbox and prints only what changed since `since`:
+# every file newer than it, and for each directory whose entries changed (its
+# mtime moved) a D line, its subdirectories and all of its files. Small deltas
+# come back inline; large ones (the first scan of a big tree) go to a file.
+# The stamp it prints is backdated a little because file systems take mtimes
+# from a coarse clock, so an edit right after a scan could otherwise predate it.
+_SCAN = r"""
+import os, sys, time
+root, since, out, limit = sys.argv[1], float(sys.argv[2]), sys.argv[3], int(sys.argv[4])
+excludes = set(filter(None, sys.argv[5].split(",")))
+print(time.time() - 1)
+if not os.path.isdir(root):
+    print("!missing")
+    sys.exit()
+lines = []
+for top, dirs, files in os.walk(root):
+    dirs[:] = sorted(d for d in dirs if d not in excludes)
+    rel = os.path.relpath(top, root)
+    rel = "" if rel == "." else rel + "/"
+    try:
+        changed = os.stat(top).st_mtime >= since
+    except OSError:
+        continue
+    if changed:
+        lines.append("D\t" + rel)
+        lines.extend("C\t%s\t%s" % (rel, d) for d in dirs)
+    for name in files:
+        if name in excludes:
+            continue
+        try:
+            st = os.lstat(os.path.join(top, name))
+        except OSError:
+            continue
+        if changed or st.st_mtime >= since:
+            lines.append("F\t%s%s\t%d\t%f" % (rel, name, st.st_size, st.st_mtime))
+data = "\n".join(lines)
+if len(data) <= limit:
+    print(data)
+else:
+    with open(out, "w") as f:
+        f.write(data)
+    print("@" + out)
+"""
+
+
+def glob_regex(pattern: str) -> re.Pattern:
+    """Compile a path glob; ``**`` spans directories, and a glob without a slash
+    matches file names anywhere in the tree."""
+    if "/" not in pattern:
+        pattern = "**/" + pattern
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+@dataclass
+class TreeIndex:
+    root: str
+    files: dict[str, tuple[int, float]] = field(default_factory=dict)
+    since: float = 0.0
+
+    def apply(self, lines: list[str]) -> int:
+        """Merge one scan delta into the index. Returns the number of lines applied."""
+        changed: dict[str, set[str]] = {}
+        updates: dict[str, tuple[int, float]] = {}
+        for line in lines:
+            kind, _, rest = line.partition("\t")
+            if kind == "D":
+                changed.setdefault(rest, set())
+            elif kind == "C":
+                parent, _, name = rest.partition("\t")
+                changed.setdefault(parent, set()).add(name)
+            elif kind == "F":
+                path, size, mtime = rest.rsplit("\t", 2)
+                updates[path] = (int(size), float(mtime))
+        if changed:
+            self.files = {p: v for p, v in self.files.items() if not self._stale(p, changed)}
+        self.files.update(updates)
+        return len(lines)
+
+    @staticmethod
+    def _stale(path: str, changed: dict[str, set[str]]) -> bool:
+        # A file is dropped when its directory was relisted (it is re-added if it is
+        # still there) or when any ancestor directory disappeared from its parent.
+        start = 0
+        while (slash := path.find("/", start)) != -1:
+            parent = path[:start]
+            if parent in changed and path[start:slash] not in changed[parent]:
+                return True
+            start = slash + 1
+        return path[:start] in changed
+
+    def match(self, pattern: str | None = None, under: str = "") -> list[str]:
+        regex = glob_regex(pattern) if pattern else None
+        prefix = under.strip("/") + "/" if under.strip("/") else ""
+        return [
+            p
+            for p in self.files
+            if p.startswith(prefix) and (regex is None or regex.match(p[len(prefix) :]))
+        ]
+
+
+class SearchIndex:
+    """Per-session file indexes of sandbox trees, refreshed incrementally.
+
+    The first query under a root lists the whole tree once. After that each
+    query asks the sandbox only for what changed since the previous scan, so
+    keeping the index fresh costs one round trip and a delta proportional to
+    the changes, not to the size of the tree.
+    """
+
+    def __init__(
+        self, excludes: list[str] = SEARCH_EXCLUDES, inline_bytes: int = SEARCH_INLINE_BYTES
+    ) -> None:
+        self.excludes = excludes
+        self.inline_bytes = inline_bytes
+        self._indexes: dict[tuple[str | None, str], TreeIndex] = {}
+
+    def get(self, session: str | None, root: str) -> TreeIndex | None:
+        return self._indexes.get((session, posixpath.normpath(root)))
+
+    async def refresh(self, session: str | None, root: str) -> TreeIndex:
+        root = posixpath.normpath(root)
+        index = self._indexes.setdefault((session, root), TreeIndex(root))
+        out = f"/tmp/keystone-index-{abs(hash((session, root)))}.tsv"
+        command = " ".join(
+            shlex.quote(arg)
+            for arg in [
+                "python3",
+                "-c",
+                _SCAN,
+                root,
+                repr(index.since),
+                out,
+                str(self.inline_bytes),
+                ",".join(self.excludes),
+            ]
+        )
+        result = await sandbox.shell.exec_command(command=command)
+        output = result.data.output or ""
+        if result.data.exit_code not in (0, None):
+            raise OSError(output or f"could not index {root}")
+        header, _, body = output.partition("\n")
+        if body.startswith("!missing"):
+            raise FileNotFoundError(f"no such directory in the sandbox: {root}")
+        if body.startswith("@"):
+            body = await self._fetch(body[1:].strip())
+        index.apply([line for line in body.splitlines() if line])
+        index.since = float(header)
+        return index
+
+    async def _fetch(self, remote: str) -> str:
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                local = Path(tmp) / "delta.tsv"
+                await download(remote, local, compress=TRANSFER_COMPRESSION)
+                return local.read_text()
+        finally:
+            await sandbox.shell.exec_command(command=f"rm -f {shlex.quote(remote)}")
+
+    def release(self, session: str | None) -> None:
+        for key in [k for k in self._indexes if k[0] == session]:
+            del self._indexes[key]
+
+
+search_index = SearchIndex()
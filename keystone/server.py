@@ -0,0 +1,177 @@
+import json
+from collections.abc import Callable
+from contextlib import suppress
+
+import anyio
+from anyio.abc import ByteStream
+from anyio.streams.buffered import BufferedByteReceiveStream
+from anyio.streams.memory import MemoryObjectReceiveStream
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+from .agent import KeystoneAgent
+from .config import (
+    SANDBOX_HEALTH_INTERVAL,
+    SERVER_HOST,
+    SERVER_MAX_CONCURRENT_TURNS,
+    SERVER_MAX_PROMPT_BYTES,
+    SERVER_MAX_SESSIONS,
+    SERVER_PORT,
+    SERVER_SESSION_QUEUE_SIZE,
+)
+from .console import console
+from .sandbox import pool
+from .tracing import tracer
+
+
+def _events(message) -> list[dict]:
+    if isinstance(message, AssistantMessage):
+        events = []
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                events.append({"type": "text", "text": block.text})
+            elif isinstance(block, ToolUseBlock):
+                events.append({"type": "tool", "name": block.name})
+        return events
+    if isinstance(message, ResultMessage):
+        return [{"type": "result", "is_error": message.is_error}]
+    return []
+
+
+class _Connection:
+    def __init__(self, stream: ByteStream) -> None:
+        self.stream = stream
+        self.lock = anyio.Lock()
+
+    async def send(self, event: dict) -> None:
+        async with self.lock:
+            await self.stream.send(json.dumps(event).encode() + b"\n")
+
+
+class Server:
+    """Hosts many KeystoneAgent sessions over newline-delimited JSON.
+
+    Each TCP connection is one session. Clients send ``{"prompt": ...}`` lines
+    and receive ``text``/``tool``/``result`` events followed by ``done``.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], KeystoneAgent] = KeystoneAgent,
+        max_sessions: int = SERVER_MAX_SESSIONS,
+        max_concurrent_turns: int = SERVER_MAX_CONCURRENT_TURNS,
+        queue_size: int = SERVER_SESSION_QUEUE_SIZE,
+    ) -> None:
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.turns = anyio.CapacityLimiter(max_concurrent_turns)
+        self.sessions: dict[str, KeystoneAgent] = {}
+
+    async def handle(self, stream: ByteStream) -> None:
+        conn = _Connection(stream)
+        session_id = None
+        async with stream:
+            try:
+                if len(self.sessions) >= self.max_sessions:
+                    await conn.send({"type": "error", "error": "server at capacity"})
+                    return
+                agent = self.agent_factory()
+                session_id = agent.session_id
+                self.sessions[session_id] = agent
+                try:
+                    await self._run_session(agent, conn)
+                finally:
+                    self.sessions.pop(session_id, None)
+            except* (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                pass
+            except* Exception as group:
+                # One session failing must not reach the listener's task group.
+                error = group.exceptions[0]
+                console.message(f"Session {session_id} failed: {error}")
+                with suppress(Exception):
+                    await conn.send({"type": "error", "error": f"session failed: {error}"})
+            finally:
+                if session_id is not None:
+                    pool.release(session_id)
+
+    async def _run_session(self, agent: KeystoneAgent, conn: _Connection) -> None:
+        try:
+            await agent.warmup()
+        except Exception as e:
+            await conn.send({"type": "error", "error": str(e)})
+            return
+
+        send, receive = anyio.create_memory_object_stream[str](self.queue_size)
+        try:
+            async with anyio.create_task_group() as tg:
+                await conn.send({"type": "session", "session_id": agent.session_id})
+                tg.start_soon(self._worker, agent, receive, conn)
+                async with send:
+                    await self._reader(conn, send)
+        finally:
+            await agent.disconnect()
+
+    async def _reader(self, conn: _Connection, send) -> None:
+        buffered = BufferedByteReceiveStream(conn.stream)
+        while True:
+            try:
+                line = await buffered.receive_until(b"\n", SERVER_MAX_PROMPT_BYTES)
+            except (anyio.EndOfStream, anyio.IncompleteRead):
+                return
+            except anyio.DelimiterNotFound:
+                await conn.send({"type": "error", "error": "request too large"})
+                return
+
+            try:
+                prompt = json.loads(line)["prompt"]
+            except (ValueError, KeyError, TypeError):
+                await conn.send({"type": "error", "error": 'expected {"prompt": ...}'})
+                continue
+            if not isinstance(prompt, str) or not prompt.strip():
+                continue
+
+            try:
+                send.send_nowait(prompt)
+            except anyio.WouldBlock:
+                await conn.send({"type": "error", "error": "session busy, retry later"})
+
+    async def _worker(
+        self, agent: KeystoneAgent, receive: MemoryObjectReceiveStream[str], conn: _Connection
+    ) -> None:
+        async with receive:
+            async for prompt in receive:
+                await self._turn(agent, prompt, conn)
+
+    async def _turn(self, agent: KeystoneAgent, prompt: str, conn: _Connection) -> None:
+        try:
+            async with self.turns:
+                await agent.client.query(prompt)
+                async for message in agent.client.receive_response():
+                    if isinstance(message, ResultMessage):
+                        tracer.record_turn(
+                            agent.session_id, message.duration_ms, message.duration_api_ms
+                        )
+                        agent.checkpoint(message.session_id)
+                        agent.record_automation(prompt, not message.is_error)
+                    for event in _events(message):
+                        await conn.send(event)
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+            raise
+        except Exception as e:
+            agent.record_automation(prompt, False)
+            await conn.send({"type": "error", "error": f"turn failed: {e}"})
+        await conn.send({"type": "done"})
+        try:
+            async with self.turns:
+                await agent.compact_if_needed()
+        except Exception as e:
+            console.message(f"Compaction failed for session {agent.session_id}: {e}")
+
+
+async def serve(host: str = SERVER_HOST, port: int = SERVER_PORT) -> None:
+    server = Server()
+    listener = await anyio.create_tcp_listener(local_host=host, local_port=port)
+    print(f"Keystone server listening on {host}:{port}")
+    async with console.running(), anyio.create_task_group() as tg:
+        tg.start_soon(pool.monitor, SANDBOX_HEALTH_INTERVAL)
+        await listener.serve(server.handle, task_group=tg)
@@ -0,0 +1,185 @@
+import dataclasses
+import hashlib
+import json
+import re
+import shlex
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .cache import file_cache
+from .config import SNAPSHOT_DIR, SNAPSHOT_ROOTS
+from .sandbox import current_session, sandbox
+from .transfer import download, upload
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import SdkMcpTool
+
+_SETUP_COMMAND = re.compile(
+    r"^\s*(sudo\s+)?("
+    r"(python3?\s+-m\s+)?pip3?\s+install|uv\s+(pip\s+install|add|sync)|"
+    r"apt(-get)?\s+install|(npm|pnpm|yarn)\s+(install|add|ci)|conda\s+install|"
+    r"git\s+clone|wget\s|curl\s.*\s-[oO]\b|mkdir\s|tar\s+-?x|unzip\s"
+    r")"
+)
+_MAGIC_INSTALL = re.compile(r"^\s*[%!]\s*(pip3?\s+install\b.*)$")
+_DELTA_EXCLUDES = ("*/__pycache__/*", "*/.cache/*", "*/jupyter/runtime/*")
+_ARCHIVE = "files.tar.gz"
+# Session ids become directory names on the host and file names in the sandbox.
+SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def setup_steps(tool: str, args: dict) -> list[str]:
+    if tool == "run_shell":
+        return [args["command"]] if _SETUP_COMMAND.match(args["command"]) else []
+    if tool == "install_packages":
+        return ["pip install " + " ".join(shlex.quote(p) for p in args["packages"])]
+    if tool == "execute_python":
+        return [
+            m.group(1) for line in args["code"].splitlines() if (m := _MAGIC_INSTALL.match(line))
+        ]
+    return []
+
+
+def succeeded(tool: str, result: dict) -> bool:
+    if result.get("is_error"):
+        return False
+    text = "".join(b.get("text", "") for b in result.get("content", []))
+    return tool != "run_shell" or text.endswith("[exit code: 0]")
+
+
+@dataclass
+class Snapshot:
+    session_id: str
+    started: float = field(default_factory=time.time)
+    conversation_id: str | None = None
+    files: dict[str, str] = field(default_factory=dict)
+    steps: list[str] = field(default_factory=list)
+    archive: str | None = None
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Snapshot":
+        return cls(**{f.name: data[f.name] for f in dataclasses.fields(cls) if f.name in data})
+
+
+class SnapshotStore:
+    """Journals what a session does to its sandbox so it can be resumed later.
+
+    The manifest (conversation id, files written, setup steps) is cheap and is
+    saved after every turn. ``export`` additionally archives every file under
+    ``roots`` that changed since the session started, which restores installed
+    packages and downloads into a fresh sandbox without replaying the steps.
+    """
+
+    def __init__(self, root: str | Path = SNAPSHOT_DIR, roots: list[str] = SNAPSHOT_ROOTS) -> None:
+        self.root = Path(root)
+        self.roots = roots
+        self._journals: dict[str, Snapshot] = {}
+
+    def directory(self, session_id: str) -> Path:
+        if not SESSION_ID.fullmatch(session_id):
+            raise ValueError(f"invalid session id: {session_id!r}")
+        return self.root / session_id
+
+    def journal(self, session_id: str) -> Snapshot:
+        if session_id not in self._journals:
+            self._journals[session_id] = Snapshot(session_id)
+        return self._journals[session_id]
+
+    def record(self, session_id: str, tool: str, args: dict) -> None:
+        snapshot = self.journal(session_id)
+        if tool == "write_file":
+            snapshot.files[args["path"]] = hashlib.sha256(args["content"].encode()).hexdigest()
+        elif tool == "write_files":
+            for item in args["files"]:
+                snapshot.files[item["path"]] = hashlib.sha256(item["content"].encode()).hexdigest()
+        for step in setup_steps(tool, args):
+            if step not in snapshot.steps:
+                snapshot.steps.append(step)
+
+    def save(self, session_id: str, conversation_id: str | None = None) -> Path:
+        snapshot = self.journal(session_id)
+        if conversation_id:
+            snapshot.conversation_id = conversation_id
+        directory = self.directory(session_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / "manifest.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot.to_dict(), indent=2))
+        tmp.replace(path)
+        return path
+
+    def load(self, session_id: str) -> Snapshot:
+        path = self.directory(session_id) / "manifest.json"
+        if not path.exists():
+            raise FileNotFoundError(f"no snapshot for session {session_id} in {self.root}")
+        snapshot = Snapshot.from_dict(json.loads(path.read_text()))
+        # Resumed sessions keep journaling on top of what they restored.
+        self._journals[session_id] = dataclasses.replace(snapshot, started=time.time())
+        return snapshot
+
+    async def export(self, session_id: str) -> Path:
+        snapshot = self.journal(session_id)
+        roots = " ".join(shlex.quote(r) for r in self.roots)
+        excludes = " ".join(f"! -path {shlex.quote(p)}" for p in _DELTA_EXCLUDES)
+        remote = f"/tmp/keystone-snapshot-{session_id}.tar.gz"
+        command = (
+            f"find {roots} -xdev -type f -newermt @{int(snapshot.started) - 1} {excludes} "
+            f"-print0 2>/dev/null | tar --null -czPf {shlex.quote(remote)} -T -"
+        )
+        result = await sandbox.shell.exec_command(command=command)
+        if result.data.exit_code not in (0, None):
+            raise OSError(result.data.output or "could not archive sandbox changes")
+        directory = self.directory(session_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        try:
+            await download(remote, directory / _ARCHIVE)
+        finally:
+            await sandbox.shell.exec_command(command=f"rm -f {shlex.quote(remote)}")
+        snapshot.archive = _ARCHIVE
+        return self.save(session_id)
+
+    async def restore(self, snapshot: Snapshot) -> str:
+        archive = self.directory(snapshot.session_id) / (snapshot.archive or _ARCHIVE)
+        if snapshot.archive and archive.exists():
+            remote = f"/tmp/keystone-restore-{snapshot.session_id}.tar.gz"
+            await upload(archive, remote)
+            # -m stamps restored files with the current time, so the next export includes them.
+            quoted = shlex.quote(remote)
+            result = await sandbox.shell.exec_command(
+                command=f"tar -xzPmf {quoted}; rc=$?; rm -f {quoted}; exit $rc"
+            )
+            file_cache.invalidate(current_session())
+            if result.data.exit_code not in (0, None):
+                raise OSError(result.data.output or "could not unpack snapshot archive")
+            return f"restored {archive.stat().st_size} byte archive"
+        for step in snapshot.steps:
+            result = await sandbox.shell.exec_command(command=step)
+            if result.data.exit_code not in (0, None):
+                raise OSError(f"setup step failed: {step}\n{result.data.output}")
+        file_cache.invalidate(current_session())
+        return f"replayed {len(snapshot.steps)} setup steps"
+
+    def release(self, session_id: str) -> None:
+        self._journals.pop(session_id, None)
+
+
+snapshots = SnapshotStore()
+
+
+def journaled(sdk_tool: "SdkMcpTool") -> "SdkMcpTool":
+    """Record successful file writes and setup commands in the session's snapshot."""
+    handler = sdk_tool.handler
+
+    async def wrapper(args: dict) -> dict:
+        result = await handler(args)
+        session = current_session()
+        if session is not None and succeeded(sdk_tool.name, result):
+            snapshots.record(session, sdk_tool.name, args)
+        return result
+
+    return dataclasses.replace(sdk_tool, handler=wrapper)
@@ -1,9 +1,38 @@
-from .python import execute_python
-from .shell import run_shell
-from .files import write_file, read_file
+import importlib
 
-ALL_TOOLS = [execute_python, run_shell, write_file, read_file]
+# Tool modules pull in the agent SDK, so they are imported on first use rather
+# than whenever something under keystone.tools (_helpers, _reduce) is needed.
+_TOOL_MODULES = {
+    "execute_python": "python",
+    "run_shell": "shell",
+    "write_file": "files",
+    "read_file": "files",
+    "read_files": "batch",
+    "write_files": "batch",
+    "run_shell_batch": "batch",
+    "search_files": "search",
+    "list_tree": "search",
+    "start_job": "jobs",
+    "job_status": "jobs",
+    "job_output": "jobs",
+    "cancel_job": "jobs",
+    "install_packages": "packages",
+    "fetch_result": "results",
+}
+
+__all__ = ["ALL_TOOLS", "tool_names", *_TOOL_MODULES]
+
+
+def __getattr__(name: str):
+    if name == "ALL_TOOLS":
+        value = [__getattr__(tool_name) for tool_name in _TOOL_MODULES]
+    elif name in _TOOL_MODULES:
+        value = getattr(importlib.import_module(f".{_TOOL_MODULES[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
 
 
 def tool_names(server_name: str) -> list[str]:
-    return [f"mcp__{server_name}__{t.name}" for t in ALL_TOOLS]
+    return [f"mcp__{server_name}__{name}" for name in _TOOL_MODULES]
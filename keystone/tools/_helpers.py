@@ -1,22 +1,84 @@
-from ..config import MAX_OUTPUT
+import time
+from collections import deque
+
+from ..config import MAX_OUTPUT, MAX_TOOL_TIMEOUT
+from ..console import console
+from ..tracing import record_output
+from ._reduce import reduce_output
+
+_MARKER_ROOM = 100
 
 
 def _truncate(text: str) -> str:
     if len(text) > MAX_OUTPUT:
-        return text[:MAX_OUTPUT] + f"\n... (truncated, {len(text)} chars total)"
+        head = MAX_OUTPUT // 2
+        tail = MAX_OUTPUT - head
+        return text[:head] + f"\n... (truncated, {len(text)} chars total) ...\n" + text[-tail:]
     return text
 
 
-def _ok(text: str) -> dict:
-    return {"content": [{"type": "text", "text": _truncate(text)}]}
+def _reduce(text: str, raw_chars: int | None = None) -> str:
+    start = time.perf_counter()
+    reduced = _truncate(reduce_output(text, MAX_OUTPUT))
+    record_output(len(text) if raw_chars is None else raw_chars, time.perf_counter() - start)
+    return reduced
+
+
+def _timeout(args: dict, default: float) -> float:
+    return min(args.get("timeout") or default, MAX_TOOL_TIMEOUT)
+
+
+def _ok(text: str, raw_chars: int | None = None) -> dict:
+    """Tool result; pass ``raw_chars`` when ``text`` was already cut from a larger output."""
+    return {"content": [{"type": "text", "text": _reduce(text, raw_chars)}]}
+
 
+def _err(text: str, raw_chars: int | None = None) -> dict:
+    return {"content": [{"type": "text", "text": _reduce(text, raw_chars)}], "is_error": True}
 
-def _err(text: str) -> dict:
-    return {"content": [{"type": "text", "text": _truncate(text)}], "is_error": True}
+
+class OutputBuffer:
+    """Keeps the head and a rolling tail of a stream within a fixed budget."""
+
+    def __init__(self, limit: int = MAX_OUTPUT) -> None:
+        self.head_limit = limit // 2
+        self.tail_limit = max(limit - self.head_limit - _MARKER_ROOM, 1)
+        self.head: list[str] = []
+        self.head_len = 0
+        self.tail: deque[str] = deque()
+        self.tail_len = 0
+        self.total = 0
+
+    def write(self, text: str) -> None:
+        self.total += len(text)
+        room = self.head_limit - self.head_len
+        if room > 0:
+            self.head.append(text[:room])
+            self.head_len += len(self.head[-1])
+            text = text[room:]
+        if not text:
+            return
+        self.tail.append(text)
+        self.tail_len += len(text)
+        while self.tail_len - len(self.tail[0]) >= self.tail_limit:
+            self.tail_len -= len(self.tail.popleft())
+        excess = self.tail_len - self.tail_limit
+        if excess > 0:
+            self.tail[0] = self.tail[0][excess:]
+            self.tail_len -= excess
+
+    def getvalue(self) -> str:
+        head = "".join(self.head)
+        tail = "".join(self.tail)
+        omitted = self.total - len(head) - len(tail)
+        if not omitted:
+            return head + tail
+        return f"{head}\n... ({omitted} chars omitted, {self.total} total) ...\n{tail}"
 
 
 def _log_tool(name: str, lines: list[str]) -> None:
-    print(f"\n  ┌─ {name} {'─' * max(1, 38 - len(name))}")
-    for line in lines:
-        print(f"  │ {line}")
-    print(f"  └──────────────────────────────────────")
+    console.tool(name, lines)
+
+
+def _log_stream(text: str) -> None:
+    console.stream(text)
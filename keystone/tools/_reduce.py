@@ -0,0 +1,139 @@
+import itertools
+import json
+import re
+from collections.abc import Callable
+
+Reducer = Callable[[str, int], str]
+
+_ANSI = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_TRACEBACK_START = "Traceback (most recent call last):"
+_TABLE_MIN_ROWS = 20
+_TABLE_HEAD_ROWS = 10
+_TABLE_TAIL_ROWS = 5
+_JSON_SAMPLE_ITEMS = 3
+_JSON_MAX_KEYS = 20
+
+
+def strip_ansi(text: str, budget: int) -> str:
+    return _ANSI.sub("", text)
+
+
+def dedupe_tracebacks(text: str, budget: int) -> str:
+    lines = text.split("\n")
+    out: list[str] = []
+    seen: set[tuple[str, ...]] = set()
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() != _TRACEBACK_START:
+            out.append(lines[i])
+            i += 1
+            continue
+        end = i + 1
+        while end < len(lines) and lines[end].startswith((" ", "\t")):
+            end += 1
+        block = tuple(lines[i : end + 1])
+        if block in seen:
+            out.append(f"[duplicate traceback omitted: {block[-1].strip()}]")
+        else:
+            seen.add(block)
+            out.extend(block)
+        i = end + 1
+    return "\n".join(out)
+
+
+def collapse_repeats(text: str, budget: int) -> str:
+    out: list[str] = []
+    for line, group in itertools.groupby(text.split("\n")):
+        count = sum(1 for _ in group)
+        if count >= 3:
+            out.extend([line, f"... (previous line repeated {count - 1} more times)"])
+        else:
+            out.extend([line] * count)
+    return "\n".join(out)
+
+
+def _schema(value, depth: int = 0):
+    if isinstance(value, dict):
+        if depth >= 3:
+            return f"object[{len(value)} keys]"
+        keys = list(value)[:_JSON_MAX_KEYS]
+        schema = {k: _schema(value[k], depth + 1) for k in keys}
+        if len(value) > len(keys):
+            schema["..."] = f"{len(value) - len(keys)} more keys"
+        return schema
+    if isinstance(value, list):
+        if not value:
+            return "list[0]"
+        return {f"list[{len(value)}] of": _schema(value[0], depth + 1)}
+    return type(value).__name__
+
+
+def summarize_json(text: str, budget: int) -> str:
+    stripped = text.strip()
+    if not stripped.startswith(("{", "[")):
+        return text
+    try:
+        value = json.loads(stripped)
+    except ValueError:
+        return text
+    sample = value[:_JSON_SAMPLE_ITEMS] if isinstance(value, list) else value
+    parts = [
+        f"[JSON, {len(text)} chars, summarized]",
+        "schema: " + json.dumps(_schema(value), indent=1),
+        "sample: " + json.dumps(sample, indent=1, default=str)[: budget // 2],
+    ]
+    return "\n".join(parts)
+
+
+def summarize_table(text: str, budget: int) -> str:
+    lines = text.rstrip("\n").split("\n")
+    if len(lines) < _TABLE_MIN_ROWS:
+        return text
+    for delimiter in ("\t", ","):
+        columns = lines[0].count(delimiter)
+        if columns == 0:
+            continue
+        probe = lines[:50]
+        matching = sum(1 for line in probe if line.count(delimiter) == columns)
+        if matching < 0.9 * len(probe):
+            continue
+        rows = len(lines) - 1
+        omitted = rows - _TABLE_HEAD_ROWS - _TABLE_TAIL_ROWS
+        if omitted <= 0:
+            return text
+        return "\n".join(
+            lines[: _TABLE_HEAD_ROWS + 1]
+            + [f"... ({omitted} rows omitted; {rows} rows x {columns + 1} columns total)"]
+            + lines[-_TABLE_TAIL_ROWS:]
+        )
+    return text
+
+
+REDUCERS: list[Reducer] = [
+    strip_ansi,
+    dedupe_tracebacks,
+    collapse_repeats,
+    summarize_json,
+    summarize_table,
+]
+
+
+def register_reducer(reducer: Reducer, index: int | None = None) -> None:
+    if index is None:
+        REDUCERS.append(reducer)
+    else:
+        REDUCERS.insert(index, reducer)
+
+
+def reduce_output(text: str, budget: int) -> str:
+    """Shrink ``text`` toward ``budget`` chars with the registered reducers.
+
+    Output that already fits is returned untouched, so small results such as
+    file contents reach the model verbatim. Reducers run in order and stop as
+    soon as the text fits.
+    """
+    for reducer in REDUCERS:
+        if len(text) <= budget:
+            break
+        text = reducer(text, budget)
+    return text
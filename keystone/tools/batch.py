@@ -0,0 +1,121 @@
+from collections.abc import Awaitable, Callable
+
+import anyio
+from claude_agent_sdk import tool
+
+from ..config import BATCH_CONCURRENCY, BATCH_MAX_ITEMS, MAX_OUTPUT
+from ..memo import memoized
+from ..tracing import traced
+from ._helpers import OutputBuffer, _err, _ok
+from .files import read_file, write_file
+from .shell import run_shell
+
+_MIN_ITEM_OUTPUT = 500
+
+
+async def _fan_out(items: list, run: Callable[[object], Awaitable[dict]]) -> list[dict]:
+    limiter = anyio.CapacityLimiter(BATCH_CONCURRENCY)
+    results: list[dict] = [{}] * len(items)
+
+    async def one(index: int, item) -> None:
+        async with limiter:
+            results[index] = await run(item)
+
+    async with anyio.create_task_group() as tg:
+        for index, item in enumerate(items):
+            tg.start_soon(one, index, item)
+    return results
+
+
+def _combine(labels: list[str], results: list[dict]) -> dict:
+    budget = max(_MIN_ITEM_OUTPUT, MAX_OUTPUT // len(results))
+    sections = []
+    omitted = 0
+    for label, result in zip(labels, results, strict=True):
+        buffer = OutputBuffer(limit=budget)
+        buffer.write(result["content"][0]["text"])
+        kept = buffer.getvalue()
+        omitted += max(buffer.total - len(kept), 0)
+        status = "error" if result.get("is_error") else "ok"
+        sections.append(f"=== [{status}] {label}\n{kept}")
+    text = "\n".join(sections)
+    if all(result.get("is_error") for result in results):
+        return _err(text, raw_chars=len(text) + omitted)
+    return _ok(text, raw_chars=len(text) + omitted)
+
+
+def _check_size(name: str, items: list) -> dict | None:
+    if not items:
+        return _err(f"{name} needs at least one item")
+    if len(items) > BATCH_MAX_ITEMS:
+        return _err(f"{name} accepts at most {BATCH_MAX_ITEMS} items, got {len(items)}")
+    return None
+
+
+@tool(
+    name="read_files",
+    description="Read several files from the sandbox in one call.",
+    input_schema={
+        "type": "object",
+        "properties": {"paths": {"type": "array", "items": {"type": "string"}}},
+        "required": ["paths"],
+    },
+)
+@traced
+@memoized
+async def read_files(args: dict) -> dict:
+    paths = args["paths"]
+    if error := _check_size("read_files", paths):
+        return error
+    results = await _fan_out(paths, lambda path: read_file.handler({"path": path}))
+    return _combine(paths, results)
+
+
+@tool(
+    name="write_files",
+    description="Write several files to the sandbox in one call.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "files": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+                    "required": ["path", "content"],
+                },
+            }
+        },
+        "required": ["files"],
+    },
+)
+@traced
+@memoized
+async def write_files(args: dict) -> dict:
+    files = args["files"]
+    if error := _check_size("write_files", files):
+        return error
+    results = await _fan_out(files, write_file.handler)
+    return _combine([f["path"] for f in files], results)
+
+
+@tool(
+    name="run_shell_batch",
+    description=(
+        "Run several independent shell commands in the sandbox concurrently. "
+        "Each command runs in its own shell; use run_shell for commands that depend on each other."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {"commands": {"type": "array", "items": {"type": "string"}}},
+        "required": ["commands"],
+    },
+)
+@traced
+@memoized
+async def run_shell_batch(args: dict) -> dict:
+    commands = args["commands"]
+    if error := _check_size("run_shell_batch", commands):
+        return error
+    results = await _fan_out(commands, lambda command: run_shell.handler({"command": command}))
+    return _combine([f"$ {command}" for command in commands], results)
@@ -1,36 +1,143 @@
+import base64
+import binascii
+
+import anyio
 from claude_agent_sdk import tool
 
-from ..sandbox import sandbox
+from ..cache import file_cache
+from ..config import FILE_TIMEOUT, MAX_OUTPUT, WRITE_CHUNK_CHARS
+from ..memo import memoized
+from ..sandbox import current_session, sandbox
+from ..tracing import traced
+from ..transfer import file_version, read_ends, read_range
 from ._helpers import _ok, _err, _log_tool
 
+# Largest byte range whose base64 form still fits the output budget next to its header.
+_BASE64_READ = (MAX_OUTPUT - 100) // 4 * 3
+# Bytes kept from each end of a file too large to return whole.
+_END_READ = (MAX_OUTPUT - 200) // 2
+
 
 @tool(
     name="write_file",
-    description="Write content to a file in the sandbox.",
-    input_schema={"path": str, "content": str},
+    description=(
+        "Write content to a file in the sandbox. Set encoding to base64 to write binary data."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "path": {"type": "string"},
+            "content": {"type": "string"},
+            "encoding": {"type": "string", "enum": ["utf-8", "base64"]},
+        },
+        "required": ["path", "content"],
+    },
 )
+@traced
+@memoized
 async def write_file(args: dict) -> dict:
     path = args["path"]
     content = args["content"]
+    binary = args.get("encoding") == "base64"
     preview = content[:200] + "..." if len(content) > 200 else content
-    _log_tool("write_file", [f"path: {path}"] + preview.splitlines())
+    _log_tool("write_file", [f"path: {path}"] + ([] if binary else [preview]))
+    session = current_session()
     try:
-        result = await sandbox.file.write_file(file=path, content=content)
-        return _ok(f"Wrote {result.data.bytes_written} bytes to {result.data.file}")
+        if (
+            not binary
+            and file_cache.matches(session, path, content)
+            and file_cache.get(session, path, await file_version(path)) is not None
+        ):
+            return _ok(f"{path} already has this content, skipped write")
+        if binary:
+            content = "".join(content.split())
+            base64.b64decode(content, validate=True)
+        file_cache.invalidate(session, path)
+        written = 0
+        with anyio.fail_after(FILE_TIMEOUT):
+            # WRITE_CHUNK_CHARS is a multiple of 4, so base64 chunks decode independently.
+            for start in range(0, max(len(content), 1), WRITE_CHUNK_CHARS):
+                result = await sandbox.file.write_file(
+                    file=path,
+                    content=content[start : start + WRITE_CHUNK_CHARS],
+                    encoding="base64" if binary else "utf-8",
+                    append=start > 0,
+                )
+                written += result.data.bytes_written
+        if not binary:
+            file_cache.put(session, path, content)
+        return _ok(f"Wrote {written} bytes to {result.data.file}")
+    except binascii.Error as e:
+        return _err(f"write_file failed: content is not valid base64 ({e})")
+    except TimeoutError:
+        return _err(f"write_file timed out after {FILE_TIMEOUT}s")
     except Exception as e:
         return _err(f"write_file failed: {e}")
 
 
 @tool(
     name="read_file",
-    description="Read the contents of a file in the sandbox.",
-    input_schema={"path": str},
+    description=(
+        "Read the contents of a file in the sandbox. For large files, pass a byte "
+        "offset and/or length to read just that range. Set encoding to base64 to read "
+        "binary data."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "path": {"type": "string"},
+            "offset": {"type": "integer", "minimum": 0},
+            "length": {"type": "integer", "minimum": 1},
+            "encoding": {"type": "string", "enum": ["utf-8", "base64"]},
+        },
+        "required": ["path"],
+    },
 )
+@traced
+@memoized
 async def read_file(args: dict) -> dict:
     path = args["path"]
+    offset = args.get("offset")
+    length = args.get("length")
+    binary = args.get("encoding") == "base64"
     _log_tool("read_file", [f"path: {path}"])
     try:
-        result = await sandbox.file.read_file(file=path)
-        return _ok(result.data.content)
+        if binary:
+            offset = offset or 0
+            length = min(length or _BASE64_READ, _BASE64_READ)
+            with anyio.fail_after(FILE_TIMEOUT):
+                data, size = await read_range(path, offset, length)
+            header = f"[base64, bytes {offset}-{offset + len(data)} of {size}]"
+            return _ok(f"{header}\n{base64.b64encode(data).decode('ascii')}")
+        if offset is None and length is None:
+            session = current_session()
+            with anyio.fail_after(FILE_TIMEOUT):
+                # Stat before reading: a change after this point shows up as a new version.
+                version = await file_version(path)
+                content = file_cache.get(session, path, version)
+                if content is None and version is not None and version[1] > MAX_OUTPUT:
+                    # Only the ends would survive truncation, so only they are transferred.
+                    head, tail = await read_ends(path, _END_READ)
+                    size = version[1]
+                    return _ok(
+                        f"[bytes 0-{len(head)} and {size - len(tail)}-{size} of {size}; "
+                        "pass offset and length to read the rest]\n"
+                        f"{head.decode('utf-8', errors='replace')}\n...\n"
+                        f"{tail.decode('utf-8', errors='replace')}"
+                    )
+                if content is None:
+                    result = await sandbox.file.read_file(file=path)
+                    content = result.data.content
+                    if version is not None:
+                        file_cache.put(session, path, content, version)
+            return _ok(content)
+        offset = offset or 0
+        with anyio.fail_after(FILE_TIMEOUT):
+            data, size = await read_range(path, offset, min(length or MAX_OUTPUT, MAX_OUTPUT))
+        end = offset + len(data)
+        header = f"[bytes {offset}-{end} of {size}]"
+        return _ok(f"{header}\n{data.decode('utf-8', errors='replace')}")
+    except TimeoutError:
+        return _err(f"read_file timed out after {FILE_TIMEOUT}s")
     except Exception as e:
         return _err(f"read_file failed: {e}")
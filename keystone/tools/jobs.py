@@ -0,0 +1,93 @@
+from claude_agent_sdk import tool
+
+from ..cache import file_cache
+from ..jobs import jobs
+from ..memo import memoized
+from ..sandbox import current_session
+from ..tracing import traced
+from ._helpers import _err, _log_tool, _ok
+
+
+@tool(
+    name="start_job",
+    description=(
+        "Start a long-running shell command (build, server, training run) in the background "
+        "and return its job id immediately. Use job_status/job_output to check on it."
+    ),
+    input_schema={"command": str},
+)
+@traced
+@memoized
+async def start_job(args: dict) -> dict:
+    command = args["command"]
+    _log_tool("start_job", [f"$ {command}"])
+    try:
+        job = await jobs.start(current_session(), command)
+        return _ok(f"Started job {job.job_id}\n{job.describe()}")
+    except Exception as e:
+        return _err(f"start_job failed: {e}")
+    finally:
+        file_cache.invalidate(current_session())
+
+
+@tool(
+    name="job_status",
+    description="Show the status of one background job, or of all jobs when job_id is omitted.",
+    input_schema={
+        "type": "object",
+        "properties": {"job_id": {"type": "string"}},
+    },
+)
+@traced
+@memoized
+async def job_status(args: dict) -> dict:
+    session = current_session()
+    try:
+        if args.get("job_id"):
+            listed = [await jobs.refresh(jobs.get(session, args["job_id"]))]
+        else:
+            listed = await jobs.refresh_all(session)
+        return _ok("\n".join(job.describe() for job in listed) or "No jobs.")
+    except Exception as e:
+        return _err(f"job_status failed: {e}")
+    finally:
+        file_cache.invalidate(session)
+
+
+@tool(
+    name="job_output",
+    description="Return the output a background job produced since the last job_output call.",
+    input_schema={"job_id": str},
+)
+@traced
+@memoized
+async def job_output(args: dict) -> dict:
+    session = current_session()
+    try:
+        job = await jobs.refresh(jobs.get(session, args["job_id"]))
+        raw = job.unread.total
+        output = jobs.take_output(job) or "(no new output)"
+        text = f"{output}\n[{job.describe()}]"
+        return _ok(text, raw_chars=max(raw + len(text) - len(output), len(text)))
+    except Exception as e:
+        return _err(f"job_output failed: {e}")
+    finally:
+        file_cache.invalidate(session)
+
+
+@tool(
+    name="cancel_job",
+    description="Kill a running background job.",
+    input_schema={"job_id": str},
+)
+@traced
+@memoized
+async def cancel_job(args: dict) -> dict:
+    _log_tool("cancel_job", [args["job_id"]])
+    try:
+        job = await jobs.cancel(current_session(), args["job_id"])
+        return _ok(job.describe())
+    except Exception as e:
+        return _err(f"cancel_job failed: {e}")
+    finally:
+        file_cache.invalidate(current_session())
@@ -0,0 +1,38 @@
+from claude_agent_sdk import tool
+
+from ..cache import file_cache
+from ..memo import memoized
+from ..packages import packages
+from ..sandbox import current_session
+from ..tracing import traced
+from ._helpers import _err, _log_tool, _ok
+
+
+@tool(
+    name="install_packages",
+    description=(
+        "Install Python packages in the sandbox with pip, in one batched step. Takes pip "
+        "requirement specifiers such as 'pandas' or 'requests>=2.31'. Wheels are cached on "
+        "the host, so installing the same set again is fast and works offline."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "packages": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        },
+        "required": ["packages"],
+    },
+)
+@traced
+@memoized
+async def install_packages(args: dict) -> dict:
+    requirements = args["packages"]
+    _log_tool("install_packages", requirements)
+    if not requirements:
+        return _err("install_packages needs at least one package")
+    try:
+        return _ok(await packages.install(current_session(), requirements))
+    except Exception as e:
+        return _err(f"install_packages failed: {e}")
+    finally:
+        file_cache.invalidate(current_session())
@@ -1,29 +1,81 @@
+import anyio
 from claude_agent_sdk import tool
 
-from ..sandbox import sandbox
-from ._helpers import _ok, _err, _log_tool
+from ..cache import file_cache
+from ..config import MAX_CALL_OUTPUT, PYTHON_TIMEOUT, STREAM_OUTPUT, TIMEOUT_GRACE
+from ..kernels import kernels
+from ..memo import memoized
+from ..sandbox import current_session
+from ..tracing import traced
+from ._helpers import _ok, _err, _log_stream, _log_tool, _timeout
+
+
+def _render(out) -> str | None:
+    if out.output_type == "stream" and out.text:
+        return out.text
+    if out.output_type in ("execute_result", "display_data") and out.data:
+        return out.data.get("text/plain", str(out.data))
+    if out.output_type == "error":
+        text = f"{out.ename}: {out.evalue}"
+        if out.traceback:
+            text += "\n" + "\n".join(out.traceback)
+        return text
+    return None
 
 
 @tool(
     name="execute_python",
-    description="Execute Python code in a Jupyter kernel inside the sandbox.",
-    input_schema={"code": str},
+    description=(
+        "Execute Python code in a Jupyter kernel inside the sandbox. If the code runs longer "
+        "than `timeout` seconds the kernel is restarted and its in-memory state is lost."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "code": {"type": "string"},
+            "timeout": {"type": "integer", "minimum": 1},
+        },
+        "required": ["code"],
+    },
 )
+@traced
+@memoized
 async def execute_python(args: dict) -> dict:
     code = args["code"]
-    _log_tool("execute_python", code.splitlines())
+    timeout = _timeout(args, PYTHON_TIMEOUT)
+    session = current_session()
+    _log_tool("execute_python", [code])
     try:
-        result = await sandbox.jupyter.execute_code(code=code)
-        parts = []
-        for out in result.data.outputs:
-            if out.output_type == "stream" and out.text:
-                parts.append(out.text)
-            elif out.output_type in ("execute_result", "display_data") and out.data:
-                parts.append(out.data.get("text/plain", str(out.data)))
-            elif out.output_type == "error":
-                parts.append(f"{out.ename}: {out.evalue}")
-                if out.traceback:
-                    parts.append("\n".join(out.traceback))
-        return _ok("\n".join(parts) if parts else "(no output)")
+        try:
+            with anyio.fail_after(timeout + TIMEOUT_GRACE):
+                result = await kernels.execute(session, code, timeout=int(timeout))
+        except (TimeoutError, anyio.get_cancelled_exc_class()):
+            # There is no interrupt endpoint; restarting is the only way to stop the cell.
+            with anyio.CancelScope(shield=True):
+                await kernels.restart(session)
+            raise
+        # Keep everything up to MAX_CALL_OUTPUT so _ok can reduce it before cutting.
+        texts = [text for text in map(_render, result.data.outputs) if text is not None]
+        raw = sum(map(len, texts)) + max(len(texts) - 1, 0)
+        parts: list[str] = []
+        size = 0
+        for text in texts:
+            if size + len(text) > MAX_CALL_OUTPUT:
+                parts.append(text[: MAX_CALL_OUTPUT - size])
+                parts.append(f"[output exceeded {MAX_CALL_OUTPUT} chars, rest discarded]")
+                break
+            parts.append(text)
+            size += len(text) + 1
+            if STREAM_OUTPUT:
+                _log_stream(text)
+        if result.data.status == "timeout":
+            await kernels.restart(session)
+            parts.append(f"[timed out after {timeout:g}s, kernel restarted]")
+        text = "\n".join(parts) if parts else "(no output)"
+        return _ok(text, raw_chars=max(raw, len(text)))
+    except TimeoutError:
+        return _err(f"execute_python timed out after {timeout:g}s, kernel restarted")
     except Exception as e:
         return _err(f"execute_python failed: {e}")
+    finally:
+        file_cache.invalidate(session)
@@ -0,0 +1,35 @@
+from claude_agent_sdk import tool
+
+from ..config import MAX_OUTPUT
+from ..context import context
+from ..sandbox import current_session
+from ..tracing import traced
+from ._helpers import _err, _log_tool, _ok
+
+
+@tool(
+    name="fetch_result",
+    description=(
+        "Read back a stored tool result by its handle (e.g. r3). Large results are stored "
+        "when they are produced; page through them with offset and length in chars."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "handle": {"type": "string"},
+            "offset": {"type": "integer", "minimum": 0},
+            "length": {"type": "integer", "minimum": 1},
+        },
+        "required": ["handle"],
+    },
+)
+@traced
+async def fetch_result(args: dict) -> dict:
+    handle = args["handle"]
+    offset = args.get("offset") or 0
+    length = min(args.get("length") or MAX_OUTPUT, MAX_OUTPUT)
+    _log_tool("fetch_result", [f"{handle} [{offset}:{offset + length}]"])
+    try:
+        return _ok(context.fetch(current_session(), handle, offset, length))
+    except Exception as e:
+        return _err(f"fetch_result failed: {e}")
@@ -0,0 +1,174 @@
+import posixpath
+import re
+from collections import defaultdict
+
+from claude_agent_sdk import tool
+
+from ..config import SEARCH_MAX_CHARS, SEARCH_MAX_MATCHES, SEARCH_PAGE_SIZE, SEARCH_ROOT
+from ..sandbox import current_session, sandbox
+from ..search import search_index
+from ..tracing import traced
+from ._helpers import _err, _log_tool, _ok
+
+_MAX_LINE = 200
+_LINES_PER_FILE = 5
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n}B"
+
+
+def _page(entries: list[str], offset: int, limit: int, noun: str) -> str:
+    """Join one page of entries, stopping early at the output budget."""
+    shown, used = [], 0
+    for entry in entries[offset : offset + limit]:
+        if shown and used + len(entry) > SEARCH_MAX_CHARS:
+            break
+        shown.append(entry)
+        used += len(entry) + 1
+    end = offset + len(shown)
+    footer = f"[{noun} {offset + 1}-{end} of {len(entries)}"
+    footer += f"; next page: offset={end}]" if end < len(entries) else "]"
+    return "\n".join(shown + [footer]) if shown else f"No {noun} found."
+
+
+async def _content_matches(
+    root: str, pattern: str, glob: str | None, ignore_case: bool
+) -> dict[str, list]:
+    # Filter in the endpoint, so the match cap is spent on indexed paths only.
+    filters = {"include": [glob]} if glob else {}
+    result = await sandbox.file.grep_files(
+        path=root,
+        pattern=pattern,
+        exclude=search_index.excludes,
+        **filters,
+        case_insensitive=ignore_case,
+        max_results=SEARCH_MAX_MATCHES,
+        max_file_size="10M",
+    )
+    matches = defaultdict(list)
+    for m in result.data.matches if result.data else []:
+        matches[posixpath.relpath(m.file, root) if m.file.startswith("/") else m.file].append(m)
+    return matches
+
+
+@tool(
+    name="search_files",
+    description=(
+        "Find files in the sandbox in one call. 'glob' filters paths ('*.py', 'src/**/*.ts'); "
+        "'pattern' is a regex searched in file contents. Results are ranked (most matches and "
+        "shallowest paths first), capped in size and paged with offset/limit. Prefer this over "
+        "chaining find/grep in run_shell."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "pattern": {"type": "string"},
+            "glob": {"type": "string"},
+            "path": {"type": "string"},
+            "ignore_case": {"type": "boolean"},
+            "offset": {"type": "integer", "minimum": 0},
+            "limit": {"type": "integer", "minimum": 1},
+        },
+    },
+)
+@traced
+async def search_files(args: dict) -> dict:
+    root = args.get("path") or SEARCH_ROOT
+    pattern, glob = args.get("pattern"), args.get("glob")
+    offset, limit = args.get("offset") or 0, args.get("limit") or SEARCH_PAGE_SIZE
+    _log_tool("search_files", [f"{root}: {pattern or ''} {glob or ''}".rstrip()])
+    if not pattern and not glob:
+        return _err("search_files needs a pattern, a glob, or both")
+    try:
+        index = await search_index.refresh(current_session(), root)
+        paths = index.match(glob)
+        if not pattern:
+            paths.sort(key=lambda p: (p.count("/"), p))
+            entries = [f"{p}  ({_size(index.files[p][0])})" for p in paths]
+            return _ok(_page(entries, offset, limit, "files"))
+
+        re.compile(pattern)
+        wanted = set(paths)
+        matches = {
+            path: found
+            for path, found in (
+                await _content_matches(root, pattern, glob, bool(args.get("ignore_case")))
+            ).items()
+            if path in wanted
+        }
+        ranked = sorted(matches, key=lambda p: (-len(matches[p]), p.count("/"), -index.files[p][1]))
+        entries = []
+        for path in ranked:
+            found = matches[path]
+            lines = [f"{path}  ({len(found)} matches)"]
+            lines += [
+                f"  {m.line_number}: {m.line_content.strip()[:_MAX_LINE]}"
+                for m in found[:_LINES_PER_FILE]
+            ]
+            if len(found) > _LINES_PER_FILE:
+                lines.append(f"  ... {len(found) - _LINES_PER_FILE} more")
+            entries.append("\n".join(lines))
+        return _ok(_page(entries, offset, limit, "files"))
+    except re.error as e:
+        return _err(f"search_files failed: invalid pattern: {e}")
+    except Exception as e:
+        return _err(f"search_files failed: {e}")
+
+
+@tool(
+    name="list_tree",
+    description=(
+        "Show the directory tree under a sandbox path down to 'depth' levels, with file sizes "
+        "and per-directory file counts below that. Optional 'glob' filters files. Paged with "
+        "offset/limit."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "path": {"type": "string"},
+            "depth": {"type": "integer", "minimum": 1},
+            "glob": {"type": "string"},
+            "offset": {"type": "integer", "minimum": 0},
+            "limit": {"type": "integer", "minimum": 1},
+        },
+    },
+)
+@traced
+async def list_tree(args: dict) -> dict:
+    root = args.get("path") or SEARCH_ROOT
+    depth = args.get("depth") or 2
+    offset, limit = args.get("offset") or 0, args.get("limit") or SEARCH_PAGE_SIZE * 4
+    _log_tool("list_tree", [f"{root} (depth {depth})"])
+    try:
+        index = await search_index.refresh(current_session(), root)
+        paths = index.match(args.get("glob"))
+        dirs: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        files = []
+        for path in paths:
+            parts = path.split("/")
+            if len(parts) <= depth:
+                files.append(path)
+            else:
+                summary = dirs["/".join(parts[:depth]) + "/"]
+                summary[0] += 1
+                summary[1] += index.files[path][0]
+            for i in range(1, min(len(parts), depth + 1)):
+                dirs.setdefault("/".join(parts[:i]) + "/", [0, 0])
+        entries = {d: f"{d}  ({n} files, {_size(b)})" if n else d for d, (n, b) in dirs.items()}
+        entries |= {f: f"{f}  ({_size(index.files[f][0])})" for f in files}
+        ordered = [
+            "  " * path.rstrip("/").count("/")
+            + posixpath.basename(path.rstrip("/"))
+            + ("/" if path.endswith("/") else "")
+            + entries[path][len(path) :]
+            for path in sorted(entries)
+        ]
+        header = f"{root}  ({len(paths)} files, {_size(sum(index.files[p][0] for p in paths))})"
+        return _ok(header + "\n" + _page(ordered, offset, limit, "entries"))
+    except Exception as e:
+        return _err(f"list_tree failed: {e}")
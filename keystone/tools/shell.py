@@ -1,21 +1,132 @@
+import uuid
+from contextlib import suppress
+
+import anyio
 from claude_agent_sdk import tool
 
-from ..sandbox import sandbox
-from ._helpers import _ok, _err, _log_tool
+from ..cache import file_cache
+from ..config import (
+    MAX_CALL_OUTPUT,
+    SHELL_TIMEOUT,
+    STREAM_OUTPUT,
+    STREAM_POLL_INTERVAL,
+    TIMEOUT_GRACE,
+)
+from ..memo import memoized
+from ..sandbox import current_session, sandbox
+from ..tracing import traced
+from ._helpers import OutputBuffer, _ok, _err, _log_stream, _log_tool, _timeout
+
+
+async def _kill(shell_id: str) -> None:
+    with anyio.CancelScope(shield=True), suppress(Exception):
+        await sandbox.shell.kill_process(id=shell_id)
+
+
+async def _stream_command(command: str, timeout: float) -> tuple[str, int | None, str, int]:
+    """Poll a detached command, echoing new output until it ends or hits a limit.
+
+    Returns the kept output, exit code, status and the size of all output seen.
+
+    ``shell.view`` has no offset, so every poll transfers all output so far:
+    the cost grows quadratically with output size. MAX_CALL_OUTPUT bounds it,
+    since the command is killed once its output passes the limit.
+    """
+    result = await sandbox.shell.exec_command(
+        command=command, async_mode=True, hard_timeout=timeout
+    )
+    # Bounded at MAX_CALL_OUTPUT only; run_shell's _ok reduces the text before cutting it.
+    buffer = OutputBuffer(limit=MAX_CALL_OUTPUT)
+    if result.data.status != "running":
+        buffer.write(result.data.output or "")
+        _log_stream(result.data.output or "")
+        return buffer.getvalue(), result.data.exit_code, result.data.status, buffer.total
+
+    shell_id = result.data.session_id
+    seen = 0
+    try:
+        with anyio.fail_after(timeout + TIMEOUT_GRACE):
+            while True:
+                view = (await sandbox.shell.view(id=shell_id)).data
+                output = view.output or ""
+                chunk = output[seen:]
+                seen = max(seen, len(output))
+                if chunk:
+                    buffer.write(chunk)
+                    _log_stream(chunk)
+                if view.status != "running":
+                    return buffer.getvalue(), view.exit_code, view.status, buffer.total
+                if buffer.total > MAX_CALL_OUTPUT:
+                    await _kill(shell_id)
+                    return buffer.getvalue(), None, "output_limit", buffer.total
+                await anyio.sleep(STREAM_POLL_INTERVAL)
+    except TimeoutError:
+        await _kill(shell_id)
+        return buffer.getvalue(), None, "hard_timeout", buffer.total
+    except anyio.get_cancelled_exc_class():
+        await _kill(shell_id)
+        raise
+
+
+async def _run_command(command: str, timeout: float) -> tuple[str, int | None, str, int]:
+    """Run a command to completion, killing it if the call times out or is cancelled."""
+    # A named shell gives the kill handlers something to target.
+    shell_id = f"run-{uuid.uuid4().hex}"
+    try:
+        with anyio.fail_after(timeout + TIMEOUT_GRACE):
+            result = await sandbox.shell.exec_command(
+                command=command, id=shell_id, hard_timeout=timeout
+            )
+    except (TimeoutError, anyio.get_cancelled_exc_class()):
+        await _kill(shell_id)
+        raise
+    output = result.data.output or ""
+    if len(output) > MAX_CALL_OUTPUT:
+        return output[:MAX_CALL_OUTPUT], result.data.exit_code, "output_truncated", len(output)
+    return output, result.data.exit_code, result.data.status, len(output)
+
+
+def _footer(exit_code: int | None, status: str | None, timeout: float) -> str:
+    if status == "hard_timeout":
+        return f"[timed out after {timeout:g}s, process killed]"
+    if status == "output_limit":
+        return f"[output exceeded {MAX_CALL_OUTPUT} chars, process killed]"
+    if status == "output_truncated":
+        return f"[exit code: {exit_code}; output exceeded {MAX_CALL_OUTPUT} chars, rest discarded]"
+    return f"[exit code: {exit_code}]"
 
 
 @tool(
     name="run_shell",
-    description="Run a shell command inside the sandbox and return its output.",
-    input_schema={"command": str},
+    description=(
+        "Run a shell command inside the sandbox and return its output. The command is "
+        "killed after `timeout` seconds; use start_job for anything longer-running."
+    ),
+    input_schema={
+        "type": "object",
+        "properties": {
+            "command": {"type": "string"},
+            "timeout": {"type": "integer", "minimum": 1},
+        },
+        "required": ["command"],
+    },
 )
+@traced
+@memoized
 async def run_shell(args: dict) -> dict:
     command = args["command"]
+    timeout = _timeout(args, SHELL_TIMEOUT)
     _log_tool("run_shell", [f"$ {command}"])
     try:
-        result = await sandbox.shell.exec_command(command=command)
-        output = result.data.output or ""
-        exit_code = result.data.exit_code
-        return _ok(f"{output}\n[exit code: {exit_code}]")
+        if STREAM_OUTPUT:
+            output, exit_code, status, raw = await _stream_command(command, timeout)
+        else:
+            output, exit_code, status, raw = await _run_command(command, timeout)
+        text = f"{output}\n{_footer(exit_code, status, timeout)}"
+        return _ok(text, raw_chars=len(text) - len(output) + raw)
+    except TimeoutError:
+        return _err(f"run_shell timed out after {timeout:g}s")
     except Exception as e:
         return _err(f"run_shell failed: {e}")
+    finally:
+        file_cache.invalidate(current_session())
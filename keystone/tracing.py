@@ -0,0 +1,186 @@
+import contextvars
+import functools
+import json
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+from .config import TRACE_FILE
+from .sandbox import current_session
+
+
+@dataclass
+class Span:
+    tool: str
+    session: str | None
+    ts: float
+    bytes_in: int
+    duration: float = 0.0
+    format_time: float = 0.0
+    bytes_out: int = 0
+    raw_chars: int = 0
+    is_error: bool = False
+    error: str | None = None
+
+    @property
+    def sandbox_time(self) -> float:
+        return max(self.duration - self.format_time, 0.0)
+
+    @property
+    def truncation_ratio(self) -> float:
+        if not self.raw_chars:
+            return 1.0
+        return min(self.bytes_out / self.raw_chars, 1.0)
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {
+            "type": "tool",
+            "sandbox_time": self.sandbox_time,
+            "truncation_ratio": self.truncation_ratio,
+        }
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+@dataclass
+class SessionStats:
+    tools: dict[str, ToolStats] = field(default_factory=lambda: defaultdict(ToolStats))
+    turns: int = 0
+    turn_time: float = 0.0
+    model_time: float = 0.0
+
+
+class Exporter(Protocol):
+    def export(self, record: dict) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class NullExporter:
+    def export(self, record: dict) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlExporter:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file = None
+
+    def export(self, record: dict) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", buffering=1)
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Tracer:
+    def __init__(self, exporter: Exporter) -> None:
+        self.exporter = exporter
+        self.sessions: dict[str | None, SessionStats] = defaultdict(SessionStats)
+
+    def set_exporter(self, exporter: Exporter) -> None:
+        self.exporter.close()
+        self.exporter = exporter
+
+    def record(self, span: Span) -> None:
+        stats = self.sessions[span.session].tools[span.tool]
+        stats.calls += 1
+        stats.errors += span.is_error
+        stats.total_time += span.duration
+        stats.max_time = max(stats.max_time, span.duration)
+        stats.bytes_in += span.bytes_in
+        stats.bytes_out += span.bytes_out
+        self.exporter.export(span.to_dict())
+
+    def record_turn(self, session: str | None, duration_ms: int, api_ms: int) -> None:
+        stats = self.sessions[session]
+        stats.turns += 1
+        stats.turn_time += duration_ms / 1000
+        stats.model_time += api_ms / 1000
+        self.exporter.export(
+            {
+                "type": "turn",
+                "session": session,
+                "ts": time.time(),
+                "duration": duration_ms / 1000,
+                "model_time": api_ms / 1000,
+            }
+        )
+
+    def summary(self, session: str | None) -> dict:
+        stats = self.sessions.get(session)
+        if stats is None:
+            return {}
+        return {
+            "turns": stats.turns,
+            "turn_time": stats.turn_time,
+            "model_time": stats.model_time,
+            "tools": {name: asdict(s) for name, s in stats.tools.items()},
+        }
+
+    def end_session(self, session: str | None) -> None:
+        if session in self.sessions:
+            self.exporter.export({"type": "session", "session": session} | self.summary(session))
+            del self.sessions[session]
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "keystone_span", default=None
+)
+
+
+def record_output(raw_chars: int, format_time: float) -> None:
+    span = _current_span.get()
+    if span is not None:
+        span.raw_chars += raw_chars
+        span.format_time += format_time
+
+
+def traced(handler):
+    @functools.wraps(handler)
+    async def wrapper(args: dict) -> dict:
+        span = Span(
+            tool=handler.__name__,
+            session=current_session(),
+            ts=time.time(),
+            bytes_in=len(json.dumps(args, default=str)),
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            result = await handler(args)
+        except Exception as e:
+            span.is_error = True
+            span.error = str(e)
+            raise
+        else:
+            span.is_error = bool(result.get("is_error"))
+            span.bytes_out = sum(len(c.get("text", "")) for c in result.get("content", []))
+            return result
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            tracer.record(span)
+
+    return wrapper
+
+
+tracer = Tracer(JsonlExporter(TRACE_FILE))
@@ -0,0 +1,292 @@
+import base64
+import mmap
+import os
+import shlex
+import tarfile
+import tempfile
+import uuid
+import zlib
+from contextlib import aclosing
+from pathlib import Path
+from typing import BinaryIO
+
+import anyio
+
+from .cache import Version, file_cache
+from .config import TRANSFER_CHUNK_SIZE, TRANSFER_COMPRESSION
+from .sandbox import current_session, sandbox
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Sandbox-side program and tar flag for each supported wire compression.
+_CODECS = {"gzip": ("gzip", "-z"), "zstd": ("zstd", "-I zstd")}
+
+
+def _check_codec(codec: str) -> None:
+    if codec not in _CODECS:
+        raise ValueError(f"unknown compression {codec!r}, expected one of {sorted(_CODECS)}")
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' package")
+
+
+def _compressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+class _CompressingWriter:
+    def __init__(self, raw: BinaryIO, codec: str) -> None:
+        self.raw = raw
+        self._compressor = _compressor(codec)
+
+    def write(self, data: bytes) -> int:
+        self.raw.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self) -> None:
+        self.raw.write(self._compressor.flush())
+
+
+# Compression and tar packing are CPU- and disk-bound, so the async transfer
+# functions run these helpers in a worker thread to keep the event loop free.
+def _compress_file(src: BinaryIO, packed: BinaryIO, codec: str, chunk_size: int) -> None:
+    writer = _CompressingWriter(packed, codec)
+    while block := src.read(chunk_size):
+        writer.write(block)
+    writer.close()
+    packed.flush()
+
+
+def _pack_dir(
+    packed: BinaryIO, local_dir: str | Path, compress: str | None, paths: list[str] | None
+) -> None:
+    out = _CompressingWriter(packed, compress) if compress else packed
+    with tarfile.open(fileobj=out, mode="w|") as tar:
+        if paths is None:
+            tar.add(local_dir, arcname=".")
+        for path in paths or []:
+            tar.add(Path(local_dir, path), arcname=path, recursive=False)
+    if compress:
+        out.close()
+    packed.flush()
+
+
+def _unpack_dir(archive: BinaryIO, local_dir: str | Path) -> None:
+    archive.seek(0)
+    Path(local_dir).mkdir(parents=True, exist_ok=True)
+    with tarfile.open(fileobj=archive, mode="r:") as tar:
+        tar.extractall(local_dir, filter="data")
+
+
+def _remote_tmp(suffix: str = "") -> str:
+    return f"/tmp/keystone-{uuid.uuid4().hex}{suffix}"
+
+
+async def _run(command: str) -> None:
+    result = await sandbox.shell.exec_command(command=command)
+    if result.data.exit_code not in (0, None):
+        raise OSError(result.data.output or f"sandbox command failed: {command}")
+
+
+async def read_range(remote_path: str, offset: int, length: int) -> tuple[bytes, int]:
+    """Read ``length`` bytes at ``offset`` without moving the rest of the file.
+
+    The slice is cut inside the sandbox, so only the requested bytes cross the
+    wire. Returns the bytes and the total file size.
+    """
+    path = shlex.quote(remote_path)
+    command = f"stat -c %s {path} && tail -c +{offset + 1} {path} | head -c {length} | base64 -w0"
+    result = await sandbox.shell.exec_command(command=command)
+    size_line, _, encoded = (result.data.output or "").strip().partition("\n")
+    if result.data.exit_code not in (0, None) or not size_line.isdigit():
+        raise OSError(result.data.output or f"cannot read {remote_path}")
+    return base64.b64decode(encoded.strip()), int(size_line)
+
+
+async def read_ends(remote_path: str, count: int) -> tuple[bytes, bytes]:
+    """Read the first and last ``count`` bytes of a file in one sandbox call."""
+    path = shlex.quote(remote_path)
+    command = f"head -c {count} {path} | base64 -w0 && echo && tail -c {count} {path} | base64 -w0"
+    result = await sandbox.shell.exec_command(command=command)
+    if result.data.exit_code not in (0, None):
+        raise OSError(result.data.output or f"cannot read {remote_path}")
+    head, _, tail = (result.data.output or "").strip().partition("\n")
+    return base64.b64decode(head), base64.b64decode(tail.strip())
+
+
+async def file_version(remote_path: str) -> Version | None:
+    """Modification time and size of a file, or None if it cannot be stat'ed.
+
+    Cached contents are only served while this is unchanged, so writes made
+    outside our tools (other sessions, background jobs) are never masked.
+    """
+    command = f"stat -c '%y %s' {shlex.quote(remote_path)}"
+    result = await sandbox.shell.exec_command(command=command)
+    mtime, _, size = (result.data.output or "").strip().rpartition(" ")
+    if result.data.exit_code not in (0, None) or not mtime or not size.isdigit():
+        return None
+    return mtime, int(size)
+
+
+async def _upload_fileobj(f: BinaryIO, remote_path: str, chunk_size: int) -> int:
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        await sandbox.file.write_file(file=remote_path, content="", encoding="base64")
+        return 0
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, size, chunk_size):
+            chunk = base64.b64encode(mm[start : start + chunk_size]).decode("ascii")
+            await sandbox.file.write_file(
+                file=remote_path, content=chunk, encoding="base64", append=start > 0
+            )
+    return size
+
+
+async def upload(
+    local_path: str | Path,
+    remote_path: str,
+    chunk_size: int = TRANSFER_CHUNK_SIZE,
+    compress: str | None = None,
+) -> int:
+    """Copy a host file into the sandbox in appended chunks, memory-mapping the source.
+
+    With ``compress`` ("gzip" or "zstd") the file is compressed on the host and
+    unpacked by the sandbox, so only the compressed bytes cross the wire.
+    """
+    file_cache.invalidate(current_session(), remote_path)
+    if compress is None:
+        with open(local_path, "rb") as f:
+            return await _upload_fileobj(f, remote_path, chunk_size)
+
+    _check_codec(compress)
+    program, _ = _CODECS[compress]
+    with open(local_path, "rb") as src, tempfile.TemporaryFile() as packed:
+        await anyio.to_thread.run_sync(_compress_file, src, packed, compress, chunk_size)
+        tmp = _remote_tmp()
+        await _upload_fileobj(packed, tmp, chunk_size)
+        remote, tmp = shlex.quote(remote_path), shlex.quote(tmp)
+        await _run(f"{program} -dc {tmp} > {remote}; rc=$?; rm -f {tmp}; exit $rc")
+        return os.fstat(src.fileno()).st_size
+
+
+async def _download_to(
+    remote_path: str, f: BinaryIO, chunk_size: int, codec: str | None = None
+) -> int:
+    decompressor = _decompressor(codec) if codec else None
+    written = 0
+    stream = sandbox.file.download_file(
+        path=remote_path, request_options={"chunk_size": chunk_size}
+    )
+    async with aclosing(stream):
+        async for chunk in stream:
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            f.write(chunk)
+            written += len(chunk)
+    if decompressor is not None:
+        tail = decompressor.flush()
+        f.write(tail)
+        written += len(tail)
+    return written
+
+
+async def download(
+    remote_path: str,
+    local_path: str | Path,
+    chunk_size: int = TRANSFER_CHUNK_SIZE,
+    compress: str | None = None,
+) -> int:
+    """Stream a sandbox file to the host without holding it in memory.
+
+    With ``compress`` the sandbox compresses the file first and the host
+    decompresses it while streaming. Returns the number of bytes written locally.
+    """
+    if compress is None:
+        with open(local_path, "wb") as f:
+            return await _download_to(remote_path, f, chunk_size)
+
+    _check_codec(compress)
+    program, _ = _CODECS[compress]
+    tmp = _remote_tmp()
+    await _run(f"{program} -c {shlex.quote(remote_path)} > {shlex.quote(tmp)}")
+    try:
+        with open(local_path, "wb") as f:
+            return await _download_to(tmp, f, chunk_size, compress)
+    finally:
+        await _run(f"rm -f {shlex.quote(tmp)}")
+
+
+def _tar_flag(compress: str | None) -> str:
+    if compress is None:
+        return ""
+    _check_codec(compress)
+    return _CODECS[compress][1] + " "
+
+
+async def upload_dir(
+    local_dir: str | Path,
+    remote_dir: str,
+    chunk_size: int = TRANSFER_CHUNK_SIZE,
+    compress: str | None = TRANSFER_COMPRESSION,
+    paths: list[str] | None = None,
+) -> int:
+    """Upload a host directory as one tar archive and unpack it in the sandbox.
+
+    ``paths`` limits the archive to those files, relative to ``local_dir``.
+    Returns the archive size, i.e. the bytes that crossed the wire.
+    """
+    flag = _tar_flag(compress)
+    with tempfile.TemporaryFile() as packed:
+        await anyio.to_thread.run_sync(_pack_dir, packed, local_dir, compress, paths)
+        tmp = _remote_tmp(".tar")
+        size = await _upload_fileobj(packed, tmp, chunk_size)
+    remote, tmp = shlex.quote(remote_dir), shlex.quote(tmp)
+    try:
+        await _run(
+            f"mkdir -p {remote} && tar {flag}-xf {tmp} -C {remote}; rc=$?; rm -f {tmp}; exit $rc"
+        )
+    finally:
+        file_cache.invalidate(current_session())
+    return size
+
+
+async def download_dir(
+    remote_dir: str,
+    local_dir: str | Path,
+    chunk_size: int = TRANSFER_CHUNK_SIZE,
+    compress: str | None = TRANSFER_COMPRESSION,
+    paths: list[str] | None = None,
+) -> int:
+    """Pack a sandbox directory into a tar archive and unpack it on the host.
+
+    ``paths`` limits the archive to those files, relative to ``remote_dir``.
+    Members that would land outside ``local_dir`` are rejected. Returns the
+    size of the uncompressed archive.
+    """
+    flag = _tar_flag(compress)
+    tmp = _remote_tmp(".tar")
+    members = "."
+    if paths is not None:
+        members = f"--verbatim-files-from -T {shlex.quote(tmp)}.list"
+        await sandbox.file.write_file(file=f"{tmp}.list", content="".join(f"{p}\n" for p in paths))
+    await _run(
+        f"tar {flag}-cf {shlex.quote(tmp)} -C {shlex.quote(remote_dir)} {members}; "
+        f"rc=$?; rm -f {shlex.quote(tmp)}.list; exit $rc"
+    )
+    try:
+        with tempfile.TemporaryFile() as archive:
+            size = await _download_to(tmp, archive, chunk_size, compress)
+            await anyio.to_thread.run_sync(_unpack_dir, archive, local_dir)
+    finally:
+        await _run(f"rm -f {shlex.quote(tmp)}")
+    return size
@@ -0,0 +1,190 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
+
+import anyio
+import httpx
+
+from .config import (
+    MAX_TOOL_TIMEOUT,
+    SANDBOX_BREAKER_RESET,
+    SANDBOX_BREAKER_THRESHOLD,
+    SANDBOX_CONNECT_TIMEOUT,
+    SANDBOX_HTTP2,
+    SANDBOX_KEEPALIVE_EXPIRY,
+    SANDBOX_MAX_CONNECTIONS,
+    SANDBOX_MAX_KEEPALIVE,
+    SANDBOX_RETRIES,
+    SANDBOX_RETRY_BACKOFF,
+    SANDBOX_RETRY_MAX_BACKOFF,
+    TIMEOUT_GRACE,
+)
+
+if TYPE_CHECKING:
+    from agent_sandbox import AsyncSandbox
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+_IDEMPOTENT = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Errors raised before the request reached the sandbox, so any method is safe to resend.
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# The sandbox refused the request outright; anything else might have run.
+_REFUSED = {429, 503}
+_RETRYABLE = {502, 504}
+
+
+class CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class CircuitBreaker:
+    """Fails fast once an endpoint keeps failing, then lets one probe through.
+
+    After ``threshold`` consecutive failures the circuit opens and requests are
+    rejected without touching the network. ``reset_after`` seconds later a
+    single trial request is allowed; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self, threshold: int = SANDBOX_BREAKER_THRESHOLD, reset_after: float = SANDBOX_BREAKER_RESET
+    ) -> None:
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def abandon_trial(self) -> None:
+        """Let another request probe after the trial ended with no outcome (e.g. cancelled)."""
+        self._trial = False
+
+
+def _backoff(attempt: int, response: httpx.Response | None = None) -> float:
+    if response is not None and "retry-after" in response.headers:
+        value = response.headers["retry-after"]
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = 0.0
+        return min(max(delay, 0.0), SANDBOX_RETRY_MAX_BACKOFF)
+    ceiling = min(SANDBOX_RETRY_BACKOFF * 2**attempt, SANDBOX_RETRY_MAX_BACKOFF)
+    return random.uniform(0, ceiling)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Retries transient failures with jittered backoff behind a circuit breaker.
+
+    Sandbox calls are mostly POSTs that run code, so a request is only resent
+    when it can't have executed (connect errors, 429/503) or when the method
+    is idempotent.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        retries: int = SANDBOX_RETRIES,
+        breaker: CircuitBreaker | None = None,
+        connect_timeout: float = SANDBOX_CONNECT_TIMEOUT,
+    ) -> None:
+        self.transport = transport
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self.connect_timeout = connect_timeout
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # The SDK passes one float for every timeout phase; keep connects short
+        # so a dead endpoint fails fast instead of waiting out a tool deadline.
+        timeout = dict(request.extensions.get("timeout", {}))
+        timeout["connect"] = min(
+            timeout.get("connect") or self.connect_timeout, self.connect_timeout
+        )
+        request.extensions["timeout"] = timeout
+
+        idempotent = request.method in _IDEMPOTENT
+        attempt = 0
+        while True:
+            trial = self.breaker.state == "half_open"
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"circuit open for {request.url.host}", request=request)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                if attempt >= self.retries or not (isinstance(e, _NOT_SENT) or idempotent):
+                    raise
+                await anyio.sleep(_backoff(attempt))
+            except BaseException:
+                if trial:
+                    self.breaker.abandon_trial()
+                raise
+            else:
+                status = response.status_code
+                if status < 500 and status != 429:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                retryable = status in _REFUSED or (status in _RETRYABLE and idempotent)
+                if attempt >= self.retries or not retryable:
+                    return response
+                await response.aclose()
+                await anyio.sleep(_backoff(attempt, response))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def make_client(url: str, breaker: CircuitBreaker | None = None) -> "AsyncSandbox":
+    from agent_sandbox import AsyncSandbox
+
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=SANDBOX_MAX_CONNECTIONS,
+            max_keepalive_connections=SANDBOX_MAX_KEEPALIVE,
+            keepalive_expiry=SANDBOX_KEEPALIVE_EXPIRY,
+        ),
+        http2=SANDBOX_HTTP2 and HTTP2_AVAILABLE,
+    )
+    http = httpx.AsyncClient(
+        transport=RetryTransport(transport, breaker=breaker),
+        timeout=httpx.Timeout(MAX_TOOL_TIMEOUT + TIMEOUT_GRACE, connect=SANDBOX_CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
+    return AsyncSandbox(base_url=url, httpx_client=http)
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shlex
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import anyio
+
+from .config import WORKSPACE_EXCLUDES, WORKSPACE_INTERVAL, WORKSPACE_STATE_DIR
+from .sandbox import sandbox
+from .transfer import download_dir, upload_dir
+
+
+@dataclass
+class FileState:
+    size: int
+    mtime: int
+    digest: str
+
+
+@dataclass
+class SyncState:
+    local: dict[str, FileState] = field(default_factory=dict)
+    # Sandbox files as (size, mtime) strings from `find -printf`, as of the last sync.
+    remote: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class SyncResult:
+    sent: list[str] = field(default_factory=list)
+    received: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    bytes: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.sent or self.received or self.deleted)
+
+    def describe(self) -> str:
+        parts = []
+        if self.sent:
+            parts.append(f"sent {len(self.sent)} files")
+        if self.received:
+            parts.append(f"received {len(self.received)} files")
+        if self.deleted:
+            parts.append(f"deleted {len(self.deleted)}")
+        return ", ".join(parts) + f" ({self.bytes} bytes)" if parts else "up to date"
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class WorkspaceSync:
+    """Mirrors a host directory into the sandbox and back, moving only changes.
+
+    A manifest of the last synced state is kept on the host: size, mtime and
+    hash for host files, and size and mtime for sandbox files. Host files whose
+    size and mtime are unchanged are not re-hashed, and the sandbox side is one
+    ``find`` listing, so checking for changes costs little even on a large tree.
+    Changed files go over in a single compressed tar. When both sides changed a
+    file, ``push`` keeps the host copy and ``pull`` the sandbox copy.
+    """
+
+    def __init__(
+        self,
+        local_dir: str | Path,
+        remote_dir: str,
+        excludes: list[str] = WORKSPACE_EXCLUDES,
+        state_dir: str | Path = WORKSPACE_STATE_DIR,
+    ) -> None:
+        self.local_dir = Path(local_dir).resolve()
+        self.remote_dir = remote_dir.rstrip("/") or "/"
+        self.excludes = set(excludes)
+        key = hashlib.sha256(f"{self.local_dir}\n{self.remote_dir}".encode()).hexdigest()[:16]
+        self.state_path = Path(state_dir) / f"{key}.json"
+        self.state = self._load()
+        self._lock = anyio.Lock()
+
+    def _load(self) -> SyncState:
+        if not self.state_path.exists():
+            return SyncState()
+        data = json.loads(self.state_path.read_text())
+        return SyncState(
+            {path: FileState(**entry) for path, entry in data["local"].items()}, data["remote"]
+        )
+
+    def _save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(self.state)))
+        tmp.replace(self.state_path)
+
+    def scan_local(self) -> dict[str, FileState]:
+        files = {}
+        for root, dirs, names in os.walk(self.local_dir):
+            dirs[:] = [d for d in dirs if d not in self.excludes]
+            for name in names:
+                if name in self.excludes:
+                    continue
+                path = Path(root, name)
+                if not path.is_file() or path.is_symlink():
+                    continue
+                rel = path.relative_to(self.local_dir).as_posix()
+                stat = path.stat()
+                known = self.state.local.get(rel)
+                if known and (known.size, known.mtime) == (stat.st_size, stat.st_mtime_ns):
+                    files[rel] = known
+                else:
+                    files[rel] = FileState(stat.st_size, stat.st_mtime_ns, _digest(path))
+        return files
+
+    async def _run(self, command: str) -> str:
+        result = await sandbox.shell.exec_command(command=command)
+        if result.data.exit_code not in (0, None):
+            raise OSError(result.data.output or f"sandbox command failed: {command}")
+        return result.data.output or ""
+
+    async def scan_remote(self) -> dict[str, str]:
+        prune = " -o ".join(f"-name {shlex.quote(name)}" for name in sorted(self.excludes))
+        prune = f"\\( {prune} \\) -prune -o " if prune else ""
+        remote = shlex.quote(self.remote_dir)
+        output = await self._run(
+            f"mkdir -p {remote} && cd {remote} && find . {prune}-type f -printf '%P\\t%s %T@\\n'"
+        )
+        files = {}
+        for line in output.splitlines():
+            path, sep, stamp = line.rpartition("\t")
+            if sep:
+                files[path] = stamp
+        if self.state.remote and not self.state.remote.keys() & files.keys():
+            # Nothing we synced is there any more: a fresh sandbox, not a mass deletion.
+            self.state.remote = {}
+        return files
+
+    def _changed_locally(self, local: dict[str, FileState]) -> set[str]:
+        return {
+            path
+            for path, entry in local.items()
+            if path not in self.state.local or self.state.local[path].digest != entry.digest
+        }
+
+    def _changed_remotely(self, remote: dict[str, str]) -> set[str]:
+        return {path for path, stamp in remote.items() if self.state.remote.get(path) != stamp}
+
+    async def push(self) -> SyncResult:
+        """Send host changes to the sandbox; the host copy wins on conflicts."""
+        async with self._lock:
+            return await self._push()
+
+    async def pull(self) -> SyncResult:
+        """Bring sandbox changes to the host; the sandbox copy wins on conflicts."""
+        async with self._lock:
+            return await self._pull()
+
+    async def _push(self) -> SyncResult:
+        local = await anyio.to_thread.run_sync(self.scan_local)
+        remote = await self.scan_remote()
+        # Files the sandbox never had are sent too; ones it deleted are left for pull.
+        missing = {p for p in local if p not in remote and p not in self.state.remote}
+        send = sorted(self._changed_locally(local) | missing)
+        delete = sorted(p for p in self.state.local if p not in local and p in remote)
+        result = SyncResult(sent=send, deleted=delete)
+        if send:
+            result.bytes = await upload_dir(self.local_dir, self.remote_dir, paths=send)
+        if delete:
+            targets = " ".join(shlex.quote(p) for p in delete)
+            await self._run(f"cd {shlex.quote(self.remote_dir)} && rm -f -- {targets}")
+        # Only what was sent is in sync now; other sandbox changes are left for pull.
+        stamps = {p: s for p, s in self.state.remote.items() if p not in delete}
+        if send:
+            after = await self.scan_remote()
+            stamps.update({p: after[p] for p in send if p in after})
+        self.state = SyncState(local, stamps)
+        self._save()
+        return result
+
+    async def _pull(self) -> SyncResult:
+        local = await anyio.to_thread.run_sync(self.scan_local)
+        remote = await self.scan_remote()
+        # Files the host never had are fetched too; ones it deleted are left for push.
+        missing = {p for p in remote if p not in local and p not in self.state.local}
+        fetch = sorted(self._changed_remotely(remote) | missing)
+        delete = sorted(p for p in self.state.remote if p not in remote and p in local)
+        result = SyncResult(received=fetch, deleted=delete)
+        if fetch:
+            result.bytes = await download_dir(self.remote_dir, self.local_dir, paths=fetch)
+        for path in delete:
+            (self.local_dir / path).unlink(missing_ok=True)
+        # Host changes and deletions that weren't overwritten keep their old entry, so push
+        # still sees them.
+        entries = {p: e for p, e in self.state.local.items() if p in remote}
+        if fetch:
+            after = await anyio.to_thread.run_sync(self.scan_local)
+            entries.update({p: after[p] for p in fetch if p in after})
+        self.state = SyncState(entries, remote)
+        self._save()
+        return result
+
+    async def sync(self) -> SyncResult:
+        """Push host changes, then pull sandbox changes."""
+        pushed = await self.push()
+        pulled = await self.pull()
+        return SyncResult(
+            pushed.sent,
+            pulled.received,
+            pushed.deleted + pulled.deleted,
+            pushed.bytes + pulled.bytes,
+        )
+
+    async def watch(self, interval: float = WORKSPACE_INTERVAL, on_change=None, on_error=None):
+        """Sync both ways every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                result = await self.sync()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            else:
+                if result and on_change is not None:
+                    on_change(result)
+            await anyio.sleep(interval)
@@ -1,5 +1,3 @@
-import anyio
+from keystone.cli import main
 
-from keystone.cli import repl
-
-anyio.run(repl)
+main()
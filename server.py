@@ -0,0 +1,5 @@
+import anyio
+
+from keystone.server import serve
+
+anyio.run(serve)
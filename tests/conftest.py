@@ -1,18 +1,71 @@
+import base64
+import subprocess
 from unittest.mock import AsyncMock, MagicMock
 from types import SimpleNamespace
 
 import pytest
 
+from keystone.cache import file_cache
+from keystone.jobs import jobs
+from keystone.kernels import kernels
+from keystone.tracing import NullExporter, tracer
+
+
+@pytest.fixture(autouse=True)
+def _no_trace_export(monkeypatch):
+    monkeypatch.setattr(tracer, "exporter", NullExporter())
+
 
 @pytest.fixture
 def mock_sandbox(monkeypatch):
     sb = AsyncMock()
-    monkeypatch.setattr("keystone.tools.python.sandbox", sb)
     monkeypatch.setattr("keystone.tools.shell.sandbox", sb)
     monkeypatch.setattr("keystone.tools.files.sandbox", sb)
+    monkeypatch.setattr("keystone.transfer.sandbox", sb)
+    monkeypatch.setattr("keystone.kernels.sandbox", sb)
+    monkeypatch.setattr("keystone.jobs.sandbox", sb)
+    monkeypatch.setattr("keystone.snapshot.sandbox", sb)
+    monkeypatch.setattr("keystone.packages.sandbox", sb)
+    monkeypatch.setattr("keystone.workspace.sandbox", sb)
+    monkeypatch.setattr("keystone.search.sandbox", sb)
+    monkeypatch.setattr("keystone.tools.search.sandbox", sb)
+    monkeypatch.setattr(kernels, "_kernels", {})
+    monkeypatch.setattr(jobs, "_jobs", {})
+    # A command that prints nothing, e.g. a failed stat, unless a test says otherwise.
+    sb.shell.exec_command.return_value = SimpleNamespace(
+        data=SimpleNamespace(output="", exit_code=1, status="completed")
+    )
+    file_cache.clear()
     return sb
 
 
+@pytest.fixture
+def local_sandbox(mock_sandbox):
+    """Backs the mocked sandbox with the local filesystem and a real shell."""
+
+    async def exec_command(command, **kwargs):
+        proc = subprocess.run(["sh", "-c", command], capture_output=True, text=True)
+        return SimpleNamespace(
+            data=SimpleNamespace(output=proc.stdout + proc.stderr, exit_code=proc.returncode)
+        )
+
+    async def write_file(file, content, encoding="utf-8", append=False):
+        data = base64.b64decode(content) if encoding == "base64" else content.encode()
+        with open(file, "ab" if append else "wb") as f:
+            f.write(data)
+        return SimpleNamespace(data=SimpleNamespace(file=file, bytes_written=len(data)))
+
+    async def download_file(path, request_options=None):
+        with open(path, "rb") as f:
+            while chunk := f.read(7):
+                yield chunk
+
+    mock_sandbox.shell.exec_command.side_effect = exec_command
+    mock_sandbox.file.write_file.side_effect = write_file
+    mock_sandbox.file.download_file = download_file
+    return mock_sandbox
+
+
 def _make_stream(text):
     return SimpleNamespace(output_type="stream", text=text)
 
@@ -46,8 +99,10 @@ def jupyter_output_factory():
 
 @pytest.fixture
 def shell_result_factory():
-    def _make(output="", exit_code=0):
-        return SimpleNamespace(data=SimpleNamespace(output=output, exit_code=exit_code))
+    def _make(output="", exit_code=0, status="completed"):
+        return SimpleNamespace(
+            data=SimpleNamespace(output=output, exit_code=exit_code, status=status)
+        )
     return _make
 
 
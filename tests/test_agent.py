@@ -58,3 +58,81 @@ class TestContextManager:
 
         await agent.__aexit__(None, None, None)
         mock_client.__aexit__.assert_awaited_once()
+
+
+class TestSessionAffinity:
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    async def test_pins_and_releases_endpoint(self, mock_create_server, mock_client_cls):
+        from keystone.sandbox import current_session, pool
+
+        mock_client_cls.return_value = AsyncMock()
+        agent = KeystoneAgent(session_id="sess-1")
+        endpoint = pool.acquire("sess-1")
+        assert "sess-1" in endpoint.sessions
+
+        async with agent:
+            assert current_session() == "sess-1"
+        assert "sess-1" not in endpoint.sessions
+
+
+class TestWarmup:
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    async def test_runs_all_phases(self, mock_create_server, mock_client_cls, monkeypatch):
+        mock_client = AsyncMock()
+        mock_client_cls.return_value = mock_client
+        mock_sb = AsyncMock()
+        mock_sb.sandbox.get_context.return_value = SimpleNamespace(version="1", home_dir="/h")
+        mock_sb.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="ok")
+        )
+        monkeypatch.setattr("keystone.agent.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.kernels.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.packages.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.kernels.kernels._kernels", {})
+        monkeypatch.setattr("keystone.agent.PRELOAD_IMPORTS", ["json", "pandas"])
+
+        agent = KeystoneAgent()
+        timings = await agent.warmup()
+
+        assert set(timings) == {"sandbox", "kernel", "client", "total"}
+        mock_client.__aenter__.assert_awaited_once()
+        code = mock_sb.jupyter.execute_code.call_args.kwargs["code"]
+        assert "import json" in code
+        assert "import pandas" in code
+        assert "except ImportError" in code
+
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    async def test_kernel_failure_is_not_fatal(
+        self, mock_create_server, mock_client_cls, monkeypatch, capsys
+    ):
+        mock_client_cls.return_value = AsyncMock()
+        mock_sb = AsyncMock()
+        mock_sb.sandbox.get_context.return_value = SimpleNamespace(version="1", home_dir="/h")
+        mock_sb.jupyter.execute_code.side_effect = RuntimeError("kernel died")
+        monkeypatch.setattr("keystone.agent.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.kernels.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.packages.sandbox", mock_sb)
+        monkeypatch.setattr("keystone.kernels.kernels._kernels", {})
+
+        timings = await KeystoneAgent().warmup()
+        assert "kernel" in timings
+        assert "Kernel warmup failed" in capsys.readouterr().out
+
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    async def test_sandbox_failure_disconnects(
+        self, mock_create_server, mock_client_cls, monkeypatch
+    ):
+        mock_client = AsyncMock()
+        mock_client_cls.return_value = mock_client
+        mock_sb = AsyncMock()
+        mock_sb.sandbox.get_context.side_effect = ConnectionError("refused")
+        monkeypatch.setattr("keystone.agent.sandbox", mock_sb)
+
+        agent = KeystoneAgent()
+        with pytest.raises(ConnectionError, match="Could not reach sandbox"):
+            await agent.warmup()
+        mock_client.__aexit__.assert_awaited_once()
@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+import pytest
+
+from keystone.agent import KeystoneAgent
+from keystone.automations import (
+    Automation,
+    AutomationStore,
+    ReplayError,
+    parameterize,
+    recorded,
+)
+from keystone.snapshot import SnapshotStore
+from keystone.tools.files import read_file
+from keystone.tools.shell import run_shell
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = AutomationStore(tmp_path / "automations")
+    monkeypatch.setattr("keystone.automations.automations", store)
+    monkeypatch.setattr("keystone.agent.automations", store)
+    monkeypatch.setattr("keystone.agent.AUTOMATIONS", True)
+    monkeypatch.setattr("keystone.automations.current_session", lambda: "s1")
+    monkeypatch.setattr("keystone.automations.snapshots", SnapshotStore(tmp_path / "sessions"))
+    return store
+
+
+class TestParameterize:
+    def test_paths_become_parameters(self):
+        assert parameterize("Convert data/sales.csv to Parquet.") == (
+            "convert {} to parquet",
+            ["data/sales.csv"],
+        )
+
+    def test_quoted_values_and_urls(self):
+        template, params = parameterize("Download https://x.io/a.zip and rename it to 'b c'")
+        assert template == "download {} and rename it to {}"
+        assert params == ["https://x.io/a.zip", "b c"]
+
+    def test_case_and_whitespace_insensitive(self):
+        assert parameterize("plot  report.csv")[0] == parameterize("Plot other.csv")[0]
+
+    def test_bind_substitutes_new_values(self):
+        automation = Automation(
+            "convert {} to parquet",
+            "convert a.csv to parquet",
+            ["a.csv"],
+            [{"tool": "run_shell", "args": {"command": "python conv.py a.csv a.csv.parquet"}}],
+        )
+        (step,) = automation.bind(["b.csv"])
+        assert step["args"]["command"] == "python conv.py b.csv b.csv.parquet"
+        assert automation.steps[0]["args"]["command"].startswith("python conv.py a.csv")
+
+    def test_bind_leaves_longer_tokens_alone(self):
+        automation = Automation(
+            "load {}",
+            "load a.csv",
+            ["a.csv"],
+            [{"tool": "execute_python", "args": {"code": "f('/w/a.csv', 'data.csv', 'a.csvx')"}}],
+        )
+        (step,) = automation.bind(["b.csv"])
+        assert step["args"]["code"] == "f('/w/b.csv', 'data.csv', 'a.csvx')"
+
+
+class TestRecording:
+    async def test_saves_successful_calls(self, store, mock_sandbox, shell_result_factory):
+        shell = recorded(run_shell)
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(exit_code=1)
+        await shell.handler({"command": "python conv.py a.csv"})
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(exit_code=0)
+        await shell.handler({"command": "python conv.py --fixed a.csv"})
+
+        automation = store.save("s1", "convert a.csv")
+        assert [s["args"]["command"] for s in automation.steps] == ["python conv.py --fixed a.csv"]
+        assert store.index()["convert {}"]["steps"] == 1
+
+    def test_read_only_tools_are_not_wrapped(self):
+        assert recorded(read_file) is read_file
+
+    def test_turn_without_changes_saves_nothing(self, store):
+        assert store.save("s1", "what is 2+2") is None
+        assert store.index() == {}
+
+    def test_failed_turn_is_discarded(self, store):
+        store.capture("s1", "run_shell", {"command": "ls"})
+        with patch("keystone.agent.create_sdk_mcp_server"), patch("keystone.agent.ClaudeSDKClient"):
+            agent = KeystoneAgent(session_id="s1")
+        agent.record_automation("list files", ok=False)
+        assert store.save("s1", "list files") is None
+
+
+class TestReplay:
+    async def test_replays_with_new_parameters(self, store, mock_sandbox, shell_result_factory):
+        store.capture("s1", "run_shell", {"command": "wc -l a.csv"})
+        store.save("s1", "count lines in a.csv")
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory("3 b.csv", 0)
+
+        automation, params = store.match("Count lines in b.csv")
+        output = await store.replay(automation, params)
+
+        assert mock_sandbox.shell.exec_command.call_args.kwargs["command"] == "wc -l b.csv"
+        assert "[1/1 run_shell]" in output
+        assert "3 b.csv" in output
+        assert store.index()["count lines in {}"]["runs"] == 1
+
+    async def test_failed_step_raises(self, store, mock_sandbox, shell_result_factory):
+        store.capture("s1", "run_shell", {"command": "make"})
+        store.save("s1", "build it")
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory("boom", 2)
+        with pytest.raises(ReplayError, match="step 1"):
+            await store.replay(*store.match("build it"))
+
+    async def test_agent_falls_back_to_model(self, store, mock_sandbox, shell_result_factory):
+        with patch("keystone.agent.create_sdk_mcp_server"), patch("keystone.agent.ClaudeSDKClient"):
+            agent = KeystoneAgent(session_id="s1")
+        assert await agent.replay("build it") is None
+
+        store.capture("s1", "run_shell", {"command": "make"})
+        agent.record_automation("build it", ok=True)
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory("boom", 2)
+        assert await agent.replay("build it") is None
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory("ok", 0)
+        assert "ok" in await agent.replay("build it")
+        await agent.disconnect()
@@ -0,0 +1,76 @@
+import anyio
+
+from keystone.tools.batch import read_files, run_shell_batch, write_files
+
+
+class TestReadFiles:
+    async def test_reads_all_in_order(self, mock_sandbox, file_read_result_factory):
+        async def read(file):
+            return file_read_result_factory(content=f"contents of {file}")
+
+        mock_sandbox.file.read_file.side_effect = read
+        result = await read_files.handler({"paths": ["/a.txt", "/b.txt"]})
+        text = result["content"][0]["text"]
+        assert text.index("=== [ok] /a.txt") < text.index("=== [ok] /b.txt")
+        assert "contents of /b.txt" in text
+        assert "is_error" not in result
+
+    async def test_partial_failure(self, mock_sandbox, file_read_result_factory):
+        async def read(file):
+            if file == "/missing":
+                raise FileNotFoundError("nope")
+            return file_read_result_factory(content="ok")
+
+        mock_sandbox.file.read_file.side_effect = read
+        result = await read_files.handler({"paths": ["/ok", "/missing"]})
+        text = result["content"][0]["text"]
+        assert "=== [error] /missing" in text
+        assert "is_error" not in result
+
+    async def test_all_failed_is_error(self, mock_sandbox):
+        mock_sandbox.file.read_file.side_effect = FileNotFoundError("nope")
+        result = await read_files.handler({"paths": ["/x", "/y"]})
+        assert result["is_error"] is True
+
+    async def test_rejects_empty_and_oversized(self, mock_sandbox):
+        assert (await read_files.handler({"paths": []}))["is_error"] is True
+        result = await read_files.handler({"paths": [f"/{i}" for i in range(51)]})
+        assert "at most 50" in result["content"][0]["text"]
+
+
+class TestWriteFiles:
+    async def test_writes_each_file(self, mock_sandbox, file_write_result_factory):
+        async def write(file, content, append, **kwargs):
+            return file_write_result_factory(bytes_written=len(content), file=file)
+
+        mock_sandbox.file.write_file.side_effect = write
+        result = await write_files.handler(
+            {"files": [{"path": "/a.py", "content": "a = 1"}, {"path": "/b.py", "content": "b"}]}
+        )
+        text = result["content"][0]["text"]
+        assert "Wrote 5 bytes to /a.py" in text
+        assert "Wrote 1 bytes to /b.py" in text
+
+
+class TestRunShellBatch:
+    async def test_runs_concurrently_with_bound(
+        self, mock_sandbox, shell_result_factory, monkeypatch
+    ):
+        monkeypatch.setattr("keystone.tools.batch.BATCH_CONCURRENCY", 2)
+        running = 0
+        peak = 0
+
+        async def execute(command, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await anyio.sleep(0.01)
+            running -= 1
+            return shell_result_factory(output=f"out {command}")
+
+        mock_sandbox.shell.exec_command.side_effect = execute
+        result = await run_shell_batch.handler({"commands": [f"cmd{i}" for i in range(6)]})
+        text = result["content"][0]["text"]
+        assert peak == 2
+        assert all(f"out cmd{i}" in text for i in range(6))
+        assert "=== [ok] $ cmd0" in text
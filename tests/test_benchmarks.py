@@ -0,0 +1,41 @@
+from agent_sandbox import AsyncSandbox
+
+from benchmarks.fake_sandbox import FakeSandbox, FakeSandboxConfig
+from benchmarks.run import _percentile, run
+
+
+class TestFakeSandbox:
+    async def test_speaks_the_client_api(self):
+        with FakeSandbox(FakeSandboxConfig(output_size=50)) as fake:
+            client = AsyncSandbox(base_url=fake.url)
+            shell = await client.shell.exec_command(command="ls")
+            assert len(shell.data.output) == 50
+            await client.file.write_file(file="/a", content="hi")
+            await client.file.write_file(file="/a", content="!", append=True)
+            assert (await client.file.read_file(file="/a")).data.content == "hi!"
+            kernel = await client.jupyter.create_session(session_id="k")
+            result = await client.jupyter.execute_code(code="1", session_id=kernel.data.session_id)
+            assert result.data.status == "ok"
+            assert fake.requests == 6
+
+
+class TestRun:
+    def test_percentile(self):
+        samples = [float(i) for i in range(1, 101)]
+        assert _percentile(samples, 50) == 51.0
+        assert _percentile(samples, 99) == 99.0
+
+    async def test_small_run(self, monkeypatch):
+        from keystone import sandbox as sandbox_module
+
+        monkeypatch.setattr(sandbox_module, "pool", sandbox_module.pool)
+        results = await run(["run_shell", "agent_loop"], [1, 2], 2, FakeSandboxConfig())
+        assert [(r["workload"], r["concurrency"]) for r in results] == [
+            ("run_shell", 1),
+            ("run_shell", 2),
+            ("agent_loop", 1),
+            ("agent_loop", 2),
+        ]
+        assert results[1]["calls"] == 4
+        assert results[3]["calls"] == 16
+        assert all(r["p99_ms"] >= r["p50_ms"] for r in results)
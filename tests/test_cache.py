@@ -0,0 +1,77 @@
+from keystone.cache import FileCache
+
+V = V1 = ("2026-01-01 00:00:00", 1)
+V2 = ("2026-01-01 00:00:01", 1)
+
+
+class TestFileCache:
+    def test_get_and_matches(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a.py", "print(1)", V1)
+        assert cache.get("s1", "/a.py", V1) == "print(1)"
+        assert cache.matches("s1", "/a.py", "print(1)")
+        assert not cache.matches("s1", "/a.py", "print(2)")
+        assert cache.get("s2", "/a.py", V1) is None
+
+    def test_put_replaces_and_tracks_size(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a", "x" * 10, V1)
+        cache.put("s1", "/a", "y" * 4, V2)
+        assert cache.size == 4
+        assert cache.get("s1", "/a", V2) == "yyyy"
+
+    def test_lru_eviction(self):
+        cache = FileCache(max_bytes=10)
+        cache.put("s1", "/a", "aaaa", V)
+        cache.put("s1", "/b", "bbbb", V)
+        cache.get("s1", "/a", V)
+        cache.put("s1", "/c", "cccc", V)
+        assert cache.get("s1", "/b", V) is None
+        assert cache.get("s1", "/a", V) == "aaaa"
+        assert cache.size == 8
+
+    def test_oversized_entry_not_cached(self):
+        cache = FileCache(max_bytes=4)
+        cache.put("s1", "/a", "too big", V)
+        assert cache.get("s1", "/a", V) is None
+        assert cache.size == 0
+
+    def test_invalidate_path_and_session(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a", "a", V)
+        cache.put("s1", "/b", "b", V)
+        cache.put("s2", "/a", "a", V)
+        cache.invalidate("s1", "/a")
+        assert cache.get("s1", "/a", V) is None
+        assert cache.get("s1", "/b", V) == "b"
+        cache.invalidate("s1")
+        assert cache.get("s1", "/b", V) is None
+        assert cache.get("s2", "/a", V) == "a"
+        assert cache.size == 1
+
+    def test_paths_are_normalized(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/home/gem/./src/../a.py", "a", V)
+        assert cache.get("s1", "/home/gem/a.py", V) == "a"
+        cache.invalidate("s1", "/home/gem//a.py")
+        assert cache.get("s1", "/home/gem/a.py", V) is None
+
+    def test_changed_version_is_a_miss(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a", "old", V1)
+        assert cache.get("s1", "/a", V2) is None
+        assert cache.size == 0
+
+    def test_unverified_entry_is_checked_by_size_then_pinned(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a", "abc")
+        assert cache.get("s1", "/a", ("t1", 4)) is None
+        cache.put("s1", "/a", "abc")
+        assert cache.get("s1", "/a", ("t1", 3)) == "abc"
+        assert cache.get("s1", "/a", ("t2", 3)) is None
+
+    def test_unknown_version_is_never_served(self):
+        cache = FileCache(max_bytes=1000)
+        cache.put("s1", "/a", "a")
+        assert cache.get("s1", "/a", None) is None
+        assert cache.size == 0
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+
+import anyio
+
+from keystone.console import Console, ConsoleEvent, JsonlSink, NullSink, make_sink
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+
+    def write(self, events):
+        self.batches.append(events)
+
+    def close(self):
+        pass
+
+    @property
+    def events(self):
+        return [e for batch in self.batches for e in batch]
+
+
+class TestConsole:
+    def test_writes_synchronously_when_not_running(self):
+        sink = ListSink()
+        Console(sink).tool("run_shell", ["$ ls"])
+        assert sink.events[0].name == "run_shell"
+
+    async def test_emit_does_not_write_until_renderer_runs(self):
+        sink = ListSink()
+        console = Console(sink)
+        async with console.running():
+            console.tool("a", ["1"])
+            console.message("hello")
+            assert sink.events == []
+            await console.flush()
+            assert [e.kind for e in sink.events] == ["tool", "message"]
+
+    async def test_batches_are_written_off_the_event_loop(self):
+        threads = []
+
+        class ThreadSink(ListSink):
+            def write(self, events):
+                threads.append(threading.current_thread())
+                super().write(events)
+
+        console = Console(ThreadSink())
+        async with console.running():
+            for i in range(10):
+                console.message(str(i))
+            await console.flush()
+        assert len(console.sink.batches) == 1
+        assert threading.main_thread() not in threads
+
+    async def test_pending_events_written_on_exit(self):
+        sink = ListSink()
+        console = Console(sink)
+        async with console.running():
+            console.message("last words")
+        assert sink.events[0].text == "last words"
+
+    async def test_drops_when_queue_is_full(self):
+        sink = ListSink()
+        console = Console(sink, max_pending=3)
+        async with console.running():
+            for i in range(5):
+                console.message(str(i))
+            await console.flush()
+        assert [e.text for e in sink.events[:3]] == ["0", "1", "2"]
+        assert sink.events[3].kind == "dropped"
+        assert sink.events[3].suppressed == 2
+
+    async def test_output_is_never_dropped(self, capsys):
+        sink = ListSink()
+        console = Console(sink, max_pending=1)
+        async with console.running():
+            console.message("noise")
+            console.message("more noise")
+            console.output("agent> answer")
+            await console.flush()
+        assert [e.kind for e in sink.events] == ["message", "output", "dropped"]
+        assert capsys.readouterr().out == "agent> answer\n"
+
+    def test_output_reaches_stdout_with_any_sink(self, capsys):
+        Console(NullSink()).output("agent> hi")
+        Console(NullSink()).message("diagnostic")
+        assert capsys.readouterr().out == "agent> hi\n"
+
+    def test_tty_sink_writes_output_once(self, capsys):
+        Console(make_sink("tty")).output("agent> hi")
+        assert capsys.readouterr().out == "agent> hi\n"
+
+    def test_tool_preview_is_clipped(self):
+        sink = ListSink()
+        Console(sink, preview_lines=3).tool("write_file", ["path: a.txt", "x\n" * 10])
+        assert sink.events[0].lines == ["path: a.txt", "x", "x", "... (8 more lines)"]
+
+    def test_stream_is_rate_limited(self):
+        sink = ListSink()
+        console = Console(sink, stream_rate=5)
+        console.stream("".join(f"line {i}\n" for i in range(8)))
+        assert sink.events[0].text.count("\n") == 5
+        assert sink.events[0].suppressed == 3
+        console.stream("dropped\n")
+        assert len(sink.events) == 1
+        console._buckets[None] = (5, 0)
+        console.stream("more\n")
+        assert sink.events[1].suppressed == 1
+
+
+class TestSinks:
+    def test_tty_renders_tool_box(self, capsys):
+        Console(make_sink("tty")).tool("my_tool", ["line1"])
+        out = capsys.readouterr().out
+        assert "┌─ my_tool" in out
+        assert "│ line1" in out
+
+    def test_jsonl_sink(self, tmp_path):
+        sink = JsonlSink(tmp_path / "console.jsonl")
+        sink.write([ConsoleEvent("message", text="hi")])
+        sink.close()
+        record = json.loads((tmp_path / "console.jsonl").read_text())
+        assert record["kind"] == "message"
+        assert record["text"] == "hi"
+
+    def test_null_sink(self):
+        assert isinstance(make_sink("null"), NullSink)
+
+    async def test_slow_sink_does_not_block_emitters(self):
+        class SlowSink(ListSink):
+            def write(self, events):
+                time.sleep(0.2)
+                super().write(events)
+
+        console = Console(SlowSink())
+        async with console.running():
+            console.message("first")
+            await anyio.sleep(0.01)
+            with anyio.fail_after(0.1):
+                for i in range(100):
+                    console.message(str(i))
+                    await anyio.sleep(0)
+            await console.flush()
+        assert len(console.sink.events) == 101
@@ -0,0 +1,101 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from keystone.agent import KeystoneAgent
+from keystone.context import ContextManager, budgeted, context
+from keystone.tools.results import fetch_result
+from keystone.tools.shell import run_shell
+
+
+@pytest.fixture
+def manager():
+    return ContextManager(budget=10_000, handle_threshold=100, preview_chars=50, max_stored=3)
+
+
+class TestContextManager:
+    def test_small_results_pass_through(self, manager):
+        assert manager.admit("s", "ok") == "ok"
+        assert manager.used("s") == 2
+
+    def test_large_results_get_a_handle(self, manager):
+        text = manager.admit("s", "x" * 500)
+        assert text.startswith("x" * 500)
+        assert text.endswith("[stored as r1]")
+
+    def test_over_budget_results_are_previewed(self, manager):
+        manager.admit("s", "a" * 9_000)
+        lines = "".join(f"line {i}\n" for i in range(1_000))
+        text = manager.admit("s", lines)
+        assert text.startswith("line 0\n")
+        assert len(text) < 300
+        assert "stored as r2" in text
+        assert (
+            manager.fetch("s", "r2", 0, 14) == f"[r2: chars 0-14 of {len(lines)}]\nline 0\nline 1\n"
+        )
+
+    def test_old_handles_expire(self, manager):
+        for _ in range(4):
+            manager.admit("s", "y" * 200)
+        with pytest.raises(LookupError, match="r1"):
+            manager.fetch("s", "r1", 0, 10)
+        assert manager.fetch("s", "r4", 0, 1).endswith("y")
+
+    def test_compaction_resets_budget(self, manager):
+        manager.admit("s", "z" * 11_000)
+        assert manager.needs_compaction("s")
+        assert not manager.needs_compaction("other")
+        manager.compacted("s")
+        assert not manager.needs_compaction("s")
+        assert manager.fetch("s", "r1", 0, 1).endswith("z")
+
+
+class TestBudgetedTools:
+    async def test_wrapper_does_not_mutate_result(self, mock_sandbox, shell_result_factory):
+        context.release(None)
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="o" * 5_000)
+        wrapped = budgeted(run_shell)
+        assert wrapped.name == "run_shell"
+        result = await wrapped.handler({"command": "cat big"})
+        assert "[stored as r" in result["content"][0]["text"]
+        assert context.used(None) > 5_000
+        context.release(None)
+
+    async def test_fetch_result_tool(self):
+        context.release(None)
+        context.admit(None, "q" * 3_000)
+        result = await fetch_result.handler({"handle": "r1", "offset": 2_990})
+        assert result["content"][0]["text"] == "[r1: chars 2990-3000 of 3000]\n" + "q" * 10
+        missing = await fetch_result.handler({"handle": "r9"})
+        assert missing["is_error"] is True
+        context.release(None)
+
+
+class TestCompaction:
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    async def test_compacts_once_over_budget(self, mock_create_server, mock_client_cls):
+        agent = KeystoneAgent()
+
+        async def no_messages():
+            return
+            yield
+
+        agent.client = MagicMock()
+        agent.client.query = AsyncMock()
+        agent.client.receive_response = no_messages
+        assert await agent.compact_if_needed() is False
+
+        context.admit(agent.session_id, "w" * (context.budget + 1))
+        assert await agent.compact_if_needed() is True
+        agent.client.query.assert_awaited_once_with("/compact")
+        assert not context.needs_compaction(agent.session_id)
+        context.release(agent.session_id)
+
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    def test_fetch_result_is_not_budgeted(self, mock_create_server, mock_client_cls):
+        KeystoneAgent()
+        tools = mock_create_server.call_args.kwargs["tools"]
+        assert fetch_result in tools
+        assert run_shell not in tools
@@ -1,6 +1,10 @@
+import base64
+
+import anyio
 import pytest
 
-from keystone.tools.files import write_file, read_file
+from keystone.config import MAX_OUTPUT
+from keystone.tools.files import _END_READ, write_file, read_file
 
 write_handler = write_file.handler
 read_handler = read_file.handler
@@ -40,3 +44,203 @@ class TestReadFile:
         result = await read_handler({"path": "/missing/file.txt"})
         assert result["is_error"] is True
         assert "read_file failed" in result["content"][0]["text"]
+
+
+class TestWriteFileChunked:
+    async def test_large_content_is_appended_in_chunks(
+        self, mock_sandbox, file_write_result_factory, monkeypatch
+    ):
+        monkeypatch.setattr("keystone.tools.files.WRITE_CHUNK_CHARS", 4)
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=4)
+        result = await write_handler({"path": "/home/gem/out.txt", "content": "abcdefghij"})
+        calls = mock_sandbox.file.write_file.call_args_list
+        assert [c.kwargs["content"] for c in calls] == ["abcd", "efgh", "ij"]
+        assert [c.kwargs["append"] for c in calls] == [False, True, True]
+        assert "Wrote 12 bytes" in result["content"][0]["text"]
+
+    async def test_empty_content_still_writes(self, mock_sandbox, file_write_result_factory):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=0)
+        await write_handler({"path": "/home/gem/empty.txt", "content": ""})
+        mock_sandbox.file.write_file.assert_awaited_once()
+
+
+class TestReadFileRange:
+    async def test_range_read(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(
+            output="5000000\n" + base64.b64encode(b"row 42").decode()
+        )
+        result = await read_handler({"path": "/data/big.csv", "offset": 100, "length": 6})
+        text = result["content"][0]["text"]
+        assert text.startswith("[bytes 100-106 of 5000000]")
+        assert "row 42" in text
+        mock_sandbox.file.read_file.assert_not_awaited()
+
+    async def test_offset_only_defaults_length(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="10\n")
+        await read_handler({"path": "/data/big.csv", "offset": 5})
+        command = mock_sandbox.shell.exec_command.call_args.kwargs["command"]
+        assert f"head -c {MAX_OUTPUT}" in command
+
+
+class TestBinaryFiles:
+    async def test_base64_write(self, mock_sandbox, file_write_result_factory):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=4)
+        payload = base64.b64encode(b"\x00\xff\x10\x80").decode()
+        result = await write_handler(
+            {"path": "/home/gem/a.bin", "content": payload, "encoding": "base64"}
+        )
+        assert "Wrote 4 bytes" in result["content"][0]["text"]
+        kwargs = mock_sandbox.file.write_file.call_args.kwargs
+        assert kwargs["encoding"] == "base64"
+        assert kwargs["content"] == payload
+
+    async def test_invalid_base64_rejected(self, mock_sandbox):
+        result = await write_handler(
+            {"path": "/home/gem/a.bin", "content": "not base64!", "encoding": "base64"}
+        )
+        assert result["is_error"] is True
+        assert "not valid base64" in result["content"][0]["text"]
+        mock_sandbox.file.write_file.assert_not_awaited()
+
+    async def test_base64_read(self, mock_sandbox, shell_result_factory):
+        raw = bytes(range(200, 256))
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(
+            output="56\n" + base64.b64encode(raw).decode()
+        )
+        result = await read_handler({"path": "/home/gem/a.bin", "encoding": "base64"})
+        header, _, body = result["content"][0]["text"].partition("\n")
+        assert header == "[base64, bytes 0-56 of 56]"
+        assert base64.b64decode(body) == raw
+
+    async def test_base64_read_fits_budget(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="10\n")
+        await read_handler({"path": "/a.bin", "encoding": "base64", "length": 10**9})
+        command = mock_sandbox.shell.exec_command.call_args.kwargs["command"]
+        length = int(command.split("head -c ")[1].split()[0])
+        assert len(base64.b64encode(b"x" * length)) < MAX_OUTPUT
+
+    async def test_text_range_is_capped(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="10\n")
+        await read_handler({"path": "/a.log", "offset": 0, "length": 10**9})
+        command = mock_sandbox.shell.exec_command.call_args.kwargs["command"]
+        assert int(command.split("head -c ")[1].split()[0]) == MAX_OUTPUT
+
+    async def test_large_file_reads_only_its_ends(self, local_sandbox, tmp_path):
+        path = tmp_path / "big.log"
+        path.write_text("first line\n" + "x" * 1_000_000 + "\nlast line\n")
+        result = await read_handler({"path": str(path)})
+        text = result["content"][0]["text"]
+        assert text.startswith(f"[bytes 0-{_END_READ} and ")
+        assert "first line" in text and "last line" in text
+        assert len(text) <= MAX_OUTPUT
+        local_sandbox.file.read_file.assert_not_awaited()
+
+
+def _stat(factory, mtime="2026-01-01 00:00:00.000000000 +0000", size=5):
+    return factory(output=f"{mtime} {size}\n")
+
+
+class TestFileCacheIntegration:
+    async def test_identical_rewrite_is_skipped(
+        self, mock_sandbox, file_write_result_factory, shell_result_factory
+    ):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.shell.exec_command.return_value = _stat(shell_result_factory)
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        result = await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        assert "skipped write" in result["content"][0]["text"]
+        mock_sandbox.file.write_file.assert_awaited_once()
+
+    async def test_changed_content_is_written(self, mock_sandbox, file_write_result_factory):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        await write_handler({"path": "/home/gem/a.py", "content": "world"})
+        assert mock_sandbox.file.write_file.await_count == 2
+
+    async def test_read_after_write_served_locally(
+        self, mock_sandbox, file_write_result_factory, shell_result_factory
+    ):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.shell.exec_command.return_value = _stat(shell_result_factory)
+        await write_handler({"path": "/home/gem/./a.py", "content": "hello"})
+        result = await read_handler({"path": "/home/gem/a.py"})
+        assert result["content"][0]["text"] == "hello"
+        mock_sandbox.file.read_file.assert_not_awaited()
+
+    async def test_write_does_not_stat(self, mock_sandbox, file_write_result_factory):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        mock_sandbox.shell.exec_command.assert_not_awaited()
+
+    async def test_external_change_is_reread(
+        self,
+        mock_sandbox,
+        file_write_result_factory,
+        file_read_result_factory,
+        shell_result_factory,
+    ):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.file.read_file.return_value = file_read_result_factory(content="jobs!!")
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        # A background job or another pooled session rewrites the file.
+        mock_sandbox.shell.exec_command.return_value = _stat(shell_result_factory, size=6)
+        result = await read_handler({"path": "/home/gem/a.py"})
+        assert result["content"][0]["text"] == "jobs!!"
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        assert mock_sandbox.file.write_file.await_count == 2
+
+    async def test_verified_entry_is_pinned_to_its_mtime(
+        self,
+        mock_sandbox,
+        file_write_result_factory,
+        file_read_result_factory,
+        shell_result_factory,
+    ):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.file.read_file.return_value = file_read_result_factory(content="world")
+        mock_sandbox.shell.exec_command.return_value = _stat(shell_result_factory)
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        assert (await read_handler({"path": "/home/gem/a.py"}))["content"][0]["text"] == "hello"
+        mock_sandbox.shell.exec_command.return_value = _stat(
+            shell_result_factory, mtime="2026-01-01 00:00:01.000000000 +0000"
+        )
+        assert (await read_handler({"path": "/home/gem/a.py"}))["content"][0]["text"] == "world"
+
+    async def test_unstatable_file_is_not_served_from_cache(
+        self, mock_sandbox, file_write_result_factory, file_read_result_factory
+    ):
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.file.read_file.return_value = file_read_result_factory(content="hello")
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        await read_handler({"path": "/home/gem/a.py"})
+        mock_sandbox.file.read_file.assert_awaited_once()
+
+    async def test_shell_invalidates(
+        self,
+        mock_sandbox,
+        file_write_result_factory,
+        file_read_result_factory,
+        shell_result_factory,
+    ):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.file.write_file.return_value = file_write_result_factory(bytes_written=5)
+        mock_sandbox.file.read_file.return_value = file_read_result_factory(content="changed")
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory()
+        await write_handler({"path": "/home/gem/a.py", "content": "hello"})
+        await run_shell.handler({"command": "sed -i s/hello/changed/ /home/gem/a.py"})
+        result = await read_handler({"path": "/home/gem/a.py"})
+        assert result["content"][0]["text"] == "changed"
+
+
+class TestFileTimeouts:
+    async def test_read_timeout(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.tools.files.FILE_TIMEOUT", 0.05)
+
+        async def hang(**kwargs):
+            await anyio.sleep(10)
+
+        mock_sandbox.file.read_file.side_effect = hang
+        result = await read_handler({"path": "/home/gem/big.bin"})
+        assert result["is_error"] is True
+        assert "read_file timed out after 0.05s" in result["content"][0]["text"]
@@ -1,7 +1,7 @@
 import pytest
 
 from keystone.config import MAX_OUTPUT
-from keystone.tools._helpers import _truncate, _ok, _err, _log_tool
+from keystone.tools._helpers import OutputBuffer, _truncate, _ok, _err, _log_stream, _log_tool
 
 
 class TestTruncate:
@@ -13,9 +13,11 @@ class TestTruncate:
         assert _truncate(text) == text
 
     def test_exceeds_max_output_truncated(self):
-        text = "x" * (MAX_OUTPUT + 500)
+        text = "h" * MAX_OUTPUT + "x" * 500 + "t" * MAX_OUTPUT
         result = _truncate(text)
-        assert result.startswith("x" * MAX_OUTPUT)
+        assert result.startswith("h" * (MAX_OUTPUT // 2))
+        assert result.endswith("t" * (MAX_OUTPUT // 2))
+        assert "x" not in result
         assert "truncated" in result
         assert str(len(text)) in result
 
@@ -31,6 +33,17 @@ class TestOk:
         result = _ok(long_text)
         assert "truncated" in result["content"][0]["text"]
 
+    def test_short_text_not_reduced(self):
+        text = "same\n" * 10
+        assert _ok(text)["content"][0]["text"] == text
+
+    def test_long_text_reduced_before_truncation(self):
+        text = "progress\n" * 5000 + "finished"
+        result = _ok(text)["content"][0]["text"]
+        assert "repeated 4999 more times" in result
+        assert result.endswith("finished")
+        assert "truncated" not in result
+
 
 class TestErr:
     def test_returns_correct_shape(self):
@@ -61,3 +74,45 @@ class TestLogTool:
         _log_tool("t", ["only"])
         captured = capsys.readouterr().out
         assert "│ only" in captured
+
+
+class TestOutputBuffer:
+    def test_small_output_kept_whole(self):
+        buf = OutputBuffer(limit=1000)
+        buf.write("hello ")
+        buf.write("world")
+        assert buf.getvalue() == "hello world"
+        assert buf.total == 11
+
+    def test_keeps_head_and_tail(self):
+        buf = OutputBuffer(limit=400)
+        for i in range(1000):
+            buf.write(f"{i:04d}\n")
+        value = buf.getvalue()
+        assert value.startswith("0000\n0001")
+        assert value.endswith("0998\n0999\n")
+        assert "chars omitted, 5000 total" in value
+        assert "0500" not in value
+
+    def test_memory_stays_bounded(self):
+        buf = OutputBuffer(limit=400)
+        for _ in range(10_000):
+            buf.write("x" * 37)
+        assert buf.head_len == 200
+        assert buf.tail_len == buf.tail_limit
+        assert len(buf.tail) <= buf.tail_limit // 37 + 2
+
+    def test_single_large_write(self):
+        buf = OutputBuffer(limit=400)
+        buf.write("a" * 200 + "b" * 10_000 + "c" * 100)
+        value = buf.getvalue()
+        assert value.startswith("a" * 200)
+        assert value.endswith("c" * 100)
+
+
+class TestLogStream:
+    def test_prefixes_each_line(self, capsys):
+        _log_stream("one\ntwo\n")
+        captured = capsys.readouterr().out
+        assert "┆ one" in captured
+        assert "┆ two" in captured
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+
+from keystone.jobs import jobs
+from keystone.tools.jobs import cancel_job, job_output, job_status, start_job
+
+
+def _data(output="", status="running", exit_code=None, session_id="job-shell"):
+    return SimpleNamespace(
+        data=SimpleNamespace(
+            output=output, status=status, exit_code=exit_code, session_id=session_id
+        )
+    )
+
+
+def _text(result):
+    return result["content"][0]["text"]
+
+
+class TestJobScheduler:
+    async def test_start_runs_detached(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data()
+        job = await jobs.start(None, "make build")
+        assert job.running
+        kwargs = mock_sandbox.shell.exec_command.call_args.kwargs
+        assert kwargs["async_mode"] is True
+        assert kwargs["id"] == f"job-{job.job_id}"
+
+    async def test_output_is_incremental(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data(output="step 1\n")
+        job = await jobs.start(None, "train.sh")
+        mock_sandbox.shell.view.return_value = _data(output="step 1\nstep 2\n")
+        await jobs.refresh(job)
+        assert jobs.take_output(job) == "step 1\nstep 2\n"
+        mock_sandbox.shell.view.return_value = _data(
+            output="step 1\nstep 2\ndone\n", status="completed", exit_code=0
+        )
+        await jobs.refresh(job)
+        assert jobs.take_output(job) == "done\n"
+        assert job.status == "completed" and job.finished is not None
+
+    async def test_unread_output_is_bounded(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.jobs.MAX_CALL_OUTPUT", 20_000)
+        mock_sandbox.shell.exec_command.return_value = _data()
+        job = await jobs.start(None, "yes")
+        output = ""
+        for i in range(50):
+            output += f"line {i}\n" * 1000
+            mock_sandbox.shell.view.return_value = _data(output=output)
+            await jobs.refresh(job)
+        chunk = jobs.take_output(job)
+        assert len(chunk) < 20_100 and "chars omitted" in chunk
+        assert chunk.startswith("line 0\n") and chunk.endswith("line 49\n")
+        assert jobs.take_output(job) == ""
+
+    async def test_finished_job_not_polled(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data(status="completed", exit_code=0)
+        job = await jobs.start(None, "true")
+        await jobs.refresh(job)
+        mock_sandbox.shell.view.assert_not_awaited()
+
+    async def test_max_running_jobs(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr(jobs, "max_jobs", 1)
+        mock_sandbox.shell.exec_command.return_value = _data()
+        mock_sandbox.shell.view.return_value = _data()
+        await jobs.start(None, "server")
+        with pytest.raises(RuntimeError, match="too many running jobs"):
+            await jobs.start(None, "server2")
+
+    async def test_jobs_are_per_session(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data()
+        job = await jobs.start("a", "sleep 100")
+        assert jobs.jobs("b") == []
+        with pytest.raises(LookupError):
+            jobs.get("b", job.job_id)
+
+    async def test_release_kills_running_jobs(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data(session_id="sh-7")
+        await jobs.start("a", "sleep 100")
+        await jobs.release("a")
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id="sh-7")
+        assert jobs.jobs("a") == []
+
+
+class TestJobTools:
+    async def test_start_and_status(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data()
+        mock_sandbox.shell.view.return_value = _data()
+        started = await start_job.handler({"command": "python -m http.server"})
+        assert "Started job" in _text(started)
+        status = await job_status.handler({})
+        assert "running" in _text(status)
+        assert "python -m http.server" in _text(status)
+
+    async def test_status_without_jobs(self, mock_sandbox):
+        assert _text(await job_status.handler({})) == "No jobs."
+
+    async def test_output_reports_no_new_output(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data(output="hello\n")
+        job = await jobs.start(None, "echo hello; sleep 10")
+        mock_sandbox.shell.view.return_value = _data(output="hello\n")
+        assert "hello" in _text(await job_output.handler({"job_id": job.job_id}))
+        assert "(no new output)" in _text(await job_output.handler({"job_id": job.job_id}))
+
+    async def test_output_is_reduced_before_truncation(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data()
+        job = await jobs.start(None, "yes")
+        mock_sandbox.shell.view.return_value = _data(output="y\n" * 50_000)
+        text = _text(await job_output.handler({"job_id": job.job_id}))
+        assert "previous line repeated" in text
+        assert "truncated" not in text
+
+    async def test_cancel(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _data()
+        mock_sandbox.shell.view.return_value = _data()
+        job = await jobs.start(None, "sleep 100")
+        result = await cancel_job.handler({"job_id": job.job_id})
+        assert "terminated" in _text(result)
+        mock_sandbox.shell.kill_process.assert_awaited_once()
+
+    async def test_unknown_job(self, mock_sandbox):
+        result = await job_output.handler({"job_id": "nope"})
+        assert result["is_error"] is True
+        assert "no such job: nope" in _text(result)
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import anyio
+import pytest
+
+from keystone.kernels import KernelManager
+
+
+@pytest.fixture
+def jupyter(monkeypatch):
+    sb = AsyncMock()
+    counter = iter(range(1000))
+
+    async def create_session(session_id):
+        return SimpleNamespace(data=SimpleNamespace(session_id=f"{session_id}-{next(counter)}"))
+
+    sb.jupyter.create_session.side_effect = create_session
+    monkeypatch.setattr("keystone.kernels.sandbox", sb)
+    return sb.jupyter
+
+
+class TestKernelManager:
+    async def test_reuses_kernel_per_session(self, jupyter):
+        manager = KernelManager()
+        await manager.execute("s1", "x = 1")
+        await manager.execute("s1", "print(x)")
+        jupyter.create_session.assert_awaited_once()
+        ids = {c.kwargs["session_id"] for c in jupyter.execute_code.call_args_list}
+        assert ids == {"keystone-s1-0"}
+
+    async def test_sessions_are_isolated(self, jupyter):
+        manager = KernelManager()
+        a = await manager.kernel_for("s1")
+        b = await manager.kernel_for("s2")
+        assert a.kernel_id != b.kernel_id
+        assert len(manager) == 2
+
+    async def test_cap_evicts_least_recently_used(self, jupyter):
+        manager = KernelManager(max_kernels=2)
+        await manager.kernel_for("s1")
+        await manager.kernel_for("s2")
+        await manager.kernel_for("s1")
+        await manager.kernel_for("s3")
+        jupyter.delete_session.assert_awaited_once_with("keystone-s2-1")
+        assert len(manager) == 2
+
+    async def test_busy_kernel_is_never_evicted(self, jupyter):
+        manager = KernelManager(max_kernels=1)
+        running = anyio.Event()
+        finish = anyio.Event()
+
+        async def execute_code(code, session_id, **kwargs):
+            running.set()
+            await finish.wait()
+
+        jupyter.execute_code.side_effect = execute_code
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(manager.execute, "s1", "train()")
+            await running.wait()
+            manager._kernels["s1"].last_used -= 10**6
+            await manager.kernel_for("s2")
+            jupyter.delete_session.assert_not_awaited()
+            assert len(manager) == 2
+            finish.set()
+        await manager.kernel_for("s3")
+        assert len(manager) == 1
+
+    async def test_slow_setup_does_not_block_other_sessions(self, jupyter):
+        manager = KernelManager()
+        release = anyio.Event()
+
+        async def create_session(session_id):
+            if session_id == "keystone-slow":
+                await release.wait()
+            return SimpleNamespace(data=SimpleNamespace(session_id=session_id))
+
+        jupyter.create_session.side_effect = create_session
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(manager.kernel_for, "slow")
+            await anyio.wait_all_tasks_blocked()
+            with anyio.fail_after(1):
+                kernel = await manager.kernel_for("fast")
+            assert kernel.kernel_id == "keystone-fast"
+            release.set()
+        assert len(manager) == 2
+
+    async def test_idle_kernels_are_evicted(self, jupyter):
+        manager = KernelManager(idle_timeout=60)
+        kernel = await manager.kernel_for("s1")
+        kernel.last_used -= 120
+        await manager.kernel_for("s2")
+        jupyter.delete_session.assert_awaited_once_with(kernel.kernel_id)
+
+    async def test_dead_kernel_is_replaced(self, jupyter):
+        manager = KernelManager()
+        jupyter.execute_code.side_effect = RuntimeError("kernel died")
+        jupyter.list_sessions.return_value = SimpleNamespace(data=SimpleNamespace(sessions={}))
+        with pytest.raises(RuntimeError):
+            await manager.execute("s1", "boom()")
+        jupyter.execute_code.side_effect = None
+        await manager.execute("s1", "print(1)")
+        assert jupyter.create_session.await_count == 2
+
+    async def test_live_kernel_kept_after_transient_error(self, jupyter):
+        manager = KernelManager()
+        kernel = await manager.kernel_for("s1")
+        jupyter.execute_code.side_effect = TimeoutError("slow network")
+        jupyter.list_sessions.return_value = SimpleNamespace(
+            data=SimpleNamespace(sessions={kernel.kernel_id: {}})
+        )
+        with pytest.raises(TimeoutError):
+            await manager.execute("s1", "x")
+        assert (await manager.kernel_for("s1")) is kernel
+
+    async def test_release_deletes_kernel(self, jupyter):
+        manager = KernelManager()
+        kernel = await manager.kernel_for("s1")
+        await manager.release("s1")
+        jupyter.delete_session.assert_awaited_once_with(kernel.kernel_id)
+        assert len(manager) == 0
+        await manager.release("unknown")
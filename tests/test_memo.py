@@ -0,0 +1,151 @@
+import pytest
+
+from keystone.memo import Memo, _key, is_read_only, is_read_only_command, memo
+
+
+@pytest.fixture
+def memoize(monkeypatch):
+    monkeypatch.setattr("keystone.memo.MEMOIZE", True)
+    memo.clear()
+    yield
+    memo.clear()
+
+
+class TestClassification:
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "ls -la",
+            "cat config.yaml",
+            "pip list",
+            "pip3 show flask",
+            "ls | wc -l",
+            "git status",
+            "git branch",
+            "git branch -a -v",
+            "tree -L 2",
+            "find . -name '*.py' -print",
+        ],
+    )
+    def test_read_only(self, command):
+        assert is_read_only_command(command)
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "rm -rf /tmp/x",
+            "pip install flask",
+            "echo hi > out.txt",
+            "ls; rm x",
+            "cat $(ls)",
+            "find . -delete",
+            "ls && touch x",
+            "git commit -m x",
+            "pip",
+            "'unterminated",
+            "ls\nrm -rf /tmp/x",
+            "env rm -rf /tmp/x",
+            "git branch -D main",
+            "git branch newb",
+            "find . -fprintf out %p",
+            "find . -fprint0 out",
+            "tree -o out.txt",
+            "git diff --output=x",
+            "git log --output x",
+        ],
+    )
+    def test_mutating(self, command):
+        assert not is_read_only_command(command)
+
+    def test_tools(self):
+        assert is_read_only("read_file", {"path": "/a"})
+        assert is_read_only("run_shell_batch", {"commands": ["ls", "pwd"]})
+        assert not is_read_only("run_shell_batch", {"commands": ["ls", "rm x"]})
+        assert not is_read_only("write_file", {"path": "/a", "content": ""})
+        assert not is_read_only("execute_python", {"code": "1"})
+
+    def test_key_normalizes_whitespace(self):
+        spaced = _key("run_shell", {"command": "ls   -la "})
+        assert spaced == _key("run_shell", {"command": "ls -la"})
+        assert _key("run_shell", {"command": "ls"}) != _key("read_file", {"command": "ls"})
+
+    def test_key_keeps_quoted_whitespace(self):
+        assert _key("run_shell", {"command": 'grep "a  b" f'}) != _key(
+            "run_shell", {"command": 'grep "a b" f'}
+        )
+        assert _key("run_shell", {"command": "echo 'x"}) != _key(
+            "run_shell", {"command": "echo  'x"}
+        )
+
+
+class TestMemo:
+    def test_ttl_expiry(self, monkeypatch):
+        clock = [100.0]
+        monkeypatch.setattr("keystone.memo.time.monotonic", lambda: clock[0])
+        cache = Memo(ttl=10)
+        cache.put("s", "k", {"content": []}, cache.generation("s"))
+        assert cache.get("s", "k") is not None
+        clock[0] += 11
+        assert cache.get("s", "k") is None
+
+    def test_lru_bound(self):
+        cache = Memo(max_entries=2)
+        for key in ("a", "b"):
+            cache.put("s", key, {"k": key}, 0)
+        cache.get("s", "a")
+        cache.put("s", "c", {"k": "c"}, 0)
+        assert cache.get("s", "b") is None
+        assert cache.get("s", "a") == {"k": "a"}
+
+    def test_stale_generation_not_stored(self):
+        cache = Memo()
+        generation = cache.generation("s")
+        cache.invalidate("s")
+        cache.put("s", "k", {}, generation)
+        assert cache.get("s", "k") is None
+
+    def test_invalidate_is_per_session(self):
+        cache = Memo()
+        cache.put("s1", "k", {"v": 1}, 0)
+        cache.put("s2", "k", {"v": 2}, 0)
+        cache.invalidate("s1")
+        assert cache.get("s1", "k") is None
+        assert cache.get("s2", "k") == {"v": 2}
+
+
+class TestMemoizedTools:
+    async def test_repeat_read_only_call_hits_cache(
+        self, memoize, mock_sandbox, shell_result_factory
+    ):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="a\nb")
+        first = await run_shell.handler({"command": "ls"})
+        second = await run_shell.handler({"command": "ls "})
+        assert first == second
+        mock_sandbox.shell.exec_command.assert_awaited_once()
+
+    async def test_mutating_call_invalidates(self, memoize, mock_sandbox, shell_result_factory):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="a")
+        await run_shell.handler({"command": "ls"})
+        await run_shell.handler({"command": "touch b"})
+        await run_shell.handler({"command": "ls"})
+        assert mock_sandbox.shell.exec_command.await_count == 3
+
+    async def test_errors_not_cached(self, memoize, mock_sandbox):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.shell.exec_command.side_effect = RuntimeError("down")
+        await run_shell.handler({"command": "ls"})
+        await run_shell.handler({"command": "ls"})
+        assert mock_sandbox.shell.exec_command.await_count == 2
+
+    async def test_disabled_by_default(self, mock_sandbox, shell_result_factory):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="a")
+        await run_shell.handler({"command": "ls"})
+        await run_shell.handler({"command": "ls"})
+        assert mock_sandbox.shell.exec_command.await_count == 2
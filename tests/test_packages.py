@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+from keystone.packages import SANDBOX_WHEEL_DIR, PackageCache
+from keystone.snapshot import setup_steps
+
+WHEELS = ["numpy-2.0.0-cp312-cp312-linux_x86_64.whl", "pandas-2.2.0-cp312-cp312-linux_x86_64.whl"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PackageCache(tmp_path / "wheels")
+
+
+@pytest.fixture
+def pip_sandbox(mock_sandbox):
+    commands = []
+
+    async def exec_command(command, **kwargs):
+        commands.append(command)
+        if command.startswith("python3 -c"):
+            output = "cp312-x86_64\n"
+        elif "pip wheel" in command:
+            output = "\n".join(WHEELS)
+        else:
+            output = ""
+        return SimpleNamespace(data=SimpleNamespace(output=output, exit_code=0))
+
+    async def download_file(path, request_options=None):
+        yield f"wheel:{path}".encode()
+
+    mock_sandbox.shell.exec_command.side_effect = exec_command
+    mock_sandbox.file.download_file = download_file
+    mock_sandbox.commands = commands
+    return mock_sandbox
+
+
+class TestPackageCache:
+    def test_key_ignores_order_case_and_whitespace(self, cache):
+        a = cache.key(["pandas", "numpy >= 2"], "cp312-x86_64")
+        assert a == cache.key(["numpy>=2", "Pandas"], "cp312-x86_64")
+        assert a != cache.key(["numpy>=2", "pandas"], "cp311-x86_64")
+
+    async def test_miss_builds_and_caches_wheels(self, cache, pip_sandbox):
+        message = await cache.install("s1", ["pandas"])
+
+        assert "cached 2 new wheel(s)" in message
+        build = next(c for c in pip_sandbox.commands if "pip wheel" in c)
+        assert f"--no-index --find-links {SANDBOX_WHEEL_DIR} pandas" in build
+        for name in WHEELS:
+            assert (cache.root / name).read_bytes() == f"wheel:{SANDBOX_WHEEL_DIR}/{name}".encode()
+        key = cache.key(["pandas"], "cp312-x86_64")
+        assert cache.cached_wheels(key) == [cache.root / name for name in WHEELS]
+
+    async def test_hit_installs_offline(self, cache, pip_sandbox):
+        await cache.install("s1", ["pandas"])
+        pip_sandbox.commands.clear()
+        pip_sandbox.file.write_file.reset_mock()
+
+        message = await cache.install("s2", ["pandas"])
+
+        assert message == "Installed 1 requirement(s) from 2 cached wheels"
+        assert not any("pip wheel" in c for c in pip_sandbox.commands)
+        assert pip_sandbox.commands[-1].startswith("pip install -q --no-index")
+        uploaded = {c.kwargs["file"] for c in pip_sandbox.file.write_file.call_args_list}
+        assert uploaded == {f"{SANDBOX_WHEEL_DIR}/{name}" for name in WHEELS}
+
+    async def test_missing_wheel_file_rebuilds(self, cache, pip_sandbox):
+        await cache.install("s1", ["pandas"])
+        (cache.root / WHEELS[0]).unlink()
+        pip_sandbox.commands.clear()
+
+        await cache.install("s1", ["pandas"])
+        assert any("pip wheel" in c for c in pip_sandbox.commands)
+
+    async def test_failed_build_raises(self, cache, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(output="No matching distribution", exit_code=1)
+        )
+        with pytest.raises(OSError, match="No matching distribution"):
+            await cache.install("s1", ["nonexistent-pkg"])
+        assert not cache.index_path.exists()
+
+    async def test_configure_sets_mirror(self, cache, pip_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.packages.PIP_INDEX_URL", "https://mirror.example/simple")
+        await cache.configure()
+        command = pip_sandbox.commands[-1]
+        assert f"global.find-links {SANDBOX_WHEEL_DIR}" in command
+        assert "global.index-url https://mirror.example/simple" in command
+
+
+class TestInstallPackagesTool:
+    async def test_reports_install(self, pip_sandbox, tmp_path, monkeypatch):
+        from keystone.tools.packages import install_packages
+
+        monkeypatch.setattr("keystone.tools.packages.packages", PackageCache(tmp_path))
+        result = await install_packages.handler({"packages": ["pandas"]})
+        assert not result.get("is_error")
+        assert "Installed 1 requirement(s)" in result["content"][0]["text"]
+
+    def test_journaled_as_setup_step(self):
+        steps = setup_steps("install_packages", {"packages": ["pandas", "numpy>=2"]})
+        assert steps == ["pip install pandas 'numpy>=2'"]
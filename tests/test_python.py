@@ -1,5 +1,7 @@
+import json
 from types import SimpleNamespace
 
+import anyio
 import pytest
 
 from keystone.tools.python import execute_python
@@ -10,7 +12,9 @@ handler = execute_python.handler
 class TestExecutePython:
     async def test_stream_output(self, mock_sandbox, jupyter_output_factory):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[jupyter_output_factory["stream"]("hello world")])
+            data=SimpleNamespace(
+                status="ok", outputs=[jupyter_output_factory["stream"]("hello world")]
+            )
         )
         result = await handler({"code": "print('hello world')"})
         assert "hello world" in result["content"][0]["text"]
@@ -18,21 +22,25 @@ class TestExecutePython:
 
     async def test_execute_result(self, mock_sandbox, jupyter_output_factory):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[jupyter_output_factory["execute_result"]("42")])
+            data=SimpleNamespace(
+                status="ok", outputs=[jupyter_output_factory["execute_result"]("42")]
+            )
         )
         result = await handler({"code": "40 + 2"})
         assert "42" in result["content"][0]["text"]
 
     async def test_display_data(self, mock_sandbox, jupyter_output_factory):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[jupyter_output_factory["display_data"]("chart data")])
+            data=SimpleNamespace(
+                status="ok", outputs=[jupyter_output_factory["display_data"]("chart data")]
+            )
         )
         result = await handler({"code": "display(chart)"})
         assert "chart data" in result["content"][0]["text"]
 
     async def test_error_output(self, mock_sandbox, jupyter_output_factory):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[
+            data=SimpleNamespace(status="ok", outputs=[
                 jupyter_output_factory["error"]("TypeError", "oops", ["frame1", "frame2"])
             ])
         )
@@ -44,14 +52,14 @@ class TestExecutePython:
 
     async def test_no_output(self, mock_sandbox):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[])
+            data=SimpleNamespace(status="ok", outputs=[])
         )
         result = await handler({"code": "x = 1"})
         assert "(no output)" in result["content"][0]["text"]
 
     async def test_multiple_outputs(self, mock_sandbox, jupyter_output_factory):
         mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
-            data=SimpleNamespace(outputs=[
+            data=SimpleNamespace(status="ok", outputs=[
                 jupyter_output_factory["stream"]("line1"),
                 jupyter_output_factory["execute_result"]("line2"),
             ])
@@ -66,3 +74,102 @@ class TestExecutePython:
         result = await handler({"code": "print(1)"})
         assert result["is_error"] is True
         assert "execute_python failed" in result["content"][0]["text"]
+
+    async def test_large_output_keeps_tail(self, mock_sandbox, jupyter_output_factory):
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="ok", outputs=[
+                jupyter_output_factory["stream"]("x" * 50_000),
+                jupyter_output_factory["error"]("ValueError", "at the end"),
+            ])
+        )
+        result = await handler({"code": "noisy()"})
+        text = result["content"][0]["text"]
+        assert "ValueError: at the end" in text
+        assert "(truncated, 50023 chars total)" in text
+
+    @pytest.mark.parametrize(
+        "output, marker",
+        [
+            (json.dumps([{"id": i, "name": f"row {i}"} for i in range(5000)]), "summarized"),
+            ("id,value\n" + "".join(f"{i},{i * 2}\n" for i in range(20_000)), "rows omitted"),
+            ("epoch done\n" * 5000, "previous line repeated 4999 more times"),
+        ],
+        ids=["json", "table", "repeats"],
+    )
+    async def test_large_output_is_reduced(
+        self, mock_sandbox, jupyter_output_factory, output, marker
+    ):
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="ok", outputs=[jupyter_output_factory["stream"](output)])
+        )
+        result = await handler({"code": "show()"})
+        text = result["content"][0]["text"]
+        assert marker in text
+        assert "truncated" not in text
+
+    async def test_output_limit(self, mock_sandbox, jupyter_output_factory, monkeypatch):
+        monkeypatch.setattr("keystone.tools.python.MAX_CALL_OUTPUT", 100)
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(
+                status="ok",
+                outputs=[
+                    jupyter_output_factory["stream"]("x" * 80),
+                    jupyter_output_factory["stream"]("y" * 80),
+                    jupyter_output_factory["stream"]("never shown"),
+                ],
+            )
+        )
+        result = await handler({"code": "spam()"})
+        text = result["content"][0]["text"]
+        assert text.count("y") == 19
+        assert "never shown" not in text
+        assert text.endswith("[output exceeded 100 chars, rest discarded]")
+
+    async def test_streams_outputs_when_enabled(
+        self, mock_sandbox, jupyter_output_factory, monkeypatch, capsys
+    ):
+        monkeypatch.setattr("keystone.tools.python.STREAM_OUTPUT", True)
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(
+                status="ok", outputs=[jupyter_output_factory["stream"]("progress 1")]
+            )
+        )
+        await handler({"code": "print('progress 1')"})
+        assert "┆ progress 1" in capsys.readouterr().out
+
+
+class TestExecutePythonTimeouts:
+    async def test_passes_timeout_to_kernel(self, mock_sandbox):
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="ok", outputs=[])
+        )
+        await handler({"code": "x = 1", "timeout": 5})
+        assert mock_sandbox.jupyter.execute_code.call_args.kwargs["timeout"] == 5
+
+    async def test_timeout_is_capped(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.tools._helpers.MAX_TOOL_TIMEOUT", 10)
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="ok", outputs=[])
+        )
+        await handler({"code": "x = 1", "timeout": 99999})
+        assert mock_sandbox.jupyter.execute_code.call_args.kwargs["timeout"] == 10
+
+    async def test_kernel_timeout_restarts_kernel(self, mock_sandbox, jupyter_output_factory):
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="timeout", outputs=[jupyter_output_factory["stream"]("1")])
+        )
+        result = await handler({"code": "while True: pass", "timeout": 5})
+        assert "[timed out after 5s, kernel restarted]" in result["content"][0]["text"]
+        mock_sandbox.jupyter.delete_session.assert_awaited_once()
+
+    async def test_hung_call_is_abandoned(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.tools.python.TIMEOUT_GRACE", 0)
+
+        async def hang(**kwargs):
+            await anyio.sleep(10)
+
+        mock_sandbox.jupyter.execute_code.side_effect = hang
+        result = await handler({"code": "while True: pass", "timeout": 0.05})
+        assert result["is_error"] is True
+        assert "timed out" in result["content"][0]["text"]
+        mock_sandbox.jupyter.delete_session.assert_awaited_once()
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from keystone.tools import _reduce
+from keystone.tools._reduce import (
+    collapse_repeats,
+    dedupe_tracebacks,
+    reduce_output,
+    register_reducer,
+    strip_ansi,
+    summarize_json,
+    summarize_table,
+)
+
+TRACEBACK = """Traceback (most recent call last):
+  File "job.py", line 3, in <module>
+    run()
+ValueError: bad row"""
+
+
+class TestStripAnsi:
+    def test_removes_color_codes(self):
+        assert strip_ansi("\x1b[0;31mValueError\x1b[0m: x", 0) == "ValueError: x"
+
+
+class TestDedupeTracebacks:
+    def test_repeated_traceback_collapsed(self):
+        text = "\n".join(["start", TRACEBACK, "retrying", TRACEBACK, "end"])
+        result = dedupe_tracebacks(text, 0)
+        assert result.count("Traceback (most recent call last):") == 1
+        assert "[duplicate traceback omitted: ValueError: bad row]" in result
+        assert result.endswith("end")
+
+    def test_distinct_tracebacks_kept(self):
+        other = TRACEBACK.replace("bad row", "other")
+        result = dedupe_tracebacks(TRACEBACK + "\n" + other, 0)
+        assert result.count("Traceback (most recent call last):") == 2
+
+
+class TestCollapseRepeats:
+    def test_runs_of_three_or_more(self):
+        result = collapse_repeats("a\nb\nb\nb\nb\nc\nc", 0)
+        assert result == "a\nb\n... (previous line repeated 3 more times)\nc\nc"
+
+
+class TestSummarizeJson:
+    def test_list_of_records(self):
+        records = [{"id": i, "name": f"n{i}", "tags": ["x"]} for i in range(500)]
+        result = summarize_json(json.dumps(records), 2000)
+        assert result.startswith("[JSON,")
+        assert "list[500] of" in result
+        assert '"id": "int"' in result
+        assert '"n2"' in result
+        assert '"n3"' not in result
+
+    def test_not_json_unchanged(self):
+        assert summarize_json("{not json", 10) == "{not json"
+        assert summarize_json("plain", 10) == "plain"
+
+
+class TestSummarizeTable:
+    def test_csv_keeps_header_head_and_tail(self):
+        rows = ["id,value"] + [f"{i},{i * 2}" for i in range(1000)]
+        result = summarize_table("\n".join(rows), 100)
+        lines = result.split("\n")
+        assert lines[0] == "id,value"
+        assert lines[1] == "0,0"
+        assert "985 rows omitted; 1000 rows x 2 columns total" in result
+        assert lines[-1] == "999,1998"
+
+    def test_ragged_text_unchanged(self):
+        text = "\n".join(f"line {i}, maybe, commas" * (i % 2) for i in range(100))
+        assert summarize_table(text, 100) == text
+
+
+class TestReduceOutput:
+    def test_fitting_text_untouched(self):
+        text = "a\na\na\na"
+        assert reduce_output(text, 100) == text
+
+    def test_stops_once_within_budget(self):
+        text = "\x1b[31m" * 50 + "ok"
+        assert reduce_output(text, 10) == "ok"
+
+    def test_custom_reducer(self, monkeypatch):
+        monkeypatch.setattr(_reduce, "REDUCERS", [])
+        register_reducer(lambda text, budget: text[:budget])
+        register_reducer(lambda text, budget: text.upper(), index=0)
+        assert reduce_output("abcdef", 3) == "ABC"
+
+    @pytest.mark.parametrize("size", [0, 10, 1000])
+    def test_never_grows_small_text(self, size):
+        assert reduce_output("x" * size, 1000) == "x" * size
@@ -0,0 +1,158 @@
+import json
+from functools import partial
+
+import anyio
+import pytest
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+
+from keystone.config import SANDBOX_HEALTH_INTERVAL
+from keystone.runner import BatchRunner, completed_jobs, parse_job, run_batch
+
+
+class FakeClient:
+    def __init__(self, agent):
+        self.agent = agent
+        self.prompt = None
+
+    async def query(self, prompt):
+        self.prompt = prompt
+
+    async def receive_response(self):
+        FakeAgent.running += 1
+        FakeAgent.peak = max(FakeAgent.peak, FakeAgent.running)
+        try:
+            await anyio.sleep(0.05 if "slow" not in self.prompt else 10)
+        finally:
+            FakeAgent.running -= 1
+        yield AssistantMessage(content=[TextBlock(text="working")], model="test")
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=50,
+            duration_api_ms=40,
+            is_error="fail" in self.prompt,
+            num_turns=1,
+            session_id="conv",
+            result=f"done: {self.prompt}",
+        )
+
+
+class FakeAgent:
+    count = 0
+    running = 0
+    peak = 0
+
+    def __init__(self):
+        FakeAgent.count += 1
+        self.session_id = f"batch-{FakeAgent.count}"
+        self.client = FakeClient(self)
+        self.disconnected = False
+
+    async def warmup(self):
+        return {}
+
+    async def replay(self, prompt):
+        return None
+
+    def record_automation(self, prompt, ok):
+        pass
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+@pytest.fixture(autouse=True)
+def _reset_fake():
+    FakeAgent.running = FakeAgent.peak = 0
+
+
+def _write_jobs(path, prompts):
+    path.write_text(
+        "".join(json.dumps({"id": f"j{i}", "prompt": p}) + "\n" for i, p in enumerate(prompts))
+    )
+
+
+def _results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestParseJob:
+    def test_formats(self):
+        assert parse_job('{"id": "a", "prompt": "hi"}', 1).job_id == "a"
+        assert parse_job('{"prompt": "hi"}', 7).job_id == "7"
+        assert parse_job('"hi"', 2).prompt == "hi"
+        assert parse_job("plain text prompt", 3).prompt == "plain text prompt"
+        assert parse_job("   ", 4) is None
+
+    def test_rejects_objects_without_prompt(self):
+        with pytest.raises(ValueError, match="line 5"):
+            parse_job('{"text": "hi"}', 5)
+
+
+class TestBatchRunner:
+    async def test_runs_jobs_concurrently_and_writes_results(self, tmp_path):
+        source, output = tmp_path / "jobs.jsonl", tmp_path / "out" / "results.jsonl"
+        _write_jobs(source, [f"task {i}" for i in range(6)])
+
+        summary = await BatchRunner(FakeAgent, concurrency=3).run(str(source), output)
+
+        assert summary["ok"] == 6
+        assert FakeAgent.peak == 3
+        results = _results(output)
+        assert {r["id"] for r in results} == {f"j{i}" for i in range(6)}
+        first = next(r for r in results if r["id"] == "j0")
+        assert first["result"] == "done: task 0"
+        assert first["model_time"] == 0.04
+        assert first["duration"] > 0
+
+    async def test_errors_and_timeouts_are_recorded(self, tmp_path):
+        source, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+        _write_jobs(source, ["fail please", "slow job", "fine"])
+
+        summary = await BatchRunner(FakeAgent, concurrency=3, timeout=0.5).run(str(source), output)
+
+        assert (summary["ok"], summary["error"], summary["timeout"]) == (1, 1, 1)
+        status = {r["id"]: r["status"] for r in _results(output)}
+        assert status == {"j0": "error", "j1": "timeout", "j2": "ok"}
+
+    async def test_malformed_line_is_recorded_and_batch_continues(self, tmp_path):
+        source, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+        source.write_text(
+            '{"id": "a", "prompt": "first"}\n{"id": 1}\n{"id": "c", "prompt": "last"}\n'
+        )
+
+        summary = await BatchRunner(FakeAgent).run(str(source), output)
+
+        assert (summary["ok"], summary["error"]) == (2, 1)
+        bad = next(r for r in _results(output) if r["id"] == "2")
+        assert bad["status"] == "error"
+        assert "line 2" in bad["error"]
+
+    async def test_rerun_skips_completed_jobs(self, tmp_path):
+        source, output = tmp_path / "jobs.jsonl", tmp_path / "results.jsonl"
+        _write_jobs(source, ["a", "fail b", "c"])
+        await BatchRunner(FakeAgent).run(str(source), output)
+        assert completed_jobs(output) == {"j0", "j2"}
+
+        summary = await BatchRunner(FakeAgent).run(str(source), output)
+        assert summary["skipped"] == 2
+        assert summary["error"] == 1
+        assert len(_results(output)) == 4
+
+
+class TestRunBatch:
+    async def test_monitors_sandbox_health_while_running(self, tmp_path, monkeypatch):
+        intervals = []
+
+        async def monitor(interval):
+            intervals.append(interval)
+            await anyio.sleep_forever()
+
+        monkeypatch.setattr("keystone.runner.pool.monitor", monitor)
+        monkeypatch.setattr("keystone.runner.BatchRunner", partial(BatchRunner, FakeAgent))
+        source = tmp_path / "jobs.jsonl"
+        _write_jobs(source, ["a"])
+
+        summary = await run_batch(str(source), str(tmp_path / "results.jsonl"))
+
+        assert summary["ok"] == 1
+        assert intervals == [SANDBOX_HEALTH_INTERVAL]
@@ -0,0 +1,94 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from keystone import sandbox as sandbox_module
+from keystone.sandbox import SandboxPool, activate, current_session
+
+
+@pytest.fixture
+def pool():
+    return SandboxPool(["http://sb-a:8080", "http://sb-b:8080", "http://sb-c:8080"])
+
+
+class TestSandboxPool:
+    def test_requires_urls(self):
+        with pytest.raises(ValueError):
+            SandboxPool([])
+
+    def test_acquire_is_sticky(self, pool):
+        first = pool.acquire("s1")
+        assert pool.acquire("s1") is first
+        assert first.sessions == {"s1"}
+
+    def test_spreads_sessions_by_load(self, pool):
+        urls = {pool.acquire(f"s{i}").url for i in range(3)}
+        assert len(urls) == 3
+        assert all(e.load == 1 for e in pool.endpoints)
+
+    def test_release_frees_slot(self, pool):
+        endpoint = pool.acquire("s1")
+        pool.release("s1")
+        assert endpoint.load == 0
+        pool.release("unknown")
+
+    def test_unhealthy_endpoint_is_rebalanced(self, pool):
+        endpoint = pool.acquire("s1")
+        endpoint.healthy = False
+        moved = pool.acquire("s1")
+        assert moved is not endpoint
+        assert "s1" not in endpoint.sessions
+        assert "s1" in moved.sessions
+
+    def test_new_sessions_skip_open_circuits(self, pool):
+        pinned = pool.acquire("s1")
+        for _ in range(pinned.breaker.threshold):
+            pinned.breaker.record_failure()
+        assert pool.acquire("s1") is pinned
+        assert pool.acquire("s2") is not pinned
+
+    def test_all_unhealthy_still_places(self, pool):
+        for e in pool.endpoints:
+            e.healthy = False
+        assert pool.acquire("s1") in pool.endpoints
+
+    def test_client_for_without_session_uses_first(self, pool):
+        assert pool.client_for(None) is pool.endpoints[0].client
+
+
+class TestHealth:
+    async def test_marks_unhealthy_after_repeated_failures(self, pool, monkeypatch):
+        monkeypatch.setattr(sandbox_module, "SANDBOX_MAX_FAILURES", 2)
+        bad = pool.endpoints[0]
+        bad.client = AsyncMock()
+        bad.client.sandbox.get_context.side_effect = ConnectionError("down")
+        for e in pool.endpoints[1:]:
+            e.client = AsyncMock()
+
+        await pool.check_health()
+        assert bad.healthy
+        await pool.check_health()
+        assert not bad.healthy
+        assert all(e.healthy for e in pool.endpoints[1:])
+
+    async def test_recovers_on_success(self, pool):
+        endpoint = pool.endpoints[0]
+        endpoint.client = AsyncMock()
+        endpoint.healthy = False
+        endpoint.failures = 5
+        for e in pool.endpoints[1:]:
+            e.client = AsyncMock()
+        await pool.check_health()
+        assert endpoint.healthy
+        assert endpoint.failures == 0
+
+
+class TestSessionProxy:
+    async def test_proxy_resolves_active_session(self, monkeypatch):
+        pool = SandboxPool(["http://sb-a:8080", "http://sb-b:8080"])
+        monkeypatch.setattr(sandbox_module, "pool", pool)
+        pool.acquire("other")
+        activate("mine")
+        assert current_session() == "mine"
+        assert sandbox_module.sandbox.shell is pool.acquire("mine").client.shell
+        assert pool.acquire("mine") is not pool.acquire("other")
@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+
+import pytest
+
+from keystone.search import SearchIndex, TreeIndex, glob_regex, search_index
+from keystone.tools.search import list_tree, search_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "work"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "core.py").write_text("def main():\n    return 1\n")
+    (root / "src" / "app.py").write_text("from pkg.core import main\nmain()\n")
+    (root / "docs").mkdir()
+    (root / "docs" / "index.md").write_text("# docs\n")
+    (root / "setup.py").write_text("setup()\n")
+    (root / ".git").mkdir()
+    (root / ".git" / "HEAD").write_text("ref: main\n")
+    return root
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index(monkeypatch):
+    monkeypatch.setattr(search_index, "_indexes", {})
+
+
+def _grep(*matches):
+    return SimpleNamespace(
+        data=SimpleNamespace(
+            matches=[
+                SimpleNamespace(file=f, line_number=n, line_content=text) for f, n, text in matches
+            ]
+        )
+    )
+
+
+class TestGlobRegex:
+    def test_name_glob_matches_anywhere(self):
+        regex = glob_regex("*.py")
+        assert regex.match("setup.py")
+        assert regex.match("src/pkg/core.py")
+        assert not regex.match("src/app.pyc")
+
+    def test_path_glob_is_anchored(self):
+        regex = glob_regex("src/**/*.py")
+        assert regex.match("src/app.py")
+        assert regex.match("src/pkg/core.py")
+        assert not regex.match("tests/src/app.py")
+        assert not glob_regex("src/*.py").match("src/pkg/core.py")
+
+
+class TestTreeIndex:
+    def test_relisted_directory_drops_missing_files(self):
+        index = TreeIndex("/w", {"a.py": (1, 1.0), "src/b.py": (2, 1.0), "src/c.py": (3, 1.0)})
+        index.apply(["D\tsrc/", "F\tsrc/b.py\t5\t2.0"])
+        assert index.files == {"a.py": (1, 1.0), "src/b.py": (5, 2.0)}
+
+    def test_removed_directory_drops_its_subtree(self):
+        index = TreeIndex("/w", {"a.py": (1, 1.0), "old/x/y.py": (1, 1.0), "src/b.py": (1, 1.0)})
+        index.apply(["D\t", "C\t\tsrc", "F\ta.py\t1\t1.0"])
+        assert set(index.files) == {"a.py", "src/b.py"}
+
+
+class TestSearchIndex:
+    async def test_refresh_is_incremental(self, local_sandbox, tree):
+        index = SearchIndex(excludes=[".git"])
+        first = await index.refresh("s1", str(tree))
+        assert sorted(first.files) == ["docs/index.md", "setup.py", "src/app.py", "src/pkg/core.py"]
+
+        (tree / "src" / "pkg" / "util.py").write_text("x = 1\n")
+        (tree / "docs" / "index.md").unlink()
+        (tree / "setup.py").write_text("setup(name='x')\n")
+        local_sandbox.shell.exec_command.reset_mock()
+        second = await index.refresh("s1", str(tree))
+        assert second is first
+        assert sorted(second.files) == [
+            "setup.py",
+            "src/app.py",
+            "src/pkg/core.py",
+            "src/pkg/util.py",
+        ]
+        assert second.files["setup.py"][0] == len("setup(name='x')\n")
+        assert local_sandbox.shell.exec_command.await_count == 1
+
+    async def test_large_delta_is_downloaded(self, local_sandbox, tree):
+        index = SearchIndex(excludes=[".git"], inline_bytes=10)
+        result = await index.refresh("s1", str(tree))
+        assert "src/pkg/core.py" in result.files
+
+    async def test_missing_root_raises(self, local_sandbox, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            await SearchIndex().refresh("s1", str(tmp_path / "nope"))
+
+    async def test_release_drops_session(self, local_sandbox, tree):
+        index = SearchIndex()
+        await index.refresh("s1", str(tree))
+        index.release("s1")
+        assert index.get("s1", str(tree)) is None
+
+
+class TestSearchFiles:
+    async def test_glob_only_ranks_shallow_first(self, local_sandbox, tree):
+        result = await search_files.handler({"glob": "*.py", "path": str(tree)})
+        lines = result["content"][0]["text"].splitlines()
+        assert [line.split()[0] for line in lines[:3]] == [
+            "setup.py",
+            "src/app.py",
+            "src/pkg/core.py",
+        ]
+        assert lines[-1] == "[files 1-3 of 3]"
+
+    async def test_content_ranks_by_matches(self, local_sandbox, tree):
+        local_sandbox.file.grep_files.return_value = _grep(
+            (f"{tree}/src/app.py", 1, "from pkg.core import main"),
+            (f"{tree}/src/app.py", 2, "main()"),
+            (f"{tree}/src/pkg/core.py", 1, "def main():"),
+            (f"{tree}/docs/index.md", 1, "main"),
+        )
+        result = await search_files.handler({"pattern": "main", "glob": "*.py", "path": str(tree)})
+        text = result["content"][0]["text"]
+        assert text.index("src/app.py  (2 matches)") < text.index("src/pkg/core.py  (1 matches)")
+        assert "docs/index.md" not in text
+        assert "  2: main()" in text
+        call = local_sandbox.file.grep_files.await_args.kwargs
+        assert call["include"] == ["*.py"]
+        assert ".git" in call["exclude"]
+
+    async def test_results_are_not_memoized(self, local_sandbox, tree, monkeypatch):
+        monkeypatch.setattr("keystone.memo.MEMOIZE", True)
+        first = await search_files.handler({"glob": "*.md", "path": str(tree)})
+        (tree / "docs" / "guide.md").write_text("# guide\n")
+        second = await search_files.handler({"glob": "*.md", "path": str(tree)})
+        assert "guide.md" not in first["content"][0]["text"]
+        assert "docs/guide.md" in second["content"][0]["text"]
+
+    async def test_paging(self, local_sandbox, tree):
+        result = await search_files.handler(
+            {"glob": "*", "path": str(tree), "offset": 1, "limit": 2}
+        )
+        text = result["content"][0]["text"]
+        assert text.endswith("[files 2-3 of 4; next page: offset=3]")
+
+    async def test_invalid_regex(self, local_sandbox, tree):
+        result = await search_files.handler({"pattern": "(", "path": str(tree)})
+        assert result["is_error"]
+        assert "invalid pattern" in result["content"][0]["text"]
+
+    async def test_requires_a_query(self, mock_sandbox):
+        result = await search_files.handler({})
+        assert result["is_error"]
+
+
+class TestListTree:
+    async def test_summarizes_below_depth(self, local_sandbox, tree):
+        result = await list_tree.handler({"path": str(tree), "depth": 1})
+        lines = result["content"][0]["text"].splitlines()
+        assert lines[0].startswith(f"{tree}  (4 files")
+        assert "docs/  (1 files, 7B)" in lines
+        assert "setup.py  (8B)" in lines
+        assert any(line.startswith("src/  (2 files") for line in lines)
+        assert not any(".git" in line for line in lines)
+
+    async def test_nests_entries(self, local_sandbox, tree):
+        result = await list_tree.handler({"path": str(tree), "depth": 3, "glob": "src/**"})
+        lines = result["content"][0]["text"].splitlines()[1:-1]
+        assert lines == ["src/", "  app.py  (33B)", "  pkg/", "    core.py  (25B)"]
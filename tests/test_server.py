@@ -0,0 +1,178 @@
+import json
+
+import anyio
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+from keystone.sandbox import pool
+from keystone.server import Server, _events
+
+
+class FakeClient:
+    def __init__(self, gate=None):
+        self.prompts = []
+        self.gate = gate
+
+    async def query(self, prompt):
+        self.prompts.append(prompt)
+
+    async def receive_response(self):
+        if self.gate is not None:
+            await self.gate.wait()
+        yield AssistantMessage(content=[TextBlock(text=f"echo {self.prompts[-1]}")], model="test")
+
+
+class FakeAgent:
+    count = 0
+
+    def __init__(self, gate=None, sandbox_ok=True, warmup_error=None):
+        FakeAgent.count += 1
+        self.session_id = f"fake-{FakeAgent.count}"
+        self.client = FakeClient(gate)
+        self.sandbox_ok = sandbox_ok
+        self.warmup_error = warmup_error
+
+    async def warmup(self):
+        if not self.sandbox_ok:
+            raise ConnectionError("no sandbox")
+        if self.warmup_error is not None:
+            raise self.warmup_error
+        return {}
+
+    async def disconnect(self):
+        pass
+
+    async def compact_if_needed(self):
+        return False
+
+    def checkpoint(self, conversation_id):
+        pass
+
+    def record_automation(self, prompt, ok):
+        pass
+
+
+async def _start(server):
+    listener = await anyio.create_tcp_listener(local_host="127.0.0.1")
+    port = listener.extra(anyio.abc.SocketAttribute.local_port)
+    return listener, port
+
+
+async def _read_events(stream, until="done"):
+    buf = b""
+    events = []
+    while True:
+        while b"\n" not in buf:
+            chunk = await stream.receive()
+            buf += chunk
+        line, buf = buf.split(b"\n", 1)
+        event = json.loads(line)
+        events.append(event)
+        if event["type"] in (until, "error"):
+            return events
+
+
+class TestEvents:
+    def test_assistant_blocks(self):
+        message = AssistantMessage(
+            content=[TextBlock(text="hi"), ToolUseBlock(id="1", name="run_shell", input={})],
+            model="test",
+        )
+        assert _events(message) == [
+            {"type": "text", "text": "hi"},
+            {"type": "tool", "name": "run_shell"},
+        ]
+
+    def test_result(self):
+        message = ResultMessage(
+            subtype="success",
+            duration_ms=1,
+            duration_api_ms=1,
+            is_error=False,
+            num_turns=1,
+            session_id="s",
+        )
+        assert _events(message) == [{"type": "result", "is_error": False}]
+
+
+class TestServer:
+    async def test_round_trip(self):
+        server = Server(agent_factory=FakeAgent)
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                await stream.send(b'{"prompt": "hello"}\n')
+                events = await _read_events(stream)
+            assert events[0]["type"] == "session"
+            assert {"type": "text", "text": "echo hello"} in events
+            assert events[-1] == {"type": "done"}
+            tg.cancel_scope.cancel()
+
+    async def test_rejects_over_capacity(self):
+        server = Server(agent_factory=FakeAgent, max_sessions=0)
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                events = await _read_events(stream)
+            assert events == [{"type": "error", "error": "server at capacity"}]
+            tg.cancel_scope.cancel()
+
+    async def test_sandbox_failure_reported(self):
+        server = Server(agent_factory=lambda: FakeAgent(sandbox_ok=False))
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                events = await _read_events(stream)
+            assert events[-1]["type"] == "error"
+            assert "no sandbox" in events[-1]["error"]
+            assert server.sessions == {}
+            tg.cancel_scope.cancel()
+
+    async def test_warmup_error_stays_in_its_session(self):
+        agents = []
+
+        def factory():
+            agent = FakeAgent(warmup_error=RuntimeError("CLI not found"))
+            pool.acquire(agent.session_id)
+            agents.append(agent)
+            return agent
+
+        server = Server(agent_factory=factory)
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            for _ in range(2):
+                async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                    events = await _read_events(stream)
+                assert events[-1] == {"type": "error", "error": "CLI not found"}
+            assert len(agents) == 2
+            assert not any(a.session_id in pool._pins for a in agents)
+            tg.cancel_scope.cancel()
+
+    async def test_backpressure_when_queue_full(self):
+        gate = anyio.Event()
+        server = Server(agent_factory=lambda: FakeAgent(gate=gate), queue_size=1)
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                await stream.send(b'{"prompt": "a"}\n{"prompt": "b"}\n{"prompt": "c"}\n')
+                events = await _read_events(stream)
+                assert events[-1] == {"type": "error", "error": "session busy, retry later"}
+                gate.set()
+                done = await _read_events(stream)
+                assert done[-1] == {"type": "done"}
+            tg.cancel_scope.cancel()
+
+    async def test_bad_request(self):
+        server = Server(agent_factory=FakeAgent)
+        listener, port = await _start(server)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, server.handle)
+            async with await anyio.connect_tcp("127.0.0.1", port) as stream:
+                await stream.send(b"not json\n")
+                events = await _read_events(stream)
+            assert events[-1]["type"] == "error"
+            tg.cancel_scope.cancel()
@@ -1,5 +1,9 @@
+from types import SimpleNamespace
+
+import anyio
 import pytest
 
+from keystone.config import MAX_OUTPUT, SHELL_TIMEOUT
 from keystone.tools.shell import run_shell
 
 handler = run_shell.handler
@@ -33,8 +37,165 @@ class TestRunShell:
         text = result["content"][0]["text"]
         assert "[exit code: 0]" in text
 
+    async def test_output_limit_applies_without_streaming(
+        self, mock_sandbox, shell_result_factory, monkeypatch
+    ):
+        monkeypatch.setattr("keystone.tools.shell.MAX_CALL_OUTPUT", 100)
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(
+            output="y\n" * 100, exit_code=0
+        )
+        result = await handler({"command": "yes | head -100"})
+        text = result["content"][0]["text"]
+        assert "[exit code: 0; output exceeded 100 chars, rest discarded]" in text
+        assert text.count("y") == 50
+
     async def test_sandbox_exception(self, mock_sandbox):
         mock_sandbox.shell.exec_command.side_effect = RuntimeError("timeout")
         result = await handler({"command": "sleep 999"})
         assert result["is_error"] is True
         assert "run_shell failed" in result["content"][0]["text"]
+
+
+class TestRunShellStreaming:
+    @pytest.fixture(autouse=True)
+    def streaming(self, monkeypatch):
+        monkeypatch.setattr("keystone.tools.shell.STREAM_OUTPUT", True)
+        monkeypatch.setattr("keystone.tools.shell.STREAM_POLL_INTERVAL", 0)
+
+    def _view(self, output, status="running", exit_code=None):
+        return SimpleNamespace(
+            data=SimpleNamespace(output=output, status=status, exit_code=exit_code)
+        )
+
+    async def test_streams_chunks_as_they_arrive(self, mock_sandbox, capsys):
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="running", session_id="sh-1", output=None, exit_code=None)
+        )
+        mock_sandbox.shell.view.side_effect = [
+            self._view("step 1\n"),
+            self._view("step 1\nstep 2\n"),
+            self._view("step 1\nstep 2\ndone\n", status="completed", exit_code=0),
+        ]
+        result = await handler({"command": "./build.sh"})
+        text = result["content"][0]["text"]
+        assert text.count("step 2") == 1
+        assert "done" in text
+        assert "[exit code: 0]" in text
+        mock_sandbox.shell.exec_command.assert_awaited_once_with(
+            command="./build.sh", async_mode=True, hard_timeout=SHELL_TIMEOUT
+        )
+        mock_sandbox.shell.view.assert_awaited_with(id="sh-1")
+        out = capsys.readouterr().out
+        assert "┆ step 1" in out
+        assert "┆ done" in out
+
+    async def test_fast_command_completes_immediately(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="completed", session_id="sh-1", output="hi", exit_code=0)
+        )
+        result = await handler({"command": "echo hi"})
+        assert "hi\n[exit code: 0]" in result["content"][0]["text"]
+        mock_sandbox.shell.view.assert_not_awaited()
+
+    async def test_chatty_output_is_bounded(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="running", session_id="sh-1", output=None, exit_code=None)
+        )
+        lines = "".join(f"line {i}\n" for i in range(20_000))
+        mock_sandbox.shell.view.side_effect = [
+            self._view(lines[: len(lines) // 2]),
+            self._view(lines, status="completed", exit_code=0),
+        ]
+        result = await handler({"command": "yes"})
+        text = result["content"][0]["text"]
+        assert len(text) <= MAX_OUTPUT + 100
+        assert "line 0\n" in text
+        assert "line 19999" in text
+        assert "truncated" in text
+
+    async def test_streamed_output_is_reduced(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="running", session_id="sh-1", output=None, exit_code=None)
+        )
+        mock_sandbox.shell.view.return_value = self._view(
+            "epoch done\n" * 5000, status="completed", exit_code=0
+        )
+        text = (await handler({"command": "./train.sh"}))["content"][0]["text"]
+        assert "previous line repeated" in text
+        assert "truncated" not in text
+
+
+class TestRunShellTimeouts:
+    async def test_hard_timeout_passed_to_sandbox(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory()
+        await handler({"command": "make", "timeout": 30})
+        assert mock_sandbox.shell.exec_command.call_args.kwargs["hard_timeout"] == 30
+
+    async def test_hard_timeout_reported(self, mock_sandbox, shell_result_factory):
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(
+            output="partial", exit_code=None, status="hard_timeout"
+        )
+        result = await handler({"command": "sleep 999", "timeout": 5})
+        text = result["content"][0]["text"]
+        assert "partial" in text
+        assert "[timed out after 5s, process killed]" in text
+
+    async def test_hung_request_is_abandoned(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.tools.shell.TIMEOUT_GRACE", 0)
+
+        async def hang(**kwargs):
+            await anyio.sleep(10)
+
+        mock_sandbox.shell.exec_command.side_effect = hang
+        result = await handler({"command": "sleep 999", "timeout": 0.05})
+        assert result["is_error"] is True
+        assert "timed out" in result["content"][0]["text"]
+        shell_id = mock_sandbox.shell.exec_command.call_args.kwargs["id"]
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id=shell_id)
+
+    async def test_cancellation_kills_process_without_streaming(self, mock_sandbox):
+        async def hang(**kwargs):
+            await anyio.sleep(10)
+
+        mock_sandbox.shell.exec_command.side_effect = hang
+        with anyio.move_on_after(0.05):
+            await handler({"command": "sleep 1000"})
+        shell_id = mock_sandbox.shell.exec_command.call_args.kwargs["id"]
+        assert shell_id.startswith("run-")
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id=shell_id)
+
+
+class TestStreamingLimits:
+    @pytest.fixture(autouse=True)
+    def streaming(self, monkeypatch, mock_sandbox):
+        monkeypatch.setattr("keystone.tools.shell.STREAM_OUTPUT", True)
+        monkeypatch.setattr("keystone.tools.shell.STREAM_POLL_INTERVAL", 0.01)
+        monkeypatch.setattr("keystone.tools.shell.TIMEOUT_GRACE", 0)
+        mock_sandbox.shell.exec_command.return_value = SimpleNamespace(
+            data=SimpleNamespace(status="running", session_id="sh-1", output=None, exit_code=None)
+        )
+
+    async def test_timeout_kills_process(self, mock_sandbox):
+        mock_sandbox.shell.view.return_value = SimpleNamespace(
+            data=SimpleNamespace(output="tick\n", status="running", exit_code=None)
+        )
+        result = await handler({"command": "sleep 999", "timeout": 0.05})
+        assert "[timed out after 0.05s, process killed]" in result["content"][0]["text"]
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id="sh-1")
+
+    async def test_output_limit_kills_process(self, mock_sandbox, monkeypatch):
+        monkeypatch.setattr("keystone.tools.shell.MAX_CALL_OUTPUT", 100)
+        mock_sandbox.shell.view.return_value = SimpleNamespace(
+            data=SimpleNamespace(output="y\n" * 100, status="running", exit_code=None)
+        )
+        result = await handler({"command": "yes"})
+        assert "[output exceeded 100 chars, process killed]" in result["content"][0]["text"]
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id="sh-1")
+
+    async def test_cancellation_kills_process(self, mock_sandbox):
+        mock_sandbox.shell.view.return_value = SimpleNamespace(
+            data=SimpleNamespace(output="", status="running", exit_code=None)
+        )
+        with anyio.move_on_after(0.05):
+            await handler({"command": "sleep 999"})
+        mock_sandbox.shell.kill_process.assert_awaited_once_with(id="sh-1")
@@ -0,0 +1,145 @@
+import os
+import tarfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from keystone.agent import KeystoneAgent
+from keystone.snapshot import Snapshot, SnapshotStore, journaled, setup_steps
+from keystone.tools.files import write_file
+from keystone.tools.shell import run_shell
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(tmp_path / "sessions", roots=[str(tmp_path / "sandbox")])
+
+
+class TestSetupSteps:
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "pip install pandas",
+            "python -m pip install -r requirements.txt",
+            "sudo apt-get install -y ffmpeg",
+            "npm install",
+            "git clone https://github.com/x/y",
+            "curl -sL https://x/data.csv -o data.csv",
+        ],
+    )
+    def test_setup_commands(self, command):
+        assert setup_steps("run_shell", {"command": command}) == [command]
+
+    @pytest.mark.parametrize("command", ["ls", "python app.py", "pip list", "curl https://x"])
+    def test_other_commands(self, command):
+        assert setup_steps("run_shell", {"command": command}) == []
+
+    def test_notebook_installs(self):
+        code = "%pip install polars\nimport polars\n!pip install rich"
+        assert setup_steps("execute_python", {"code": code}) == [
+            "pip install polars",
+            "pip install rich",
+        ]
+
+
+class TestManifest:
+    def test_save_and_load(self, store):
+        store.record("s1", "write_file", {"path": "/home/gem/app.py", "content": "x"})
+        store.record("s1", "run_shell", {"command": "pip install flask"})
+        store.record("s1", "run_shell", {"command": "pip install flask"})
+        store.save("s1", conversation_id="conv-1")
+
+        fresh = SnapshotStore(store.root)
+        snapshot = fresh.load("s1")
+        assert snapshot.conversation_id == "conv-1"
+        assert set(snapshot.files) == {"/home/gem/app.py"}
+        assert snapshot.steps == ["pip install flask"]
+
+    def test_missing_snapshot(self, store):
+        with pytest.raises(FileNotFoundError, match="no snapshot"):
+            store.load("nope")
+
+    @pytest.mark.parametrize("session_id", ["../escape", "/etc", "a/b", "", "x" * 65])
+    def test_unsafe_session_id_is_rejected(self, store, session_id):
+        with pytest.raises(ValueError, match="invalid session id"):
+            store.load(session_id)
+        with pytest.raises(ValueError, match="invalid session id"):
+            store.save(session_id)
+        assert not store.root.exists()
+
+    def test_unknown_keys_are_ignored(self):
+        assert Snapshot.from_dict({"session_id": "s", "extra": 1}).session_id == "s"
+
+
+class TestJournaled:
+    async def test_records_successful_calls(
+        self, mock_sandbox, shell_result_factory, monkeypatch, store
+    ):
+        monkeypatch.setattr("keystone.snapshot.snapshots", store)
+        monkeypatch.setattr("keystone.snapshot.current_session", lambda: "s1")
+        shell = journaled(run_shell)
+
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(exit_code=1)
+        await shell.handler({"command": "pip install nothing-here"})
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(exit_code=0)
+        await shell.handler({"command": "pip install requests"})
+
+        assert store.journal("s1").steps == ["pip install requests"]
+
+    async def test_records_written_files(
+        self, mock_sandbox, file_write_result_factory, monkeypatch, store
+    ):
+        monkeypatch.setattr("keystone.snapshot.snapshots", store)
+        monkeypatch.setattr("keystone.snapshot.current_session", lambda: "s1")
+        mock_sandbox.file.write_file.return_value = file_write_result_factory()
+        await journaled(write_file).handler({"path": "/home/gem/a.txt", "content": "hi"})
+        assert "/home/gem/a.txt" in store.journal("s1").files
+
+
+class TestExportRestore:
+    async def test_round_trip(self, local_sandbox, store, tmp_path):
+        sandbox_root = tmp_path / "sandbox"
+        (sandbox_root / "lib").mkdir(parents=True)
+        old = sandbox_root / "lib" / "preinstalled.py"
+        old.write_text("old")
+        past = time.time() - 3600
+        os.utime(old, (past, past))
+
+        store.journal("s1")
+        new = sandbox_root / "lib" / "installed.py"
+        new.write_text("new")
+        (sandbox_root / "lib" / "__pycache__").mkdir()
+        (sandbox_root / "lib" / "__pycache__" / "x.pyc").write_text("cache")
+
+        manifest = await store.export("s1")
+        assert manifest.exists()
+        new.unlink()
+
+        outcome = await store.restore(SnapshotStore(store.root).load("s1"))
+        assert "restored" in outcome
+        assert new.read_text() == "new"
+
+        with tarfile.open(store.directory("s1") / "files.tar.gz") as tar:
+            names = tar.getnames()
+        assert str(new) in names
+        assert str(old) not in names
+        assert not any("__pycache__" in n for n in names)
+
+    async def test_replays_steps_without_archive(self, local_sandbox, store, tmp_path):
+        marker = tmp_path / "marker"
+        snapshot = Snapshot("s1", steps=[f"mkdir {marker}"])
+        assert await store.restore(snapshot) == "replayed 1 setup steps"
+        assert marker.is_dir()
+
+
+class TestResume:
+    @patch("keystone.agent.ClaudeSDKClient")
+    @patch("keystone.agent.create_sdk_mcp_server")
+    def test_resumes_conversation(self, mock_create_server, mock_client_cls, monkeypatch, store):
+        monkeypatch.setattr("keystone.agent.snapshots", store)
+        store.save("s1", conversation_id="conv-9")
+        agent = KeystoneAgent(session_id="s1", resume=True)
+        options = mock_client_cls.call_args.kwargs["options"]
+        assert options.resume == "conv-9"
+        assert agent.snapshot.conversation_id == "conv-9"
@@ -0,0 +1,56 @@
+import subprocess
+import sys
+
+from benchmarks.startup import parse_importtime
+from keystone.sandbox import SandboxPool
+
+
+def _loaded(code: str, modules: list[str]) -> list[str]:
+    """Which of ``modules`` are imported after running ``code`` in a fresh interpreter."""
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {modules!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+HEAVY = ["claude_agent_sdk", "agent_sandbox", "keystone.agent", "keystone.tools.python"]
+
+
+class TestLazyImports:
+    def test_package_import_is_light(self):
+        assert _loaded("import keystone", HEAVY) == []
+
+    def test_cli_import_defers_the_sdk(self):
+        assert _loaded("import keystone.cli", HEAVY) == []
+
+    def test_supporting_modules_defer_the_sdk(self):
+        code = "import keystone.automations, keystone.context, keystone.snapshot, keystone.tools"
+        assert _loaded(code, HEAVY) == []
+
+    def test_agent_is_still_exported(self):
+        loaded = _loaded("from keystone import KeystoneAgent", HEAVY)
+        assert {"claude_agent_sdk", "keystone.agent", "keystone.tools.python"} <= set(loaded)
+
+    def test_tool_modules_load_on_first_use(self):
+        code = "from keystone.tools import run_shell"
+        assert _loaded(code, ["keystone.tools.shell", "keystone.tools.python"]) == [
+            "keystone.tools.shell"
+        ]
+
+
+class TestLazyClients:
+    def test_clients_are_built_on_first_use(self):
+        pool = SandboxPool(["http://a:1", "http://b:2"])
+        assert all(e._client is None for e in pool.endpoints)
+        client = pool.client_for("s1")
+        assert client is pool.endpoints[0].client
+        assert pool.endpoints[1]._client is None
+
+
+class TestStartupBenchmark:
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   keystone.config\n"
+            "import time:       300 |        420 | keystone\n"
+        )
+        assert parse_importtime(stderr) == [("keystone.config", 120, 120), ("keystone", 300, 420)]
@@ -2,25 +2,42 @@ from keystone.tools import ALL_TOOLS, tool_names
 
 
 class TestAllTools:
-    def test_has_four_tools(self):
-        assert len(ALL_TOOLS) == 4
+    def test_has_fifteen_tools(self):
+        assert len(ALL_TOOLS) == 15
 
     def test_expected_names(self):
         names = {t.name for t in ALL_TOOLS}
-        assert names == {"execute_python", "run_shell", "write_file", "read_file"}
+        assert names == {
+            "execute_python",
+            "run_shell",
+            "write_file",
+            "read_file",
+            "read_files",
+            "write_files",
+            "run_shell_batch",
+            "search_files",
+            "list_tree",
+            "start_job",
+            "job_status",
+            "job_output",
+            "cancel_job",
+            "install_packages",
+            "fetch_result",
+        }
 
 
 class TestToolNames:
     def test_sandbox_server_name(self):
         result = tool_names("sandbox")
-        assert result == [
+        assert result[:4] == [
             "mcp__sandbox__execute_python",
             "mcp__sandbox__run_shell",
             "mcp__sandbox__write_file",
             "mcp__sandbox__read_file",
         ]
+        assert "mcp__sandbox__run_shell_batch" in result
 
     def test_different_server_name(self):
         result = tool_names("myserver")
         assert all(n.startswith("mcp__myserver__") for n in result)
-        assert len(result) == 4
+        assert len(result) == len(ALL_TOOLS)
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from keystone.tracing import JsonlExporter, Span, Tracer, record_output, traced
+
+
+class ListExporter:
+    def __init__(self):
+        self.records = []
+
+    def export(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr("keystone.tracing.tracer", Tracer(exporter))
+    return exporter
+
+
+class TestSpan:
+    def test_derived_fields(self):
+        span = Span(tool="t", session="s", ts=0, bytes_in=10, duration=2.0, format_time=0.5)
+        span.raw_chars = 1000
+        span.bytes_out = 250
+        record = span.to_dict()
+        assert record["sandbox_time"] == 1.5
+        assert record["truncation_ratio"] == 0.25
+        assert record["type"] == "tool"
+
+
+class TestTraced:
+    async def test_records_span(self, exporter):
+        @traced
+        async def my_tool(args):
+            record_output(500, 0.01)
+            return {"content": [{"type": "text", "text": "x" * 100}]}
+
+        await my_tool({"path": "/a"})
+        (record,) = exporter.records
+        assert record["tool"] == "my_tool"
+        assert record["bytes_in"] == len(json.dumps({"path": "/a"}))
+        assert record["bytes_out"] == 100
+        assert record["raw_chars"] == 500
+        assert record["truncation_ratio"] == 0.2
+        assert record["is_error"] is False
+
+    async def test_error_result_and_exception(self, exporter):
+        @traced
+        async def failing(args):
+            if args.get("raise"):
+                raise RuntimeError("boom")
+            return {"content": [{"type": "text", "text": "bad"}], "is_error": True}
+
+        await failing({})
+        with pytest.raises(RuntimeError):
+            await failing({"raise": True})
+        assert [r["is_error"] for r in exporter.records] == [True, True]
+        assert exporter.records[1]["error"] == "boom"
+
+    async def test_tool_handlers_are_traced(self, exporter, mock_sandbox, shell_result_factory):
+        from keystone.tools.shell import run_shell
+
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="hi")
+        await run_shell.handler({"command": "echo hi"})
+        assert exporter.records[-1]["tool"] == "run_shell"
+        assert exporter.records[-1]["raw_chars"] > 0
+
+    async def test_oversized_python_output_counts_as_truncated(self, exporter, mock_sandbox):
+        from types import SimpleNamespace
+
+        from keystone.tools.python import execute_python
+
+        text = "".join(f"{i:08d}" for i in range(25_000))
+        mock_sandbox.jupyter.execute_code.return_value = SimpleNamespace(
+            data=SimpleNamespace(
+                status="ok", outputs=[SimpleNamespace(output_type="stream", text=text)]
+            )
+        )
+        await execute_python.handler({"code": "dump()"})
+        record = exporter.records[-1]
+        assert record["raw_chars"] == 200_000
+        assert record["truncation_ratio"] < 0.1
+
+    async def test_discarded_shell_output_is_still_counted(
+        self, exporter, mock_sandbox, shell_result_factory, monkeypatch
+    ):
+        from keystone.tools.shell import run_shell
+
+        monkeypatch.setattr("keystone.tools.shell.MAX_CALL_OUTPUT", 1000)
+        mock_sandbox.shell.exec_command.return_value = shell_result_factory(output="x" * 50_000)
+        await run_shell.handler({"command": "dump"})
+        assert exporter.records[-1]["raw_chars"] > 50_000
+
+
+class TestAggregates:
+    def test_session_summary_and_turns(self):
+        exporter = ListExporter()
+        tracer = Tracer(exporter)
+        for duration in (0.1, 0.3):
+            tracer.record(
+                Span(
+                    tool="read_file", session="s1", ts=0, bytes_in=5, duration=duration, bytes_out=7
+                )
+            )
+        tracer.record_turn("s1", duration_ms=2000, api_ms=1500)
+        summary = tracer.summary("s1")
+        stats = summary["tools"]["read_file"]
+        assert stats["calls"] == 2
+        assert stats["max_time"] == 0.3
+        assert stats["bytes_out"] == 14
+        assert summary["turns"] == 1
+        assert summary["model_time"] == 1.5
+
+        tracer.end_session("s1")
+        assert exporter.records[-1]["type"] == "session"
+        assert tracer.summary("s1") == {}
+
+
+class TestJsonlExporter:
+    def test_appends_lines(self, tmp_path):
+        path = tmp_path / "nested" / "traces.jsonl"
+        exporter = JsonlExporter(path)
+        exporter.export({"a": 1})
+        exporter.export({"b": 2})
+        exporter.close()
+        lines = path.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [{"a": 1}, {"b": 2}]
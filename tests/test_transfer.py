@@ -0,0 +1,142 @@
+import base64
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from keystone import transfer
+from keystone.transfer import download, download_dir, read_range, upload, upload_dir
+
+
+def _shell(output, exit_code=0):
+    return SimpleNamespace(data=SimpleNamespace(output=output, exit_code=exit_code))
+
+
+class TestReadRange:
+    async def test_slices_in_sandbox(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _shell(
+            "1000\n" + base64.b64encode(b"hello").decode()
+        )
+        data, size = await read_range("/data/big file.csv", 10, 5)
+        assert data == b"hello"
+        assert size == 1000
+        command = mock_sandbox.shell.exec_command.call_args.kwargs["command"]
+        assert "tail -c +11 '/data/big file.csv'" in command
+        assert "head -c 5" in command
+
+    async def test_missing_file_raises(self, mock_sandbox):
+        mock_sandbox.shell.exec_command.return_value = _shell(
+            "stat: cannot stat '/nope': No such file or directory", exit_code=1
+        )
+        with pytest.raises(OSError, match="No such file"):
+            await read_range("/nope", 0, 10)
+
+
+class TestUpload:
+    async def test_chunks_are_appended(self, mock_sandbox, tmp_path):
+        src = tmp_path / "data.bin"
+        payload = bytes(range(256)) * 10
+        src.write_bytes(payload)
+
+        size = await upload(src, "/home/gem/data.bin", chunk_size=1000)
+
+        assert size == len(payload)
+        calls = mock_sandbox.file.write_file.call_args_list
+        assert len(calls) == 3
+        assert [c.kwargs["append"] for c in calls] == [False, True, True]
+        assert all(c.kwargs["encoding"] == "base64" for c in calls)
+        sent = b"".join(base64.b64decode(c.kwargs["content"]) for c in calls)
+        assert sent == payload
+
+    async def test_empty_file(self, mock_sandbox, tmp_path):
+        src = tmp_path / "empty"
+        src.write_bytes(b"")
+        assert await upload(src, "/home/gem/empty") == 0
+        mock_sandbox.file.write_file.assert_awaited_once()
+
+
+class TestDownload:
+    async def test_streams_to_disk(self, mock_sandbox, tmp_path):
+        async def chunks(**kwargs):
+            for part in (b"abc", b"def", b"g"):
+                yield part
+
+        mock_sandbox.file.download_file = chunks
+        dest = tmp_path / "out.bin"
+        assert await download("/home/gem/out.bin", dest) == 7
+        assert dest.read_bytes() == b"abcdefg"
+
+
+class TestCompressedTransfer:
+    async def test_gzip_round_trip(self, local_sandbox, tmp_path):
+        src = tmp_path / "data.csv"
+        src.write_bytes(b"id,value\n" + b"".join(b"%d,same\n" % i for i in range(5000)))
+        remote = tmp_path / "remote.csv"
+
+        assert (
+            await upload(src, str(remote), chunk_size=1000, compress="gzip") == src.stat().st_size
+        )
+        assert remote.read_bytes() == src.read_bytes()
+        sent = sum(
+            len(base64.b64decode(c.kwargs["content"]))
+            for c in local_sandbox.file.write_file.call_args_list
+        )
+        assert sent < src.stat().st_size // 3
+
+        back = tmp_path / "back.csv"
+        assert await download(str(remote), back, compress="gzip") == src.stat().st_size
+        assert back.read_bytes() == src.read_bytes()
+        assert not list(Path("/tmp").glob("keystone-*"))
+
+    async def test_unknown_codec(self, mock_sandbox, tmp_path):
+        src = tmp_path / "a"
+        src.write_bytes(b"a")
+        with pytest.raises(ValueError, match="unknown compression"):
+            await upload(src, "/a", compress="lz4")
+
+
+class TestDirectoryTransfer:
+    @pytest.mark.parametrize("compress", [None, "gzip"])
+    async def test_round_trip(self, local_sandbox, tmp_path, compress):
+        src = tmp_path / "src"
+        (src / "pkg").mkdir(parents=True)
+        (src / "pkg" / "model.bin").write_bytes(bytes(range(256)) * 100)
+        (src / "README").write_text("hello")
+
+        remote = tmp_path / "remote"
+        assert await upload_dir(src, str(remote), compress=compress) > 0
+        assert (remote / "pkg" / "model.bin").read_bytes() == bytes(range(256)) * 100
+
+        dest = tmp_path / "dest"
+        await download_dir(str(remote), dest, compress=compress)
+        assert (dest / "README").read_text() == "hello"
+        assert (dest / "pkg" / "model.bin").read_bytes() == bytes(range(256)) * 100
+
+    async def test_failed_unpack_raises(self, local_sandbox, tmp_path):
+        (tmp_path / "src").mkdir()
+        (tmp_path / "blocker").write_text("not a dir")
+        with pytest.raises(OSError):
+            await upload_dir(tmp_path / "src", str(tmp_path / "blocker"))
+
+    async def test_packing_runs_off_the_event_loop(self, local_sandbox, tmp_path, monkeypatch):
+        threads = []
+        for name in ("_compress_file", "_pack_dir", "_unpack_dir"):
+            helper = getattr(transfer, name)
+
+            def spy(*args, _helper=helper):
+                threads.append(threading.get_ident())
+                return _helper(*args)
+
+            monkeypatch.setattr(transfer, name, spy)
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("a")
+
+        await upload(src / "a.txt", str(tmp_path / "a.txt"), compress="gzip")
+        await upload_dir(src, str(tmp_path / "remote"), compress="gzip")
+        await download_dir(str(tmp_path / "remote"), tmp_path / "dest", compress="gzip")
+
+        assert (tmp_path / "dest" / "a.txt").read_text() == "a"
+        assert len(threads) == 3
+        assert threading.get_ident() not in threads
@@ -0,0 +1,130 @@
+import anyio
+import httpx
+import pytest
+
+from benchmarks.fake_sandbox import FakeSandbox
+from keystone.transport import CircuitBreaker, CircuitOpenError, RetryTransport, make_client
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("keystone.transport._backoff", lambda attempt, response=None: 0)
+
+
+def _client(handler, **kwargs):
+    transport = RetryTransport(httpx.MockTransport(handler), **kwargs)
+    return httpx.AsyncClient(transport=transport, base_url="http://sandbox")
+
+
+def _flaky(*outcomes):
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request.method)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    return handler, calls
+
+
+class TestRetryTransport:
+    async def test_retries_connect_errors_for_any_method(self):
+        handler, calls = _flaky(httpx.ConnectError("refused"), 200)
+        async with _client(handler) as client:
+            response = await client.post("/v1/shell/exec", json={"command": "ls"})
+        assert response.status_code == 200
+        assert calls == ["POST", "POST"]
+
+    async def test_retries_refused_requests(self):
+        handler, calls = _flaky(503, 429, 200)
+        async with _client(handler) as client:
+            response = await client.post("/v1/shell/exec")
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+    async def test_does_not_resend_post_that_may_have_run(self):
+        handler, calls = _flaky(httpx.ReadError("reset"), 200)
+        async with _client(handler) as client:
+            with pytest.raises(httpx.ReadError):
+                await client.post("/v1/shell/exec")
+        assert len(calls) == 1
+
+    async def test_retries_idempotent_gateway_errors(self):
+        handler, calls = _flaky(502, 200)
+        async with _client(handler) as client:
+            assert (await client.get("/v1/sandbox")).status_code == 200
+        assert len(calls) == 2
+
+    async def test_gives_up_after_retries(self):
+        handler, calls = _flaky(503)
+        async with _client(handler, retries=2) as client:
+            assert (await client.post("/v1/shell/exec")).status_code == 503
+        assert len(calls) == 3
+
+    async def test_client_errors_are_not_retried(self):
+        handler, calls = _flaky(404)
+        async with _client(handler) as client:
+            assert (await client.get("/missing")).status_code == 404
+        assert len(calls) == 1
+
+    async def test_open_circuit_fails_fast(self):
+        handler, calls = _flaky(httpx.ConnectError("refused"))
+        breaker = CircuitBreaker(threshold=2, reset_after=60)
+        async with _client(handler, retries=0, breaker=breaker) as client:
+            for _ in range(2):
+                with pytest.raises(httpx.ConnectError):
+                    await client.get("/v1/sandbox")
+            with pytest.raises(CircuitOpenError):
+                await client.get("/v1/sandbox")
+        assert len(calls) == 2
+
+    async def test_cancelled_trial_releases_the_probe(self):
+        class Hanging(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                await anyio.sleep_forever()
+
+        breaker = CircuitBreaker(threshold=1, reset_after=0)
+        breaker.record_failure()
+        transport = RetryTransport(Hanging(), breaker=breaker)
+        async with httpx.AsyncClient(transport=transport, base_url="http://sandbox") as client:
+            with anyio.move_on_after(0.01):
+                await client.get("/v1/sandbox")
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+
+class TestCircuitBreaker:
+    def test_half_open_allows_one_trial(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr("keystone.transport.time.monotonic", lambda: clock[0])
+        breaker = CircuitBreaker(threshold=1, reset_after=10)
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+        clock[0] = 10
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_trial_outcome_closes_or_reopens(self, monkeypatch):
+        clock = [0.0]
+        monkeypatch.setattr("keystone.transport.time.monotonic", lambda: clock[0])
+        breaker = CircuitBreaker(threshold=1, reset_after=10)
+        breaker.record_failure()
+        clock[0] = 10
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        clock[0] = 20
+        breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+class TestMakeClient:
+    async def test_talks_to_sandbox(self):
+        with FakeSandbox() as fake:
+            client = make_client(fake.url)
+            result = await client.shell.exec_command(command="ls")
+            assert result.data.exit_code == 0
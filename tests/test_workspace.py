@@ -0,0 +1,94 @@
+import shutil
+
+import pytest
+
+from keystone.workspace import WorkspaceSync
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    local, remote = tmp_path / "project", tmp_path / "sandbox" / "workspace"
+    (local / "src").mkdir(parents=True)
+    (local / "src" / "app.py").write_text("print('hi')\n")
+    (local / "README.md").write_text("# project\n")
+    (local / ".git").mkdir()
+    (local / ".git" / "HEAD").write_text("ref: main\n")
+    return local, remote
+
+
+def _sync(dirs, tmp_path):
+    local, remote = dirs
+    return WorkspaceSync(local, str(remote), excludes=[".git"], state_dir=tmp_path / "state")
+
+
+class TestWorkspaceSync:
+    async def test_initial_push_sends_everything_but_excludes(self, local_sandbox, dirs, tmp_path):
+        result = await _sync(dirs, tmp_path).push()
+        assert result.sent == ["README.md", "src/app.py"]
+        assert (dirs[1] / "src" / "app.py").read_text() == "print('hi')\n"
+        assert not (dirs[1] / ".git").exists()
+
+    async def test_push_sends_only_changes(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        assert not await ws.push()
+
+        (dirs[0] / "src" / "app.py").write_text("print('changed')\n")
+        (dirs[0] / "README.md").unlink()
+        result = await ws.push()
+        assert result.sent == ["src/app.py"]
+        assert result.deleted == ["README.md"]
+        assert (dirs[1] / "src" / "app.py").read_text() == "print('changed')\n"
+        assert not (dirs[1] / "README.md").exists()
+
+    async def test_touch_without_change_is_not_sent(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        (dirs[0] / "README.md").write_text("# project\n")
+        assert not await ws.push()
+
+    async def test_state_survives_restart(self, local_sandbox, dirs, tmp_path):
+        await _sync(dirs, tmp_path).push()
+        assert not await _sync(dirs, tmp_path).push()
+
+    async def test_fresh_sandbox_gets_everything_again(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        shutil.rmtree(dirs[1])
+        assert not (await ws.pull()).deleted
+        assert (await ws.push()).sent == ["README.md", "src/app.py"]
+
+    async def test_pull_brings_back_sandbox_changes(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        (dirs[1] / "src" / "app.py").write_text("print('agent edit')\n")
+        (dirs[1] / "out").mkdir()
+        (dirs[1] / "out" / "report.csv").write_text("a,b\n")
+        (dirs[1] / "README.md").unlink()
+
+        # A push in between must not overwrite the sandbox edit.
+        assert not (await ws.push()).sent
+        result = await ws.pull()
+
+        assert result.received == ["out/report.csv", "src/app.py"]
+        assert result.deleted == ["README.md"]
+        assert (dirs[0] / "src" / "app.py").read_text() == "print('agent edit')\n"
+        assert (dirs[0] / "out" / "report.csv").read_text() == "a,b\n"
+        assert not (dirs[0] / "README.md").exists()
+        assert not await ws.sync()
+
+    async def test_host_deletion_survives_pull(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        (dirs[0] / "README.md").unlink()
+        assert not (await ws.pull()).received
+        assert not (dirs[0] / "README.md").exists()
+        assert (await ws.push()).deleted == ["README.md"]
+        assert not (dirs[1] / "README.md").exists()
+
+    async def test_host_edit_survives_pull(self, local_sandbox, dirs, tmp_path):
+        ws = _sync(dirs, tmp_path)
+        await ws.push()
+        (dirs[0] / "src" / "app.py").write_text("print('host edit')\n")
+        assert not await ws.pull()
+        assert (await ws.push()).sent == ["src/app.py"]